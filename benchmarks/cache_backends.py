@@ -0,0 +1,121 @@
+"""
+Compares cache backends of `contentful_proxy_py3` on the same workload.
+
+Every backend stores transformed CDA-like responses and serves single hits, misses
+and multi-key reads of `--batch` keys. Redis is measured on `--redis-url` or, with
+`--fake`, on fakeredis (which shows encoding cost only, not the network).
+
+Usage (from repository root):
+    python -m benchmarks.cache_backends [--keys 200] [--items 20] [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import json
+import statistics
+import timeit
+
+from benchmarks import payloads
+from contentful_proxy_py3.backends import LRUCache
+
+
+class LocalBackend:
+    name = 'local'
+
+    def __init__(self):
+        self.cache = LRUCache(max_bytes=512 * 1024 * 1024, ttl=600)
+
+    def set_many(self, values, ttl):
+        for key, value in values.items():
+            self.cache.set(key, value, ttl=ttl)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+        return {key: self.cache.get(key) for key in keys}
+
+
+class RedisBackend:
+
+    def __init__(self, cache, name):
+        self.cache = cache
+        self.name = name
+
+    def set_many(self, values, ttl):
+        self.cache.set_many(values, ttl)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+
+def redis_backends(args):
+    from contentful_proxy_py3.backends.redis import RedisCache
+
+    if args.fake:
+        import fakeredis
+        client = fakeredis.FakeRedis()
+        yield RedisBackend(RedisCache(client), 'fakeredis zlib')
+        yield RedisBackend(RedisCache(client, compression_level=0), 'fakeredis raw')
+        return
+
+    cache = RedisCache.from_url(args.redis_url)
+    cache.client.ping()
+    yield RedisBackend(cache, 'redis zlib')
+    yield RedisBackend(RedisCache(cache.client, compression_level=0), 'redis raw')
+
+
+def measure(backend, values, batch, repeat):
+    """
+    :return: Milliseconds per operation of the workload.
+    """
+    keys = list(values)
+    backend.set_many(values, ttl=600)
+
+    def per_op(function, count):
+        return statistics.median(timeit.repeat(function, number=1, repeat=repeat)) * 1000 / count
+
+    return {
+        'set': per_op(lambda: backend.set_many(values, ttl=600), len(keys)),
+        'hit': per_op(lambda: [backend.get(key) for key in keys], len(keys)),
+        'miss': per_op(lambda: [backend.get(f'{key}:missing') for key in keys], len(keys)),
+        f'get {batch}': per_op(
+            lambda: [backend.get_many(keys[offset:offset + batch]) for offset in range(0, len(keys), batch)],
+            len(range(0, len(keys), batch)),
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=200)
+    parser.add_argument('--items', type=int, default=20, help='Items per cached response.')
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--redis-url', default='redis://localhost:6379/0')
+    parser.add_argument('--fake', action='store_true', help='Use fakeredis instead of Redis server.')
+    args = parser.parse_args()
+
+    values = {
+        f'contentful:space:master:bench:entries:None?skip={index}': json.dumps(
+            payloads.generate(items=args.items, seed=index)
+        )
+        for index in range(args.keys)
+    }
+
+    backends = [LocalBackend()]
+    try:
+        backends.extend(redis_backends(args))
+    except Exception as ex:  # Redis is optional, local backend is still measured
+        print(f'Redis is not measured: {ex!r}')
+
+    print(f'{args.keys} keys, {statistics.mean(map(len, values.values())):.0f} bytes per value')
+    print(f'{"backend":<16} ' + ' '.join(f'{op:>10}' for op in ('set ms', 'hit ms', 'miss ms', f'get {args.batch} ms')))
+    for backend in backends:
+        result = measure(backend, values, args.batch, args.repeat)
+        print(f'{backend.name:<16} ' + ' '.join(f'{ms:>10.3f}' for ms in result.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares cache misses of `contentful_proxy_py3.ContentfulClient` with a new HTTP session per
+request against the pooled session of the client.
+
+Contentful is replaced by a local HTTP/1.1 server which serves a synthetic payload. Every new
+connection is delayed by `--connect-delay-ms` to stand in for TCP and TLS setup with the CDN.
+
+Usage (from repository root):
+    python -m benchmarks.http_session [--requests 50] [--connect-delay-ms 20] [--threads 4]
+"""
+import argparse
+import http.server
+import json
+import logging
+import statistics
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import payloads
+from contentful_proxy_py3.client import ContentfulClient
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections alive
+
+    def do_GET(self):
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body, connect_delay):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.body = body
+        self.connect_delay = connect_delay
+        self.connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        time.sleep(self.connect_delay)
+        return request
+
+
+def client_class(url, pooled):
+    class Client(ContentfulClient):
+        CONTENTFUL_CDN_URL = url
+        _contentful_space = 'space'
+        _contentful_token = 'token'
+        _proxy_hostname = 'http://localhost'
+        _cache_client = None
+
+        def _cache_get(self, cache_key):
+            return None  # every request is a miss
+
+        def _cache_set(self, cache_key, content, expiration_time):
+            pass
+
+    if not pooled:
+        # Former behaviour, session is created for every request
+        Client._request_session = classmethod(lambda cls: cls._create_request_session())
+
+    return Client
+
+
+def measure(client, requests, threads):
+    def timed(index):
+        started = time.perf_counter()
+        client.contentful_get('entries', query_string=f'skip={index}')
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(threads) as executor:
+        return sorted(executor.map(timed, range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--connect-delay-ms', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--items', type=int, default=20)
+    args = parser.parse_args()
+
+    body = json.dumps(payloads.generate(items=args.items)).encode()
+    logging.disable(logging.WARNING)  # FlattenFields warns about every value it can not flatten
+
+    print(f'{args.requests} misses, {args.threads} threads, {len(body)} bytes, '
+          f'{args.connect_delay_ms} ms per new connection')
+    print(f'{"session":<12} {"connections":>11} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9}')
+    for name, pooled in (('per request', False), ('pooled', True)):
+        server = StandInServer(body, args.connect_delay_ms / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            client = client_class(f'http://127.0.0.1:{server.server_address[1]}', pooled)()
+            latencies = measure(client, args.requests, args.threads)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        print(f'{name:<12} {server.connections:>11} {statistics.mean(latencies):>9.2f} '
+              f'{latencies[len(latencies) // 2]:>9.2f} {latencies[int(len(latencies) * 0.95)]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares JSON codecs on CDA-like payloads.
+
+Runs against `contentful_proxy_py3.json_codec` on Python 3 and against
+`contentful_proxy.utils.json_codec` on Python 2, so the codec choice of the
+App Engine app is measured with python2.7.
+
+Usage (from repository root):
+    python -m benchmarks.json_codec [--repeat 20]
+"""
+from __future__ import division, print_function
+
+import argparse
+import sys
+import timeit
+
+from benchmarks import payloads
+
+if sys.version_info[0] == 2:
+    from contentful_proxy.utils import json_codec
+else:
+    from contentful_proxy_py3 import json_codec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print('Python {}, codecs: {}'.format(sys.version.split()[0], ', '.join(json_codec.CODECS)))
+    print('{:>6} {:>9} {:>7} {:>9} {:>9} {:>8}'.format('items', 'size', 'codec', 'loads ms', 'dumps ms', 'speedup'))
+    for size in (10, 100, 1000):
+        content = payloads.generate(items=size)
+        data = json_codec.CODECS['json'].dumps(content)
+        baseline = None
+
+        for name, codec in reversed(list(json_codec.CODECS.items())):
+            loads = min(timeit.repeat(lambda: codec.loads(data), number=1, repeat=args.repeat)) * 1000
+            dumps = min(timeit.repeat(lambda: codec.dumps(content), number=1, repeat=args.repeat)) * 1000
+            if baseline is None:
+                baseline = loads + dumps
+
+            print('{:>6} {:>9} {:>7} {:>9.3f} {:>9.3f} {:>7.1f}x'.format(
+                size, len(data), name, loads, dumps, baseline / (loads + dumps)
+            ))
+
+
+if __name__ == '__main__':
+    main()
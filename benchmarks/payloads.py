@@ -0,0 +1,178 @@
+"""
+Generator of synthetic Contentful Delivery API payloads.
+
+Payloads are deterministic for given parameters and seed, so benchmark
+results are comparable across runs. Works on Python 2 and 3.
+"""
+import random
+
+SPACE_ID = 'benchmark'
+WORDS = (
+    'lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit',
+    'sed', 'do', 'eiusmod', 'tempor', 'incididunt', 'ut', 'labore', 'magna',
+)
+TAGS = ('news', 'sport', 'tech', 'travel', 'food', 'culture', 'science')
+
+
+def link(link_type, item_id):
+    return {'sys': {'type': 'Link', 'linkType': link_type, 'id': item_id}}
+
+
+class PayloadGenerator(object):
+    """
+    Builds collection response of `items` entries.
+
+    :param include_depth: Levels of linked entries (0 for assets only).
+    :param fan_out: Links of every entry (on levels below `include_depth`).
+    :param locales: Number of locales, more than one produces responses of `locale=*` queries.
+    :param asset_ratio: Share of links pointing to assets.
+    :param rich_text_density: Share of entries with rich text body.
+    """
+
+    def __init__(self, items=100, include_depth=2, fan_out=3, locales=1, asset_ratio=0.3,
+                 rich_text_density=0.5, seed=0):
+        self.items = items
+        self.include_depth = include_depth
+        self.fan_out = fan_out
+        self.locales = ['en-US'] + ['locale-{}'.format(i) for i in range(1, locales)]
+        self.asset_ratio = asset_ratio
+        self.rich_text_density = rich_text_density
+        self.random = random.Random(seed)
+
+        # Linked entries and assets are shared between items like in real responses
+        self.pool_size = max(1, items // 2)
+        self.asset_count = max(1, items)
+
+    def words(self, count):
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def sys(self, item_type, item_id):
+        sys = {
+            'space': link('Space', SPACE_ID),
+            'id': item_id,
+            'type': item_type,
+            'createdAt': '2019-01-01T00:00:00.000Z',
+            'updatedAt': '2019-01-02T00:00:00.000Z',
+            'revision': self.random.randint(1, 20),
+        }
+        if len(self.locales) == 1:
+            sys['locale'] = self.locales[0]
+        return sys
+
+    def localize(self, fields):
+        if len(self.locales) == 1:
+            return fields
+
+        return {
+            key: {locale: value for locale in self.locales}
+            for key, value in fields.items()
+        }
+
+    def asset_id(self):
+        return 'asset{}'.format(self.random.randrange(self.asset_count))
+
+    def asset(self, asset_id):
+        width, height = self.random.randint(100, 4000), self.random.randint(100, 4000)
+        return {
+            'sys': self.sys('Asset', asset_id),
+            'fields': self.localize({
+                'title': self.words(3),
+                'description': self.words(12),
+                'file': {
+                    'url': '//images.ctfassets.net/{}/{}/{:032x}/image.jpg'.format(
+                        SPACE_ID, asset_id, self.random.getrandbits(128)
+                    ),
+                    'details': {
+                        'size': self.random.randint(10000, 5000000),
+                        'image': {'width': width, 'height': height},
+                    },
+                    'fileName': 'image.jpg',
+                    'contentType': 'image/jpeg',
+                },
+            }),
+        }
+
+    def rich_text(self):
+        content = []
+        for _ in range(self.random.randint(3, 8)):
+            if self.random.random() < 0.2:
+                content.append({
+                    'nodeType': 'embedded-asset-block',
+                    'data': {'target': link('Asset', self.asset_id())},
+                    'content': [],
+                })
+                continue
+
+            content.append({
+                'nodeType': 'paragraph',
+                'data': {},
+                'content': [
+                    {
+                        'nodeType': 'text',
+                        'value': self.words(self.random.randint(10, 60)),
+                        'marks': [{'type': 'bold'}] if self.random.random() < 0.2 else [],
+                        'data': {},
+                    },
+                ],
+            })
+
+        return {'nodeType': 'document', 'data': {}, 'content': content}
+
+    def entry(self, entry_id, level):
+        fields = {
+            'title': self.words(4).title(),
+            'slug': '{}-{}'.format(entry_id, self.words(2).replace(' ', '-')),
+            'rating': round(self.random.random() * 5, 2),
+            'published': self.random.random() < 0.8,
+            'tags': self.random.sample(TAGS, 2),
+            'image': link('Asset', self.asset_id()),
+        }
+
+        if self.random.random() < self.rich_text_density:
+            fields['body'] = self.rich_text()
+
+        related, assets = [], []
+        for _ in range(self.fan_out):
+            if level >= self.include_depth or self.random.random() < self.asset_ratio:
+                assets.append(link('Asset', self.asset_id()))
+            else:
+                related_id = 'level{}-entry{}'.format(level + 1, self.random.randrange(self.pool_size))
+                related.append(link('Entry', related_id))
+
+        if related:
+            fields['related'] = related
+        if assets:
+            fields['gallery'] = assets
+
+        return {
+            'sys': dict(self.sys('Entry', entry_id), contentType=link('ContentType', 'level{}'.format(level))),
+            'fields': self.localize(fields),
+        }
+
+    def generate(self):
+        items = [self.entry('entry{}'.format(i), 0) for i in range(self.items)]
+        entries = [
+            self.entry('level{}-entry{}'.format(level, i), level)
+            for level in range(1, self.include_depth + 1)
+            for i in range(self.pool_size)
+        ]
+        assets = [self.asset('asset{}'.format(i)) for i in range(self.asset_count)]
+
+        return {
+            'sys': {'type': 'Array'},
+            'total': self.items,
+            'skip': 0,
+            'limit': self.items,
+            'items': items,
+            'includes': {'Entry': entries, 'Asset': assets},
+        }
+
+
+def generate(**params):
+    """
+    Returns collection response, see `PayloadGenerator` for parameters.
+
+    :rtype: dict
+    """
+
+    return PayloadGenerator(**params).generate()
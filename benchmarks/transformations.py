@@ -0,0 +1,163 @@
+"""
+Times and memory-profiles content transformations on synthetic payloads.
+
+Runs against `contentful_proxy_py3.transformations` on Python 3 and against
+`contentful_proxy.utils.cache.transformations` on Python 2 (App Engine SDK
+has to be importable). Every stage gets output of previous stages as input.
+
+Usage (from repository root):
+    python -m benchmarks.transformations [--items 200] [--include-depth 2] [--json results.json]
+"""
+from __future__ import division, print_function
+
+import argparse
+import copy
+import gc
+import json
+import logging
+import platform
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2, memory is not profiled
+    tracemalloc = None
+
+from benchmarks import payloads
+
+
+def load_transformations():
+    """
+    :return: Transformations module, its stages and default pipeline.
+    """
+
+    if sys.version_info[0] == 2:
+        from contentful_proxy.utils.cache import transformations
+    else:
+        from contentful_proxy_py3 import transformations
+
+    stages = [
+        transformations.ReplaceAssetLinks(proxy_hostname='http://localhost'),
+        transformations.ResolveIncludes(),
+        transformations.FlattenFields(),
+        transformations.RemoveIncludes(),
+        transformations.RemoveRootSys(),
+    ]
+
+    if sys.version_info[0] == 2:
+        # Default of DetailProxyHandler
+        default = [stage for stage in stages if not isinstance(stage, transformations.FlattenFields)]
+    else:
+        # Default of ContentfulClient
+        default = stages
+
+    return transformations, stages, default
+
+
+def reset_caches(transformations):
+    render_cache = getattr(transformations.FlattenFields, 'RENDER_CACHE', None)
+    if render_cache is not None:
+        render_cache.clear()
+
+
+def run(pipeline, content):
+    for transformation in pipeline:
+        transformation(content)
+
+
+def measure(transformations, pipeline, content, repeat):
+    """
+    :return: Min and median time (ms) and peak of allocated memory (KiB, None without tracemalloc).
+    """
+
+    times = []
+    for _ in range(repeat):
+        content_copy = copy.deepcopy(content)
+        reset_caches(transformations)
+        times.append(timeit.timeit(lambda: run(pipeline, content_copy), number=1) * 1000)
+
+    peak = None
+    if tracemalloc is not None:
+        content_copy = copy.deepcopy(content)
+        reset_caches(transformations)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(pipeline, content_copy)
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    times.sort()
+    return {'min_ms': times[0], 'median_ms': times[len(times) // 2], 'peak_kib': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--include-depth', type=int, default=2)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--locales', type=int, default=1)
+    parser.add_argument('--asset-ratio', type=float, default=0.3)
+    parser.add_argument('--rich-text-density', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', help='Write results to file to compare runs.')
+    args = parser.parse_args()
+
+    params = {
+        'items': args.items,
+        'include_depth': args.include_depth,
+        'fan_out': args.fan_out,
+        'locales': args.locales,
+        'asset_ratio': args.asset_ratio,
+        'rich_text_density': args.rich_text_density,
+        'seed': args.seed,
+    }
+    content = payloads.generate(**params)
+
+    transformations, stages, default = load_transformations()
+    logging.disable(logging.WARNING)  # FlattenFields warns about every value it can not flatten
+
+    results = []
+    stage_input = content
+    for stage in stages:
+        results.append(dict(measure(transformations, [stage], stage_input, args.repeat), name=type(stage).__name__))
+        stage_input = copy.deepcopy(stage_input)
+        reset_caches(transformations)
+        run([stage], stage_input)
+
+    results.append(dict(measure(transformations, default, content, args.repeat), name='default pipeline'))
+    results.append(dict(
+        measure(transformations, transformations.compile_pipeline(default), content, args.repeat),
+        name='default pipeline (fused)',
+    ))
+
+    print('Python {} ({}), {} bytes of JSON, {}'.format(
+        platform.python_version(),
+        transformations.__name__,
+        len(json.dumps(content)),
+        ', '.join('{}={}'.format(key, value) for key, value in sorted(params.items())),
+    ))
+    print('{:<26} {:>10} {:>10} {:>10}'.format('transformation', 'min ms', 'median ms', 'peak KiB'))
+    for result in results:
+        print('{:<26} {:>10.2f} {:>10.2f} {:>10}'.format(
+            result['name'],
+            result['min_ms'],
+            result['median_ms'],
+            '-' if result['peak_kib'] is None else '{:.0f}'.format(result['peak_kib']),
+        ))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'module': transformations.__name__,
+                'params': params,
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
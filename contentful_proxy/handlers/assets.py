@@ -19,9 +19,6 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import json
-import logging
-
 from contentful_proxy.handlers.mixins import base as mixin_base
 from contentful_proxy.utils.cache import transformations
 from contentful_proxy.utils.handlers import webapp2_base
@@ -59,24 +56,12 @@ class DownloadHandler(
             curl -X GET "https://{domain}.appspot.com/contentful/download/{asset_id}"
         """
 
-        response = self.contentful.asset(asset_id)
-        if response.status_code / 400:
-            logging.debug(response.content)
+        descriptor = self.contentful.asset_descriptor(asset_id)
+        if descriptor is None:
             return self.abort(404, "Asset not found")
 
-        try:
-            asset = json.loads(response.content)
-        except (KeyError, TypeError) as ex:
-            logging.exception(ex)
-            logging.error("Key {} not found.".format(ex))
-
-            self.abort(404, "Asset not found")
-        else:
-            self.response.content_type = asset['fields']['file'].get(
-                'contentType',
-                u'application/octet-stream'
-            ).encode('utf-8')
+        if self.not_modified(descriptor['etag']):
+            return
 
-            self.redirect(
-                asset['fields']['file']['url'].encode('utf-8')
-            )
+        self.response.content_type = descriptor['contentType'].encode('utf-8')
+        self.redirect(descriptor['url'].encode('utf-8'))
@@ -0,0 +1,123 @@
+# The MIT License (MIT)
+# 
+# Copyright (c) 2018 stanwood GmbH
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import logging
+import urllib
+import urlparse
+
+import webapp2
+from google.appengine.api import urlfetch
+from google.appengine.ext import ndb
+
+from contentful_proxy.handlers.mixins import base as mixin_base
+from contentful_proxy.models import mirror
+from contentful_proxy.utils import json_codec
+from contentful_proxy.utils.handlers import webapp2_base
+
+
+class SyncMirrorHandler(mixin_base.ClientMixin, webapp2_base.CustomBaseHandler):
+    CONTENTFUL_CDN_URL = 'https://cdn.contentful.com'
+
+    @webapp2.cached_property
+    def namespace(self):
+        return u'{}:{}'.format(self.contentful_space, self.contentful_environment)
+
+    @webapp2.cached_property
+    def environment_url(self):
+        return '{}/spaces/{}/environments/{}'.format(
+            self.CONTENTFUL_CDN_URL,
+            self.contentful_space,
+            self.contentful_environment
+        )
+
+    def fetch(self, url):
+        response = urlfetch.fetch(
+            url,
+            headers={'Authorization': 'Bearer {}'.format(self.contentful_token)},
+            deadline=60
+        )
+        if response.status_code != 200:
+            logging.error(response.content)
+            self.abort(502, "Contentful sync failed")
+
+        return json_codec.loads(response.content)
+
+    def default_locale(self):
+        locales = self.fetch('{}/locales'.format(self.environment_url))
+        return next(locale['code'] for locale in locales['items'] if locale['default'])
+
+    def apply(self, items):
+        """
+        Stores synced entries and assets, removes deleted ones.
+        """
+
+        updated, deleted = [], []
+
+        for item in items:
+            item_type = item['sys']['type']
+            if item_type in ('Entry', 'Asset'):
+                updated.append(mirror.ContentfulMirrorItem(
+                    key=mirror.ContentfulMirrorItem.build_key(self.namespace, item_type, item['sys']['id']),
+                    data=item,
+                ))
+            elif item_type in ('DeletedEntry', 'DeletedAsset'):
+                deleted.append(mirror.ContentfulMirrorItem.build_key(
+                    self.namespace, item_type.replace('Deleted', '', 1), item['sys']['id']
+                ))
+
+        ndb.put_multi(updated)
+        ndb.delete_multi(deleted)
+
+        return len(updated), len(deleted)
+
+    def get(self):
+        """
+        Updates Datastore mirror of entries and assets using Contentful Sync API.
+
+        First run makes initial synchronization, following runs fetch changes since
+        the previous run (sync token is stored after every page).
+
+        API Reference: https://www.contentful.com/developers/docs/references/content-delivery-api/#/reference/synchronization
+
+        Usage:
+            curl -X GET "https://{domain}.appspot.com/_ah/cron/contentful-sync" (logged in as google admin)
+        """
+
+        state = mirror.ContentfulSyncState.get_or_insert(self.namespace)
+        state.default_locale = self.default_locale()
+
+        if state.next_sync_token:
+            url = '{}/sync?{}'.format(self.environment_url, urllib.urlencode({'sync_token': state.next_sync_token}))
+        else:
+            url = '{}/sync?initial=true'.format(self.environment_url)
+
+        while url:
+            page = self.fetch(url)
+
+            updated, deleted = self.apply(page['items'])
+            logging.info("Synced {} updated and {} deleted items".format(updated, deleted))
+
+            url = page.get('nextPageUrl')
+            next_url = url or page['nextSyncUrl']
+
+            state.next_sync_token = urlparse.parse_qs(urlparse.urlparse(next_url).query)['sync_token'][0]
+            state.completed = state.completed or url is None
+            state.put()
@@ -20,9 +20,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import abc
+import hashlib
 import logging
+import os
+
+import webapp2
 
 from contentful_proxy.handlers.mixins import base as base_mixin
+from contentful_proxy.utils import cache
+from contentful_proxy.utils import json_codec
+from contentful_proxy.utils import mirror
 from contentful_proxy.utils.handlers import webapp2_base
 
 from contentful_proxy.utils.cache import transformations
@@ -45,11 +52,44 @@ class DetailProxyHandler(
             transformations.ReplaceAssetLinks(
                 proxy_hostname=self.request.host_url
             ),
-            transformations.ResolveIncludes(),
+            transformations.ResolveIncludes(projection=self.request.GET.get('fields')),
             transformations.RemoveIncludes(),
             transformations.RemoveRootSys(),
         ]
 
+    def project(self, item_type, query):
+        """
+        Translates `fields` projection (e.g. `fields=title,author.name`) into Contentful `select`.
+
+        Contentful selects fields of entries of single content type only, other queries are
+        pruned by `ResolveIncludes` alone. Explicit `select` of the client is kept.
+        """
+
+        projection = transformations.parse_projection(query.pop('fields', None))
+        if projection is None or item_type != 'entries' or 'content_type' not in query or 'select' in query:
+            return query
+
+        query['select'] = transformations.projection_select(projection)
+        self.contentful._normalize_select(query)
+        return query
+
+    def entries_by_ids(self, query):
+        """
+        Returns collection of entries listed in `ids` (comma separated) in their order.
+
+        Entries are cached one by one (see `cache.Client.get_many`), missing entries are left out.
+        """
+
+        entry_ids = [entry_id.strip() for entry_id in query.pop('ids').split(',') if entry_id.strip()]
+
+        items = []
+        for response in self.contentful.get_many(entry_ids, query):
+            if response is not None:
+                items.extend(response.json().get('items', []))
+
+        content = json_codec.dumps({'total': len(items), 'items': items})
+        return cache.CachedResponse(content=content, status_code=200, etag=hashlib.md5(content).hexdigest())
+
     @property
     def types(self):
         """
@@ -66,6 +106,40 @@ class DetailProxyHandler(
             None: [self.contentful.root_endpoint, self.contentful.root_endpoint]
         }
 
+    @property
+    def sync_mirror_enabled(self):
+        return os.environ.get('CONTENTFUL_SYNC_MIRROR', '').lower() in ('1', 'true')
+
+    @webapp2.cached_property
+    def mirror(self):
+        return mirror.Mirror(self.contentful_space, self.contentful_environment)
+
+    def mirrored(self, item_type, item_id):
+        """
+        Returns transformed entry or asset from Sync API mirror.
+
+        Mirrored items are transformed on every request, so their ETag is computed from the result.
+
+        :return: Response like of `cache.Client` or None if item is not mirrored.
+        :rtype: cache.CachedResponse
+        """
+
+        if item_type == 'entries':
+            content = self.mirror.entry(item_id)
+        elif item_type == 'assets':
+            content = self.mirror.asset(item_id)
+        else:
+            return None
+
+        if content is None:
+            return None
+
+        for transformation in self.transformations:
+            transformation(content)
+
+        content = json_codec.dumps(content)
+        return cache.CachedResponse(content=content, status_code=200, etag=hashlib.md5(content).hexdigest())
+
     def get(self, item_type=None, item_id=None):
         """
         Get the content model of a space or get a single content type.
@@ -80,18 +154,45 @@ class DetailProxyHandler(
             curl -X GET "https://{domain}.appspot.com/contentful/"
             curl -X GET "https://{domain}.appspot.com/contentful/{item_type}"
             curl -X GET "https://{domain}.appspot.com/contentful/{item_type}/{item_id}"
+            curl -X GET "https://{domain}.appspot.com/contentful/entries?content_type={id}&fields=title,author.name"
+            curl -X GET "https://{domain}.appspot.com/contentful/entries?ids={id},{id}"
         """
-        try:
-            if item_id:
-                response = self.types[item_type][0](item_id)
-            else:
-                query = dict(self.request.params.items())
-                logging.debug(query)
-                response = self.types[item_type][1](query)
-
-        except KeyError as key_error:
-            logging.error("Unexpected item type `{}`".format(key_error))
-            return self.abort(code=404)
-
-        self.response.write(response.content)
+        response = None
+        if item_id and self.sync_mirror_enabled:
+            response = self.mirrored(item_type, item_id)
+
+        if response is None:
+            try:
+                if item_id:
+                    response = self.types[item_type][0](item_id)
+                else:
+                    query = self.project(item_type, dict(self.request.params.items()))
+                    logging.debug(query)
+                    if item_type == 'entries' and query.get('ids'):
+                        response = self.entries_by_ids(query)
+                    else:
+                        response = self.types[item_type][1](query)
+
+            except KeyError as key_error:
+                logging.error("Unexpected item type `{}`".format(key_error))
+                return self.abort(code=404)
+
+        encoding = self.content_encoding(response.variants)
+        etag = response.etag
+        if encoding is not None and etag is not None:
+            etag = u'{}-{}'.format(etag, encoding)
+
+        self.response.headers['Vary'] = 'Accept-Encoding'
+        if self.not_modified(etag):
+            return
+
+        # Cached variant is read only now, responses sent as they are and 304 do not need it
+        variant = response.variants.get(encoding) if encoding is not None else None
+        if variant is not None:
+            self.response.headers['Content-Encoding'] = encoding
+            self.response.write(variant)
+        else:
+            if encoding is not None and response.etag is not None:
+                self.response.etag = response.etag  # variant was evicted, content is sent as it is
+            self.response.write(response.content)
         self.response.content_type = 'application/json'
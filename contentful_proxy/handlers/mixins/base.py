@@ -19,6 +19,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import functools
 import os
 
 import webapp2
@@ -47,6 +48,21 @@ class ClientMixin(object):
     def contentful_environment(self):
         return os.environ.get('CONTENTFUL_ENVIRONMENT', 'master')
 
+    @property
+    def contentful_content_types(self):
+        """
+        Loader of content type definitions, pass it as `content_types` of `transformations.FlattenFields`.
+
+        Unlike a bound method of the handler, the loader can be pickled with the transformations.
+        """
+
+        return functools.partial(
+            cache.content_type_definitions,
+            self.contentful_space,
+            self.contentful_token,
+            self.contentful_environment,
+        )
+
     @webapp2.cached_property
     def contentful(self):
         return cache.Client(
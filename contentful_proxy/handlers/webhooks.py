@@ -0,0 +1,82 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import hmac
+import logging
+import os
+
+from contentful_proxy.handlers.mixins import base as mixin_base
+from contentful_proxy.utils import json_codec
+from contentful_proxy.utils.handlers import webapp2_base
+
+
+class WebhookHandler(
+    mixin_base.ClientMixin,
+    webapp2_base.CustomBaseHandler
+):
+    SECRET_HEADER = 'X-Webhook-Secret'
+
+    @property
+    def transformations(self):
+        """
+        Webhook does not transform any content.
+        """
+
+        return []
+
+    @property
+    def webhook_secret(self):
+        return os.environ.get('CONTENTFUL_WEBHOOK_SECRET')
+
+    def post(self):
+        """
+        Deletes cached responses affected by Contentful publish, unpublish or delete event.
+
+        Webhook has to be configured in Contentful for Entry, Asset and ContentType events
+        and has to send `CONTENTFUL_WEBHOOK_SECRET` in `X-Webhook-Secret` header. Requests
+        are refused while the secret is not set, so nobody else can purge the cache.
+
+        API Reference: https://www.contentful.com/developers/docs/concepts/webhooks/
+
+        Usage:
+            curl -X POST "https://{domain}.appspot.com/contentful/_webhook" -d '{"sys": {...}}'
+        """
+
+        if not self.webhook_secret:
+            logging.error("CONTENTFUL_WEBHOOK_SECRET is not set, webhook is disabled")
+            return self.abort(503, "Webhook is not configured")
+
+        if not hmac.compare_digest(self.request.headers.get(self.SECRET_HEADER, ''), self.webhook_secret):
+            return self.abort(403)
+
+        try:
+            payload = json_codec.loads(self.request.body)
+            memcache_keys = self.contentful.invalidate(payload)
+        except (ValueError, TypeError, KeyError) as ex:
+            logging.exception(ex)
+            return self.abort(400, "Invalid webhook payload")
+
+        logging.info(u"{} invalidated {} cached responses".format(
+            self.request.headers.get('X-Contentful-Topic'),
+            len(memcache_keys)
+        ))
+
+        self.json_response({'invalidated': len(memcache_keys)})
@@ -0,0 +1,48 @@
+# The MIT License (MIT)
+# 
+# Copyright (c) 2018 stanwood GmbH
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from google.appengine.ext import ndb
+
+
+class ContentfulSyncState(ndb.Model):
+    """
+    State of Sync API mirror, keyed by `{space}:{environment}`.
+    """
+
+    created = ndb.DateTimeProperty(auto_now_add=True)
+    updated = ndb.DateTimeProperty(auto_now=True)
+    next_sync_token = ndb.StringProperty(indexed=False)
+    default_locale = ndb.StringProperty(indexed=False)
+    completed = ndb.BooleanProperty(indexed=False, default=False)  # initial sync finished
+
+
+class ContentfulMirrorItem(ndb.Model):
+    """
+    Entry or asset as returned by Sync API (with all locales), keyed by
+    `{space}:{environment}:{Entry|Asset}:{id}`.
+    """
+
+    updated = ndb.DateTimeProperty(auto_now=True)
+    data = ndb.JsonProperty(compressed=True)
+
+    @classmethod
+    def build_key(cls, namespace, item_type, item_id):
+        return ndb.Key(cls, u'{}:{}:{}'.format(namespace, item_type, item_id))
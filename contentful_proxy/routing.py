@@ -26,7 +26,9 @@ from contentful_proxy.handlers import assets
 from contentful_proxy.handlers import files
 from contentful_proxy.handlers import items
 from contentful_proxy.handlers import managements
+from contentful_proxy.handlers import webhooks
 from contentful_proxy.handlers.cron import files_job
+from contentful_proxy.handlers.cron import sync_job
 
 
 contentful_routes = [
@@ -35,6 +37,7 @@ contentful_routes = [
         [
             webapp2.Route(r'/download/<asset_id:.*>', assets.DownloadHandler),
             webapp2.Route(r'/file_cache/<source_host:[a-z.]+>/<file_path:.+>', files.CacheHandler),
+            webapp2.Route(r'/_webhook', webhooks.WebhookHandler),
             webapp2.Route(r'/<item_type:\w+>/<item_id:\w+>', items.DetailProxyHandler),
             webapp2.Route(r'/<item_type:\w+>', items.DetailProxyHandler),
             webapp2.Route(r'/', items.DetailProxyHandler),
@@ -55,4 +58,5 @@ contentful_management_routes = [
 
 cron_routes = [
     webapp2.Route(r'/_ah/cron/clean-up-files', files_job.CleanupCachedFilesHandler),
+    webapp2.Route(r'/_ah/cron/contentful-sync', sync_job.SyncMirrorHandler),
 ]
@@ -12,7 +12,7 @@ def contentful():
 
 
 def test_get_item_by_id(app, contentful):
-    contentful.return_value.content_type.return_value = mock.MagicMock(content='{}')
+    contentful.return_value.content_type.return_value = mock.MagicMock(content='{}', etag='etag')
     item_type, item_id = 'content_types', '124'
     response = app.get('/contentful/{}/{}'.format(item_type, item_id))
 
@@ -22,7 +22,7 @@ def test_get_item_by_id(app, contentful):
 
 
 def test_get_item(app, contentful):
-    contentful.return_value.content_types.return_value = mock.MagicMock(content='{}')
+    contentful.return_value.content_types.return_value = mock.MagicMock(content='{}', etag='etag')
     item_type = 'content_types'
     response = app.get('/contentful/{}'.format(item_type))
 
@@ -32,7 +32,7 @@ def test_get_item(app, contentful):
 
 
 def test_get_item_root_path(app, contentful):
-    contentful.return_value.root_endpoint.return_value = mock.MagicMock(content='{}')
+    contentful.return_value.root_endpoint.return_value = mock.MagicMock(content='{}', etag='etag')
     response = app.get('/contentful/')
 
     assert response.status_code == 200
@@ -40,5 +40,140 @@ def test_get_item_root_path(app, contentful):
     contentful.return_value.root_endpoint.assert_called_once_with({})
 
 
+def test_get_entries_projection(app, contentful):
+    contentful.return_value.entries.return_value = mock.MagicMock(content='{}', etag='etag', variants={})
+    response = app.get('/contentful/entries?content_type=page&fields=title,author.name')
+
+    assert response.status_code == 200
+
+    contentful.return_value.entries.assert_called_once_with(
+        {'content_type': 'page', 'select': 'fields.author,fields.title'}
+    )
+    contentful.return_value._normalize_select.assert_called_once_with(
+        {'content_type': 'page', 'select': 'fields.author,fields.title'}
+    )
+
+
+def test_get_entries_projection_without_content_type(app, contentful):
+    contentful.return_value.entries.return_value = mock.MagicMock(content='{}', etag='etag', variants={})
+    app.get('/contentful/entries?fields=title')
+
+    contentful.return_value.entries.assert_called_once_with({})
+
+
+def test_get_entries_by_ids(app, contentful):
+    contentful.return_value.get_many.return_value = [
+        mock.MagicMock(**{'json.return_value': {'items': [{'title': 'Second'}]}}),
+        None,
+        mock.MagicMock(**{'json.return_value': {'items': [{'title': 'First'}]}}),
+    ]
+
+    response = app.get('/contentful/entries?ids=entry2,missing,entry1&locale=de')
+
+    assert response.json == {'total': 2, 'items': [{'title': 'Second'}, {'title': 'First'}]}
+    assert response.etag
+    contentful.return_value.get_many.assert_called_once_with(['entry2', 'missing', 'entry1'], {'locale': 'de'})
+    contentful.return_value.entries.assert_not_called()
+
+
 def test_get_item_unexpected_type(app, contentful):
     app.get('/contentful/unexpected-type', status=404)
+
+
+def test_get_item_not_modified(app, contentful):
+    contentful.return_value.content_types.return_value = mock.MagicMock(content='{}', etag='etag')
+    response = app.get('/contentful/content_types', headers={'If-None-Match': '"etag"'}, status=304)
+
+    assert response.body == ''
+    assert response.etag == 'etag'
+    assert response.cache_control.public
+
+
+def test_get_item_precompressed(app, contentful):
+    contentful.return_value.content_types.return_value = mock.MagicMock(
+        content='{}',
+        etag='etag',
+        variants={'gzip': 'gzipped'},
+    )
+
+    response = app.get('/contentful/content_types', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.etag == 'etag-gzip'
+    assert response.body == 'gzipped'
+
+    response = app.get('/contentful/content_types', headers={'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.body == '{}'
+
+
+def test_get_item_precompressed_without_accept_encoding(app, contentful):
+    contentful.return_value.content_types.return_value = mock.MagicMock(
+        content='{}',
+        etag='etag',
+        variants={'br': 'brotli', 'gzip': 'gzipped'},
+    )
+
+    response = app.get('/contentful/content_types')
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.etag == 'etag'
+    assert response.body == '{}'
+
+
+def test_get_item_server_timing(app, contentful):
+    contentful.return_value.content_types.return_value = mock.MagicMock(content='{}', etag='etag', variants={})
+
+    response = app.get('/contentful/content_types', headers={'X-Server-Timing': '1'})
+
+    assert response.headers['Server-Timing'].startswith('handler;dur=')
+
+    response = app.get('/contentful/content_types')
+
+    assert 'Server-Timing' not in response.headers
+
+
+def test_get_mirrored_item_not_modified(app, contentful):
+    entry = {'sys': {'type': 'Array'}, 'items': [{'sys': {'type': 'Entry', 'id': 'entry-1'}, 'fields': {}}]}
+
+    with mock.patch.dict('os.environ', {'CONTENTFUL_SYNC_MIRROR': 'true'}), \
+            mock.patch('contentful_proxy.utils.mirror.Mirror.entry', side_effect=lambda *args: dict(entry)):
+        response = app.get('/contentful/entries/entry-1', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.json == {'items': [{'sys': {'type': 'Entry', 'id': 'entry-1'}, 'fields': {}}]}
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.etag
+
+        app.get('/contentful/entries/entry-1', headers={'If-None-Match': '"{}"'.format(response.etag)}, status=304)
+
+    contentful.return_value.entry.assert_not_called()
+
+
+def test_get_item_with_evicted_variant(app, contentful):
+    from contentful_proxy.utils import cache
+
+    contentful.return_value.content_types.return_value = cache.CachedResponse(
+        content='{}',
+        status_code=204,
+        etag='etag',
+        variants=cache.StoredVariants(['gzip'], load=lambda encoding: None),
+    )
+
+    response = app.get('/contentful/content_types', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.etag == 'etag'
+    assert response.body == '{}'
+
+
+def test_get_item_with_malformed_timing_sample_rate(app, contentful):
+    contentful.return_value.content_types.return_value = mock.MagicMock(content='{}', etag='etag', variants={})
+
+    with mock.patch.dict('os.environ', {'CONTENTFUL_TIMING_SAMPLE_RATE': '1%'}):
+        response = app.get('/contentful/content_types')
+
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
@@ -0,0 +1,75 @@
+import json
+import os
+
+import mock
+import pytest
+
+
+@pytest.fixture
+def sync_urlfetch():
+    entry = {
+        'sys': {'type': 'Entry', 'id': 'entry1'},
+        'fields': {
+            'title': {'en-US': 'Hello'},
+            'image': {'en-US': {'sys': {'type': 'Link', 'linkType': 'Asset', 'id': 'asset1'}}},
+        },
+    }
+    asset = {
+        'sys': {'type': 'Asset', 'id': 'asset1'},
+        'fields': {
+            'title': {'en-US': 'Image'},
+            'file': {'en-US': {'url': '//images.ctfassets.net/space/image.png'}},
+        },
+    }
+    responses = {
+        '/locales': {'items': [{'code': 'en-US', 'default': True}]},
+        '/sync?initial=true': {
+            'items': [entry, asset],
+            'nextPageUrl': 'https://cdn.contentful.com/spaces/123/environments/master/sync?sync_token=page-2',
+        },
+        '/sync?sync_token=page-2': {
+            'items': [],
+            'nextSyncUrl': 'https://cdn.contentful.com/spaces/123/environments/master/sync?sync_token=next',
+        },
+    }
+
+    def fetch(url, **kwargs):
+        path = next(path for path in responses if url.endswith(path))
+        return mock.MagicMock(status_code=200, content=json.dumps(responses[path]))
+
+    with mock.patch('contentful_proxy.handlers.cron.sync_job.urlfetch') as mock_urlfetch:
+        mock_urlfetch.fetch.side_effect = fetch
+        yield mock_urlfetch
+
+
+@pytest.fixture
+def contentful():
+    with mock.patch(
+            'contentful_proxy.handlers.items.DetailProxyHandler.contentful',
+            new_callable=mock.PropertyMock
+    ) as mock_contentful:
+        yield mock_contentful
+
+
+def test_sync_stores_token(app, sync_urlfetch):
+    from contentful_proxy.models import mirror
+
+    app.get('/_ah/cron/contentful-sync')
+
+    state = mirror.ContentfulSyncState.get_by_id('123:master')
+    assert state.next_sync_token == 'next'
+    assert state.default_locale == 'en-US'
+    assert state.completed
+    assert mirror.ContentfulMirrorItem.query().count() == 2
+
+
+def test_entry_is_served_from_mirror(app, sync_urlfetch, contentful):
+    app.get('/_ah/cron/contentful-sync')
+
+    with mock.patch.dict(os.environ, {'CONTENTFUL_SYNC_MIRROR': 'true'}):
+        response = app.get('/contentful/entries/entry1')
+
+    item = response.json['items'][0]
+    assert item['fields']['title'] == 'Hello'
+    assert item['fields']['image']['file']['url'].endswith('/contentful/file_cache/images.ctfassets.net/space/image.png')
+    assert not contentful.return_value.entry.called
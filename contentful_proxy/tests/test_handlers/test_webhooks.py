@@ -0,0 +1,50 @@
+import json
+import os
+
+import mock
+import pytest
+
+
+@pytest.fixture
+def webhook_secret():
+    with mock.patch.dict(os.environ, {'CONTENTFUL_WEBHOOK_SECRET': 'secret'}):
+        yield 'secret'
+
+
+def test_webhook_invalidates_cache(app, contentful_client, webhook_secret):
+    payload = {'sys': {'type': 'Entry', 'id': 'entry-1'}}
+    contentful_client.invalidate.return_value = {'key-1', 'key-2'}
+
+    response = app.post(
+        '/contentful/_webhook',
+        json.dumps(payload),
+        headers={'X-Contentful-Topic': 'ContentManagement.Entry.publish', 'X-Webhook-Secret': webhook_secret},
+    )
+
+    assert response.status_code == 200
+    assert response.json == {'invalidated': 2}
+
+    contentful_client.invalidate.assert_called_once_with(payload)
+
+
+def test_webhook_invalid_payload(app, contentful_client, webhook_secret):
+    app.post('/contentful/_webhook', 'not json', headers={'X-Webhook-Secret': webhook_secret}, status=400)
+
+
+def test_webhook_secret(app, contentful_client, webhook_secret):
+    contentful_client.invalidate.return_value = set()
+    payload = json.dumps({'sys': {'type': 'Entry', 'id': 'entry-1'}})
+
+    app.post('/contentful/_webhook', payload, status=403)
+    app.post('/contentful/_webhook', payload, headers={'X-Webhook-Secret': 'wrong'}, status=403)
+    app.post('/contentful/_webhook', payload, headers={'X-Webhook-Secret': webhook_secret}, status=200)
+
+
+def test_webhook_without_secret_is_refused(app, contentful_client):
+    payload = json.dumps({'sys': {'type': 'Entry', 'id': 'entry-1'}})
+
+    with mock.patch.dict(os.environ):
+        os.environ.pop('CONTENTFUL_WEBHOOK_SECRET', None)
+        app.post('/contentful/_webhook', payload, headers={'X-Webhook-Secret': ''}, status=503)
+
+    contentful_client.invalidate.assert_not_called()
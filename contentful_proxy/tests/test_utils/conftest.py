@@ -0,0 +1,50 @@
+import json
+
+import mock
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def local_cache():
+    from contentful_proxy.utils import cache
+
+    cache.Client.LOCAL_CACHE.clear()
+    yield cache.Client.LOCAL_CACHE
+    cache.Client.LOCAL_CACHE.clear()
+
+
+@pytest.fixture
+def contentful_response():
+    return {
+        'sys': {'type': 'Array'},
+        'total': 1,
+        'skip': 0,
+        'limit': 100,
+        'items': [
+            {
+                'sys': {'type': 'Entry', 'id': 'entry-1'},
+                'fields': {'title': 'Title'},
+            },
+        ],
+    }
+
+
+@pytest.fixture
+def contentful_http_get(contentful_response):
+    with mock.patch('contentful.Client._http_get') as mock_http_get:
+        mock_http_get.return_value = mock.MagicMock(
+            content=json.dumps(contentful_response),
+            status_code=200,
+        )
+        yield mock_http_get
+
+
+@pytest.fixture
+def client(testbed):
+    from contentful_proxy.utils import cache
+    return cache.Client(
+        'space',
+        'token',
+        content_type_cache=False,
+        transformations=[],
+    )
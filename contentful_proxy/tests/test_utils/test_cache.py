@@ -0,0 +1,350 @@
+import json
+
+import mock
+import pytest
+
+
+def test_response_is_cached(client, contentful_http_get):
+    first = client.entries({'content_type': 'page'})
+    second = client.entries({'content_type': 'page'})
+
+    assert first.content == second.content
+    assert second.status_code == 204
+    assert contentful_http_get.call_count == 1
+
+
+def test_stale_response_is_served_and_revalidated(testbed, client, contentful_http_get):
+    from google.appengine.ext import deferred
+
+    from contentful_proxy.utils import cache
+
+    with mock.patch.object(cache.Client, 'CACHE_TTL', 0):
+        first = client.entries({'content_type': 'page'})
+        stale = client.entries({'content_type': 'page'})
+        client.entries({'content_type': 'page'})
+
+    assert stale.content == first.content
+    assert stale.status_code == 204
+    assert contentful_http_get.call_count == 1
+
+    taskqueue = testbed.get_stub(testbed.TASKQUEUE_SERVICE_NAME)
+    task, = taskqueue.get_filtered_tasks()
+
+    deferred.run(task.payload)
+
+    assert contentful_http_get.call_count == 2
+    assert client.SINGLE_FLIGHT.acquire(client.memcache_key('/environments/master/entries', {'content_type': 'page'}))
+
+
+def test_miss_waits_for_lease_holder(client, contentful_http_get):
+    memcache_key = client.memcache_key('/environments/master/entries', {'content_type': 'page'})
+    assert client.SINGLE_FLIGHT.acquire(memcache_key) is not None
+
+    def other_instance_fetched(_):
+        client.storage.set(memcache_key, {'content': '{"items": []}', 'expires': None})
+
+    with mock.patch('contentful_proxy.utils.cache.singleflight.time.sleep', side_effect=other_instance_fetched):
+        response = client.entries({'content_type': 'page'})
+
+    assert response.content == '{"items": []}'
+    assert contentful_http_get.call_count == 0
+
+
+def test_miss_fetches_when_lease_holder_failed(client, contentful_http_get):
+    memcache_key = client.memcache_key('/environments/master/entries', {'content_type': 'page'})
+    token = client.SINGLE_FLIGHT.acquire(memcache_key)
+
+    with mock.patch(
+        'contentful_proxy.utils.cache.singleflight.time.sleep',
+        side_effect=lambda _: client.SINGLE_FLIGHT.release(memcache_key, token)
+    ):
+        client.entries({'content_type': 'page'})
+
+    assert contentful_http_get.call_count == 1
+
+
+def default_transformations(proxy_hostname='http://localhost'):
+    from contentful_proxy.utils.cache import transformations
+
+    return [
+        transformations.ReplaceAssetLinks(proxy_hostname=proxy_hostname),
+        transformations.ResolveIncludes(),
+        transformations.RemoveIncludes(),
+        transformations.RemoveRootSys(),
+    ]
+
+
+def test_identical_requests_share_cache_entry(testbed, contentful_http_get):
+    from contentful_proxy.utils import cache
+
+    for query in (
+        {'content_type': 'page', 'select': 'fields.title,fields.slug', 'order': '-sys.createdAt'},
+        {'order': ' -sys.createdAt', 'select': 'fields.slug, fields.title', 'content_type': 'page'},
+    ):
+        client = cache.Client('space', 'token', content_type_cache=False, transformations=default_transformations())
+        client.entries(query)
+
+    assert contentful_http_get.call_count == 1
+
+
+def test_transformation_parameters_change_cache_key(testbed, contentful_http_get):
+    from contentful_proxy.utils import cache
+
+    for proxy_hostname in ('http://localhost', 'http://example.com'):
+        client = cache.Client(
+            'space', 'token', content_type_cache=False,
+            transformations=default_transformations(proxy_hostname),
+        )
+        client.entries({'content_type': 'page'})
+
+    assert contentful_http_get.call_count == 2
+
+
+def test_local_cache_is_checked_before_memcache(client, contentful_http_get, local_cache):
+    client.entries({'content_type': 'page'})
+
+    with mock.patch('contentful_proxy.utils.cache.storage.memcache.get') as memcache_get:
+        client.entries({'content_type': 'page'})
+
+    assert memcache_get.call_count == 0
+    assert local_cache.stats()['hits'] == 1
+
+
+def test_asset_descriptor_is_cached(client, contentful_http_get):
+    contentful_http_get.return_value = mock.MagicMock(
+        content='{"fields": {"file": {"url": "//images.ctfassets.net/image.png", "contentType": "image/png"}}}',
+        status_code=200,
+    )
+
+    descriptor = client.asset_descriptor('asset1')
+
+    assert descriptor['url'] == '//images.ctfassets.net/image.png'
+    assert descriptor['contentType'] == 'image/png'
+    assert client.asset_descriptor('asset1') == descriptor
+    assert contentful_http_get.call_count == 1
+
+
+def test_asset_descriptor_without_file(client, contentful_http_get):
+    contentful_http_get.return_value = mock.MagicMock(content='{"fields": {}}', status_code=200)
+
+    assert client.asset_descriptor('asset1') is None
+
+
+def test_asset_descriptor_not_found(client, contentful_http_get):
+    contentful_http_get.return_value = mock.MagicMock(content='{}', status_code=404)
+
+    assert client.asset_descriptor('asset1') is None
+
+
+def test_content_type_definitions_are_cached(client, contentful_http_get):
+    contentful_http_get.return_value = mock.MagicMock(
+        content='{"items": [{"sys": {"id": "page"}, "fields": [{"id": "title", "type": "Symbol"}]}]}',
+        status_code=200,
+    )
+
+    definitions = client.content_type_definitions()
+
+    assert definitions == [{'sys': {'id': 'page'}, 'fields': [{'id': 'title', 'type': 'Symbol'}]}]
+    assert client.content_type_definitions() == definitions
+    assert contentful_http_get.call_count == 1
+    assert contentful_http_get.call_args[0][0] == '/environments/master/content_types'
+
+
+def test_large_response_is_streamed(testbed, contentful_http_get, contentful_response):
+    import json
+
+    from contentful_proxy.utils import cache
+
+    contentful_response['includes'] = {'Entry': []}
+    contentful_http_get.return_value.content = json.dumps(contentful_response)
+    client = cache.Client('space', 'token', content_type_cache=False, transformations=default_transformations())
+
+    with mock.patch.object(cache.Client, 'STREAMING_MIN_SIZE', 0), \
+            mock.patch.object(cache.streaming, 'transform', wraps=cache.streaming.transform) as transform:
+        response = client.entries({'content_type': 'page'})
+
+    assert transform.call_count == 1
+    assert response.json() == {
+        'total': 1,
+        'skip': 0,
+        'limit': 100,
+        'items': [{'sys': {'type': 'Entry', 'id': 'entry-1'}, 'fields': {'title': 'Title'}}],
+    }
+
+
+def test_fetch_stages_are_timed(client, contentful_http_get):
+    from contentful_proxy.utils import timing
+
+    recorder = timing.start()
+    try:
+        client.entries({'content_type': 'page'})
+    finally:
+        timing.finish()
+
+    assert list(recorder.stages) == [
+        'local-cache', 'memcache', 'fetch', 'decode', 'tags', 'encode', 'etag', 'store', 'miss',
+    ]
+
+
+def test_get_many(testbed, contentful_http_get, contentful_response, local_cache):
+    import json
+
+    from contentful_proxy.utils import cache
+
+    author = {'sys': {'type': 'Entry', 'id': 'author'}, 'fields': {'name': 'Author'}}
+    contentful_response['items'].append({
+        'sys': {'type': 'Entry', 'id': 'entry-2'},
+        'fields': {'title': 'Second', 'author': {'sys': {'type': 'Link', 'linkType': 'Entry', 'id': 'author'}}},
+    })
+    contentful_response['includes'] = {'Entry': [author]}
+    contentful_http_get.return_value.content = json.dumps(contentful_response)
+    client = cache.Client('space', 'token', content_type_cache=False, transformations=default_transformations())
+
+    responses = client.get_many(['entry-2', 'missing', 'entry-1'])
+
+    contentful_http_get.assert_called_once_with('/entries', {'sys.id[in]': u'entry-2,missing,entry-1'})
+    assert responses[1] is None
+    assert responses[0].json() == {
+        'total': 1,
+        'skip': 0,
+        'limit': 100,
+        'items': [{'sys': {'type': 'Entry', 'id': 'entry-2'}, 'fields': {'title': 'Second', 'author': {
+            'id': 'author', 'name': 'Author',
+        }}}],
+    }
+    assert responses[2].json()['items'] == contentful_response['items'][:1]
+
+    # Entries are cached under keys of single entry requests
+    assert client.entry('entry-1').content == responses[2].content
+
+    local_cache.clear()
+    assert [response.content for response in client.get_many(['entry-1', 'entry-2'])] == [
+        responses[2].content, responses[0].content,
+    ]
+    assert contentful_http_get.call_count == 1
+
+
+def test_get_many_is_chunked(client, contentful_http_get):
+    from contentful_proxy.utils import cache
+
+    with mock.patch.object(cache.Client, 'GET_MANY_CHUNK_SIZE', 2):
+        client.get_many(['entry-1', 'entry-2', 'entry-3'], {'locale': 'de'})
+
+    assert contentful_http_get.call_args_list == [
+        mock.call('/entries', {'locale': 'de', 'sys.id[in]': u'entry-1,entry-2'}),
+        mock.call('/entries', {'locale': 'de', 'sys.id[in]': u'entry-3'}),
+    ]
+
+
+def test_get_many_retries_rate_limited_request(client, contentful_http_get):
+    import contentful
+
+    rate_limited = mock.MagicMock(
+        status_code=429, headers={'x-contentful-ratelimit-reset': '0'}, **{'json.return_value': {}}
+    )
+    contentful_http_get.side_effect = [
+        contentful.errors.RateLimitExceededError(rate_limited),
+        contentful_http_get.return_value,
+    ]
+
+    responses = client.get_many(['entry-1'])
+
+    assert contentful_http_get.call_count == 2
+    assert responses[0].json()['items'][0]['sys']['id'] == 'entry-1'
+
+
+def test_iter_entries(client, contentful_http_get, contentful_response):
+    entry = {'sys': {'type': 'Entry', 'id': 'entry-2'}, 'fields': {'title': 'Second'}}
+    contentful_http_get.side_effect = [
+        mock.MagicMock(content=json.dumps(dict(contentful_response, total=2)), status_code=200),
+        mock.MagicMock(content=json.dumps(dict(contentful_response, total=2, skip=1, items=[entry])), status_code=200),
+    ]
+
+    pages = client.iter_entries({'content_type': 'page', 'skip': 10, 'order': '-sys.updatedAt'}, page_size=1)
+
+    assert pages.total == 2
+    assert list(pages) == contentful_response['items'] + [entry]
+    assert contentful_http_get.call_args_list == [
+        mock.call(
+            '/environments/master/entries',
+            {'content_type': 'page', 'order': 'sys.createdAt,sys.id', 'skip': 0, 'limit': 1},
+        ),
+        mock.call(
+            '/environments/master/entries',
+            {'content_type': 'page', 'order': 'sys.createdAt,sys.id', 'skip': 1, 'limit': 1},
+        ),
+    ]
+
+
+def test_iter_entries_raises_error_of_page(client, contentful_http_get, contentful_response):
+    import contentful
+
+    error = {'sys': {'type': 'Error', 'id': 'BadRequest'}, 'message': 'Bad request'}
+    contentful_http_get.side_effect = [
+        mock.MagicMock(content=json.dumps(dict(contentful_response, total=2)), status_code=200),
+        mock.MagicMock(content=json.dumps(error), status_code=400, **{'json.return_value': error}),
+    ]
+
+    with pytest.raises(contentful.errors.HTTPError):
+        list(client.iter_entries({'content_type': 'page'}, page_size=1))
+
+
+def test_transformations_are_fused_only_on_request(testbed):
+    from contentful_proxy.utils import cache
+    from contentful_proxy.utils.cache import transformations
+
+    stages = [transformations.ResolveIncludes(), transformations.RemoveIncludes()]
+    client = cache.Client('space', 'token', content_type_cache=False, transformations=stages)
+
+    assert client.pipeline == stages
+    assert [type(stage) for stage in client.streaming_pipeline] == [transformations.FusedPipeline]
+
+    with mock.patch.object(cache.Client, 'FUSE_TRANSFORMATIONS', True):
+        client = cache.Client('space', 'token', content_type_cache=False, transformations=stages)
+
+    assert client.pipeline is client.streaming_pipeline
+
+
+def test_variants_are_stored_under_own_keys(client, contentful_http_get, contentful_response, local_cache):
+    import zlib
+
+    from google.appengine.api import memcache
+
+    contentful_response['items'][0]['fields']['title'] = 'Title ' * 500
+    contentful_http_get.return_value.content = json.dumps(contentful_response)
+    memcache_key = client.memcache_key('/environments/master/entries', {'content_type': 'page'})
+
+    response = client.entries({'content_type': 'page'})
+    variant_key = client.variant_key(memcache_key, response.etag, 'gzip')
+
+    assert zlib.decompress(response.variants['gzip'], 16 + zlib.MAX_WBITS) == response.content
+    assert memcache.get(variant_key) == {'storage': 'raw', 'data': response.variants['gzip']}
+    assert 'gzip' in client.storage.get(memcache_key)['encodings']
+
+    local_cache.clear()
+    with mock.patch.object(client.storage, 'get', wraps=client.storage.get) as storage_get:
+        cached = client.entries({'content_type': 'page'})
+
+        assert cached.content == response.content
+        assert 'gzip' in cached.variants
+        assert storage_get.call_args_list == [mock.call(memcache_key)]
+
+        assert cached.variants['gzip'] == response.variants['gzip']
+        assert storage_get.call_args_list == [mock.call(memcache_key), mock.call(variant_key)]
+
+
+def test_evicted_variant_is_missing(client, contentful_http_get, contentful_response, local_cache):
+    from google.appengine.api import memcache
+
+    contentful_response['items'][0]['fields']['title'] = 'Title ' * 500
+    contentful_http_get.return_value.content = json.dumps(contentful_response)
+    memcache_key = client.memcache_key('/environments/master/entries', {'content_type': 'page'})
+
+    response = client.entries({'content_type': 'page'})
+    memcache.delete(client.variant_key(memcache_key, response.etag, 'gzip'))
+    local_cache.clear()
+
+    cached = client.entries({'content_type': 'page'})
+
+    assert 'gzip' in cached.variants
+    assert cached.variants.get('gzip') is None
@@ -0,0 +1,78 @@
+import mock
+
+
+def test_content_tags(contentful_response):
+    from contentful_proxy.utils.cache import invalidation
+    contentful_response['items'][0]['fields']['image'] = {
+        'sys': {'type': 'Link', 'linkType': 'Asset', 'id': 'asset-1'},
+    }
+    contentful_response['items'][0]['sys']['contentType'] = {
+        'sys': {'type': 'Link', 'linkType': 'ContentType', 'id': 'page'},
+    }
+
+    tags = invalidation.content_tags(
+        '/environments/master/entries', {'content_type': 'page'}, contentful_response
+    )
+
+    assert tags == {'collection:entries:page', 'id:entry-1', 'id:asset-1'}
+
+
+def test_content_type_tags():
+    from contentful_proxy.utils.cache import invalidation
+    content_type = {'sys': {'type': 'ContentType', 'id': 'page'}, 'fields': [{'id': 'title', 'type': 'Symbol'}]}
+
+    assert invalidation.content_tags('/environments/master/content_types/page', {}, content_type) == {'id:page'}
+    assert invalidation.content_tags(
+        '/environments/master/content_types', {}, {'sys': {'type': 'Array'}, 'items': [content_type]}
+    ) == {'collection:content_types:*', 'id:page'}
+
+
+def test_content_type_event_purges_content_type(testbed, client, contentful_http_get):
+    contentful_http_get.return_value = mock.MagicMock(
+        content='{"sys": {"type": "ContentType", "id": "page"}, "fields": []}', status_code=200
+    )
+    client.content_type('page')
+
+    purged = client.invalidate({'sys': {'type': 'ContentType', 'id': 'page'}})
+
+    assert purged == {client.memcache_key('/environments/master/content_types/page', {})}
+
+    client.content_type('page')
+
+    assert contentful_http_get.call_count == 2
+
+
+def test_event_purges_dependent_responses(testbed, client, contentful_http_get):
+    client.entries({'content_type': 'page'})
+    contentful_http_get.return_value = mock.MagicMock(content='{"items": []}', status_code=200)
+    client.assets({})
+
+    purged = client.invalidate({
+        'sys': {
+            'type': 'DeletedEntry',
+            'id': 'entry-1',
+            'contentType': {'sys': {'type': 'Link', 'linkType': 'ContentType', 'id': 'page'}},
+        },
+    })
+
+    assert purged == {client.memcache_key('/environments/master/entries', {'content_type': 'page'})}
+
+    client.entries({'content_type': 'page'})
+    client.assets({})
+
+    assert contentful_http_get.call_count == 3
+
+
+def test_index_is_sharded(testbed):
+    from contentful_proxy.utils.cache import invalidation
+
+    index = invalidation.DependencyIndex('space:master')
+    cache_keys = {'key-{}'.format(i) for i in xrange(20)}
+
+    with mock.patch.object(invalidation.DependencyIndex, 'MAX_KEYS', 2):
+        for cache_key in sorted(cache_keys):
+            index.record(cache_key, ['id:entry-1'])
+        index.record('key-0', ['id:entry-1'])
+
+        assert index.purge(['id:entry-1', 'id:entry-2']) == cache_keys
+        assert index.purge(['id:entry-1']) == set()
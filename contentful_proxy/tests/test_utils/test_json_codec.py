@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from contentful_proxy.utils import json_codec
+
+CONTENT = {
+    u'items': [
+        {
+            u'id': u'page1',
+            u'title': u'Zürich',
+            u'url': u'http://localhost/contentful/file_cache/images.ctfassets.net/image.png',
+            u'rating': 4.25,
+            u'views': 2 ** 40,
+            u'published': True,
+            u'tags': [u'a', u'b'],
+            u'image': None,
+        },
+    ],
+    u'total': 1,
+}
+
+
+@pytest.fixture(params=list(json_codec.CODECS))
+def codec(request):
+    codec = json_codec.codec
+    json_codec.select(request.param)
+    yield json_codec.codec
+    json_codec.codec = codec
+
+
+def test_codec_round_trip(codec):
+    data = json_codec.dumps(CONTENT)
+
+    assert isinstance(data, str)
+    assert json.loads(data) == CONTENT
+    assert json_codec.loads(data) == CONTENT
+    assert '\\/' not in data
+
+
+def test_codec_keeps_floats(codec):
+    values = [0.1 + 0.2, 1 / 3.0, 52.520008, 1e-7, 123456789.12345678]
+
+    assert json_codec.dumps(values) == json.dumps(values)
+    assert json_codec.loads(json_codec.dumps(values)) == values
+
+
+def test_codec_sort_keys(codec):
+    assert json_codec.dumps({'b': 1, 'a': {'d': 2, 'c': 3}}, sort_keys=True).replace(' ', '') == \
+        '{"a":{"c":3,"d":2},"b":1}'
+
+
+def test_codec_invalid_json(codec):
+    with pytest.raises(ValueError):
+        json_codec.loads('<html>')
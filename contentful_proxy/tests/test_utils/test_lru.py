@@ -0,0 +1,40 @@
+import mock
+
+from contentful_proxy.utils.cache import lru
+
+
+def test_least_recently_used_value_is_evicted():
+    cache = lru.LRUCache(max_bytes=6, ttl=60)
+    cache.set('a', 'aa')
+    cache.set('b', 'bb')
+    cache.set('c', 'cc')
+
+    assert cache.get('a') == 'aa'
+
+    cache.set('d', 'dd')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aa'
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 6
+
+
+def test_value_expires():
+    cache = lru.LRUCache(max_bytes=10, ttl=60)
+
+    with mock.patch('contentful_proxy.utils.cache.lru.time.time', return_value=0):
+        cache.set('a', 'aa')
+
+    with mock.patch('contentful_proxy.utils.cache.lru.time.time', return_value=61):
+        assert cache.get('a') is None
+
+    assert cache.stats() == {
+        'items': 0, 'bytes': 0, 'hits': 0, 'misses': 1, 'evictions': 0, 'expirations': 1,
+    }
+
+
+def test_too_big_value_is_not_stored():
+    cache = lru.LRUCache(max_bytes=1, ttl=60)
+
+    assert not cache.set('a', 'aa')
+    assert cache.get('a') is None
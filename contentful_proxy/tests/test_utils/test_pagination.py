@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from contentful_proxy.utils.cache import pagination
+
+
+class Collection(object):
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+
+    def fetch_page(self, skip, limit):
+        self.calls.append((skip, limit, threading.current_thread().name))
+        return {'total': self.total, 'items': list(range(skip, min(skip + limit, self.total)))}
+
+
+def test_all_items_are_iterated():
+    collection = Collection(total=7)
+    pages = pagination.PageIterator(collection.fetch_page, page_size=3)
+
+    assert pages.total == 7
+    assert list(pages) == list(range(7))
+    assert [call[:2] for call in collection.calls] == [(0, 3), (3, 3), (6, 3)]
+
+
+def test_next_page_is_prefetched():
+    collection = Collection(total=6)
+    items = iter(pagination.PageIterator(collection.fetch_page, page_size=3))
+
+    assert next(items) == 0
+    pagination_thread = collection.calls[0][2]
+    deadline = time.time() + 5
+    while len(collection.calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)  # second page is fetched without consuming the first one
+    assert collection.calls[1][:2] == (3, 3)
+    assert collection.calls[1][2] != pagination_thread
+    assert list(items) == [1, 2, 3, 4, 5]
+    assert len(collection.calls) == 2
+
+
+def test_empty_collection():
+    collection = Collection(total=0)
+
+    assert list(pagination.PageIterator(collection.fetch_page)) == []
+    assert len(collection.calls) == 1
+
+
+def test_prefetch_error_is_raised():
+    def fetch_page(skip, limit):
+        if skip:
+            raise ValueError('failed')
+        return {'total': 4, 'items': [0, 1]}
+
+    with pytest.raises(ValueError):
+        list(pagination.PageIterator(fetch_page, page_size=2))
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def storage(testbed):
+    from contentful_proxy.utils.cache import storage
+    return storage.MemcacheStorage(chunk_size=1000)
+
+
+def test_small_value_is_stored_in_one_key(storage):
+    from google.appengine.api import memcache
+
+    storage.set('key', {'content': 'a' * 10000})
+
+    assert memcache.get('key')['storage'] == 'zlib'
+    assert storage.get('key') == {'content': 'a' * 10000}
+
+
+def test_big_value_is_split_into_chunks(storage):
+    from google.appengine.api import memcache
+    value = {'content': os.urandom(5000)}
+
+    storage.set('key', value)
+
+    head = memcache.get('key')
+    assert head['storage'] == 'zlib-chunked'
+    assert head['chunks'] > 1
+    assert storage.get('key') == value
+
+
+def test_missing_chunk_is_cache_miss(storage):
+    from google.appengine.api import memcache
+
+    storage.set('key', {'content': os.urandom(5000)})
+    head = memcache.get('key')
+    memcache.delete(storage.chunk_key('key', head['digest'], 0))
+
+    assert storage.get('key') is None
+
+
+def test_corrupted_chunk_is_cache_miss(storage):
+    from google.appengine.api import memcache
+
+    storage.set('key', {'content': os.urandom(5000)})
+    head = memcache.get('key')
+    memcache.set(storage.chunk_key('key', head['digest'], 0), 'x' * 1000)
+
+    assert storage.get('key') is None
+
+
+def test_get_multi(storage):
+    small, big = {'content': 'a' * 100}, {'content': os.urandom(5000)}
+    storage.set('small', small)
+    storage.set('big', big)
+
+    assert storage.get_multi(['small', 'big', 'missing']) == {'small': small, 'big': big}
+
+
+@pytest.mark.parametrize('size', [100, 5000])
+def test_compressed_data_is_stored_as_it_is(storage, size):
+    from google.appengine.api import memcache
+    data = os.urandom(size)
+
+    storage.set('key', data, compress=False)
+
+    assert memcache.get('key')['storage'] in ('raw', 'raw-chunked')
+    assert storage.get('key') == data
@@ -0,0 +1,40 @@
+import mock
+
+from contentful_proxy.utils import timing
+
+
+def test_stage_without_recorder():
+    with timing.stage('fetch'):
+        pass
+
+    assert timing.current() is None
+
+
+def test_stages_are_recorded():
+    recorder = timing.start()
+    try:
+        with mock.patch('contentful_proxy.utils.timing.time.time', side_effect=[1.0, 1.5, 2.0, 2.25, 3.0, 3.125]):
+            with timing.stage('fetch'):
+                pass
+            with timing.stage('decode'):
+                pass
+            with timing.stage('fetch'):
+                pass
+    finally:
+        assert timing.finish() is recorder
+
+    assert timing.current() is None
+    assert recorder.stages == {'fetch': 625.0, 'decode': 250.0}
+    assert recorder.server_timing() == 'fetch;dur=625.0, decode;dur=250.0'
+
+
+def test_parse_sample_rate():
+    assert timing.parse_sample_rate('0.25') == 0.25
+    assert timing.parse_sample_rate('2') == 1.0
+    assert timing.parse_sample_rate('-1') == 0.0
+
+    with mock.patch('contentful_proxy.utils.timing.logging.warning') as warning:
+        assert timing.parse_sample_rate('1%') == 0.0
+        assert timing.parse_sample_rate('nan') == 0.0
+
+    assert warning.call_count == 2
@@ -0,0 +1,332 @@
+import copy
+import functools
+import json
+import pickle
+
+import mock
+import pytest
+
+from benchmarks import payloads
+from contentful_proxy.utils import timing
+from contentful_proxy.utils.cache import transformations
+
+
+def link(link_type, item_id):
+    return {'sys': {'type': 'Link', 'linkType': link_type, 'id': item_id}}
+
+
+def asset(asset_id):
+    return {
+        'sys': {'type': 'Asset', 'id': asset_id},
+        'fields': {
+            'title': 'Image {}'.format(asset_id),
+            'file': {
+                'url': '//images.ctfassets.net/space/{}/image.png'.format(asset_id),
+                'contentType': 'image/png',
+                'details': {'image': {'width': 100, 'height': 200}},
+            },
+        },
+    }
+
+
+def entry(entry_id, **fields):
+    return {
+        'sys': {
+            'type': 'Entry',
+            'id': entry_id,
+            'contentType': {'sys': {'type': 'Link', 'linkType': 'ContentType', 'id': 'page'}},
+        },
+        'fields': fields,
+    }
+
+
+@pytest.fixture
+def collection():
+    return {
+        'sys': {'type': 'Array'},
+        'total': 3,
+        'skip': 0,
+        'limit': 100,
+        'items': [
+            entry(
+                'page1',
+                title='Page 1',
+                image=link('Asset', 'asset1'),
+                author=link('Entry', 'author1'),
+                related=[link('Entry', 'page2'), link('Entry', 'author1')],
+                tags=['a', 'b'],
+                location={'lat': 52.52, 'lon': 13.4},
+                published=True,
+            ),
+            entry('page2', title='Page 2', gallery=[link('Asset', 'asset1'), link('Asset', 'asset2')]),
+            asset('asset3'),
+        ],
+        'includes': {
+            'Entry': [
+                entry('author1', name='Author', avatar=link('Asset', 'asset2')),
+                entry('page2', title='Page 2', gallery=[link('Asset', 'asset1'), link('Asset', 'asset2')]),
+            ],
+            'Asset': [asset('asset1'), asset('asset2')],
+        },
+    }
+
+
+@pytest.fixture
+def content_types():
+    return [
+        {
+            'sys': {'type': 'ContentType', 'id': 'page'},
+            'fields': [
+                {'id': 'title', 'type': 'Symbol'},
+                {'id': 'image', 'type': 'Link', 'linkType': 'Asset'},
+                {'id': 'author', 'type': 'Link', 'linkType': 'Entry'},
+                {'id': 'related', 'type': 'Array', 'items': {'type': 'Link', 'linkType': 'Entry'}},
+                {'id': 'gallery', 'type': 'Array', 'items': {'type': 'Link', 'linkType': 'Asset'}},
+                {'id': 'tags', 'type': 'Array', 'items': {'type': 'Symbol'}},
+                {'id': 'location', 'type': 'Location'},
+                {'id': 'published', 'type': 'Boolean'},
+            ],
+        },
+    ]
+
+
+def default_transformations():
+    return [
+        transformations.ReplaceAssetLinks(proxy_hostname='http://localhost'),
+        transformations.ResolveIncludes(),
+        transformations.RemoveIncludes(),
+        transformations.RemoveRootSys(),
+    ]
+
+
+def run(pipeline, content):
+    for transformation in pipeline:
+        transformation(content)
+    return json.loads(json.dumps(content))
+
+
+@pytest.mark.parametrize('params', [
+    {'items': 20},
+    {'items': 20, 'include_depth': 0},
+    {'items': 10, 'include_depth': 3, 'locales': 2},
+])
+@pytest.mark.parametrize('pipeline', [
+    default_transformations(),
+    default_transformations()[1:],
+    default_transformations()[:2],
+    default_transformations()[:2] + [transformations.FlattenFields()] + default_transformations()[2:],
+])
+def test_fused_pipeline_is_equivalent(params, pipeline):
+    content = payloads.generate(**params)
+    compiled = transformations.compile_pipeline(pipeline)
+
+    assert len(compiled) == 1
+    assert isinstance(compiled[0], transformations.FusedPipeline)
+    assert run(compiled, copy.deepcopy(content)) == run(pipeline, copy.deepcopy(content))
+
+
+def test_fused_pipeline_without_includes():
+    content = payloads.generate(items=20)
+    del content['includes']
+    pipeline = default_transformations()
+
+    assert run(transformations.compile_pipeline(pipeline), copy.deepcopy(content)) == run(
+        pipeline, copy.deepcopy(content)
+    )
+
+
+def test_fused_pipeline_records_stages(collection):
+    pipeline = transformations.compile_pipeline(
+        default_transformations()[:2] + [transformations.FlattenFields()] + default_transformations()[2:]
+    )
+
+    recorder = timing.start()
+    try:
+        run(pipeline, collection)
+    finally:
+        timing.finish()
+
+    assert list(recorder.stages) == ['ReplaceAssetLinks', 'ResolveIncludes', 'FlattenFields']
+
+
+@pytest.mark.parametrize('pipeline', [
+    [transformations.RemoveRootSys(), transformations.ResolveIncludes()],
+    [transformations.ReplaceAssetLinks(proxy_hostname='http://localhost')],
+    [transformations.ResolveIncludes(), transformations.ResolveIncludes()],
+    [type('CustomResolveIncludes', (transformations.ResolveIncludes,), {})()],
+])
+def test_other_pipelines_are_not_fused(pipeline):
+    assert transformations.compile_pipeline(pipeline) == pipeline
+
+
+def test_resolve_includes_shares_resolved_items(collection):
+    content = transformations.ResolveIncludes()(collection)
+
+    page = content['items'][0]['fields']
+    assert page['author'] is page['related'][1]
+    assert page['author']['avatar']['id'] == 'asset2'
+    assert content['items'][1]['fields']['gallery'][0] is page['image']
+
+
+def test_resolve_includes_keeps_cycles_unresolved():
+    content = {
+        'items': [entry('page1', next=link('Entry', 'page2'))],
+        'includes': {
+            'Entry': [
+                entry('page1', next=link('Entry', 'page2')),
+                entry('page2', next=link('Entry', 'page1'), previous=link('Entry', 'page2')),
+            ],
+        },
+    }
+
+    content = json.loads(json.dumps(transformations.ResolveIncludes()(content)))
+
+    page2 = content['items'][0]['fields']['next']
+    assert page2['next']['next'] == link('Entry', 'page2')
+    assert page2['previous'] == link('Entry', 'page2')
+
+
+@pytest.mark.parametrize('max_depth', [None, 3])
+def test_resolve_includes_cycles_do_not_depend_on_item_order(max_depth):
+    items = [entry('a', ref=link('Entry', 'A')), entry('b', ref=link('Entry', 'B'))]
+    includes = {'Entry': [entry('A', next=link('Entry', 'B')), entry('B', next=link('Entry', 'A'))]}
+
+    def resolve(items):
+        content = {'items': copy.deepcopy(items), 'includes': copy.deepcopy(includes)}
+        content = transformations.ResolveIncludes(max_depth=max_depth)(content)
+        return {item['sys']['id']: item['fields']['ref'] for item in json.loads(json.dumps(content['items']))}
+
+    resolved = resolve(items)
+
+    assert resolved == resolve(items[::-1])
+    assert resolved['a']['next']['next'] == link('Entry', 'A')
+    assert resolved['b']['next']['next'] == link('Entry', 'B')
+
+
+def test_resolve_includes_keeps_missing_links_unresolved():
+    content = {
+        'items': [entry('page1', author=link('Entry', 'unpublished'), image=link('Asset', 'asset1'))],
+        'includes': {'Entry': []},
+    }
+
+    fields = transformations.ResolveIncludes()(content)['items'][0]['fields']
+
+    assert fields['author'] == link('Entry', 'unpublished')
+    assert fields['image'] == link('Asset', 'asset1')
+
+
+def test_resolve_includes_max_depth(collection):
+    content = transformations.ResolveIncludes(max_depth=1)(collection)
+
+    author = content['items'][0]['fields']['author']
+    assert author['name'] == 'Author'
+    assert author['avatar'] == link('Asset', 'asset2')
+
+
+def test_resolve_includes_deep_chain():
+    depth = 5000
+    content = {
+        'items': [entry('page0', next=link('Entry', 'page1'))],
+        'includes': {
+            'Entry': [entry('page{}'.format(i), next=link('Entry', 'page{}'.format(i + 1))) for i in range(1, depth)],
+        },
+    }
+    content['includes']['Entry'][-1]['fields'] = {'next': None}
+
+    fields = transformations.ResolveIncludes()(content)['items'][0]['fields']
+    for i in range(1, depth):
+        assert fields['next']['id'] == 'page{}'.format(i)
+        fields = fields['next']
+    assert fields['next'] is None
+
+
+def test_parse_projection():
+    projection = transformations.parse_projection(' title, author.name,author.avatar.title,image.file,image,')
+
+    assert projection == {'title': {}, 'author': {'name': {}, 'avatar': {'title': {}}}, 'image': {}}
+    assert transformations.projection_paths(projection) == ['author.avatar.title', 'author.name', 'image', 'title']
+    assert transformations.projection_select(projection) == 'fields.author,fields.image,fields.title'
+    assert transformations.parse_projection('') is None
+    assert transformations.parse_projection(' , ') is None
+
+
+def test_resolve_includes_projection(collection):
+    content = transformations.ResolveIncludes(projection='title,author.name,related.title')(collection)
+    content = json.loads(json.dumps(content))
+
+    assert content['items'][0]['fields'] == {
+        'title': 'Page 1',
+        'author': {'id': 'author1', 'name': 'Author'},
+        'related': [{'id': 'page2', 'title': 'Page 2'}, {'id': 'author1'}],
+    }
+    assert content['items'][1]['fields'] == {'title': 'Page 2'}
+    assert content['items'][2]['fields'] == {'title': 'Image asset3'}
+
+
+def test_resolve_includes_projection_without_includes(collection):
+    del collection['includes']
+
+    content = transformations.ResolveIncludes(projection='title,author.name')(collection)
+
+    assert content['items'][0]['fields'] == {'title': 'Page 1', 'author': link('Entry', 'author1')}
+
+
+def test_resolve_includes_projection_fingerprint():
+    assert transformations.ResolveIncludes(projection='title,author.name').fingerprint == (
+        transformations.ResolveIncludes(projection='author.name, title').fingerprint
+    )
+    assert transformations.ResolveIncludes(projection='title').fingerprint != (
+        transformations.ResolveIncludes().fingerprint
+    )
+
+
+@pytest.mark.parametrize('remove_includes', [True, False])
+def test_fused_pipeline_projection_is_equivalent(collection, remove_includes):
+    pipeline = default_transformations()
+    pipeline[1] = transformations.ResolveIncludes(projection='title,author.name,gallery')
+    if remove_includes:
+        del collection['includes']
+
+    assert run(transformations.compile_pipeline(pipeline), copy.deepcopy(collection)) == run(
+        pipeline, copy.deepcopy(collection)
+    )
+
+
+def test_flatten_fields_by_content_type(collection, content_types):
+    pipeline = [transformations.ResolveIncludes(), transformations.FlattenFields()]
+    planned = [transformations.ResolveIncludes(), transformations.FlattenFields(content_types=content_types)]
+
+    assert run(planned, copy.deepcopy(collection)) == run(pipeline, copy.deepcopy(collection))
+    assert run(transformations.compile_pipeline(planned), copy.deepcopy(collection)) == run(
+        pipeline, copy.deepcopy(collection)
+    )
+
+
+def test_flatten_fields_loads_content_types_once(collection, content_types):
+    load = mock.Mock(return_value=content_types)
+    flatten_fields = transformations.FlattenFields(content_types=load)
+
+    flatten_fields(transformations.ResolveIncludes()(collection))
+
+    assert load.call_count == 1
+    assert set(flatten_fields.plans['page']) == {field['id'] for field in content_types[0]['fields']}
+    assert flatten_fields.plans['page']['title'] is not transformations.FlattenFields.flatten_field
+
+
+def test_flatten_fields_is_picklable(collection, content_types):
+    flatten_fields = transformations.FlattenFields(content_types=functools.partial(copy.deepcopy, content_types))
+    expected = flatten_fields(transformations.ResolveIncludes()(copy.deepcopy(collection)))
+
+    unpickled = pickle.loads(pickle.dumps(flatten_fields))
+
+    assert unpickled._plans is None
+    assert unpickled(transformations.ResolveIncludes()(collection)) == expected
+
+
+def test_flatten_fields_without_content_types(collection):
+    flatten_fields = transformations.FlattenFields(content_types=mock.Mock(side_effect=IOError))
+
+    content = flatten_fields(transformations.ResolveIncludes()(collection))
+
+    assert flatten_fields.plans == {}
+    assert content['items'][0]['title'] == 'Page 1'
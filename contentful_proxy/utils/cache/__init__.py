@@ -19,43 +19,174 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import collections
+import copy
+import functools
 import hashlib
-import json
 import logging
+import time
+import urllib
 
 import contentful
 from contentful.errors import EntryNotFoundError
-from google.appengine.api import memcache
+from contentful.utils import retry_request
+from google.appengine.ext import deferred
 
+from contentful_proxy.utils import json_codec
+from contentful_proxy.utils import timing
+
+from . import content_encodings
+from . import invalidation
+from . import lru
+from . import pagination
+from . import singleflight
+from . import storage
+from . import streaming
 from . import transformations
 
 
 class CachedResponse(object):
 
-    def __init__(self, content, status_code):
+    def __init__(self, content, status_code, etag=None, variants=None):
         self.content = content
         self.status_code = status_code
+        self.etag = etag
+        self.variants = variants or {}  # content compressed by Content-Encoding, e.g. `StoredVariants`
 
     def json(self):
-        return json.loads(self.content)
+        return json_codec.loads(self.content)
+
+
+class StoredVariants(collections.Mapping):
+    """
+    Compressed variants of cached content by Content-Encoding.
+
+    Names of encodings are known upfront, a variant is read (see `Client.variant`)
+    only when it is sent, so responses sent as they are never read any variant.
+    Evicted variant is missing.
+    """
+
+    def __init__(self, encodings, load):
+        """
+        :param load: Function of encoding which returns variant or None if it is evicted.
+        """
+
+        self._encodings = tuple(encodings)
+        self._load = load
+        self._variants = {}
+
+    def __getitem__(self, encoding):
+        if encoding not in self._encodings:
+            raise KeyError(encoding)
+
+        if encoding not in self._variants:
+            variant = self._load(encoding)
+            if variant is None:
+                raise KeyError(encoding)
+            self._variants[encoding] = variant
+
+        return self._variants[encoding]
+
+    def __iter__(self):
+        return iter(self._encodings)
+
+    def __len__(self):
+        return len(self._encodings)
+
+    def __contains__(self, encoding):
+        return encoding in self._encodings
 
 
 class Client(contentful.Client):
     CACHE_TTL = 10
+    CACHE_STALE_TTL = 60 * 5  # stale content is served (and refreshed in background) for this long
+    CACHE_COMPRESSION_LEVEL = 6  # zlib level of values stored in memcache
+    PRECOMPRESSED_ENCODINGS = ('br', 'gzip')  # variants of content stored under own keys, br needs brotli module
+    PRECOMPRESS_MIN_SIZE = 1024
+    STREAMING_MIN_SIZE = 1024 * 1024  # bigger responses are transformed item by item, see `streaming`
+    FUSE_TRANSFORMATIONS = False  # run default transformations in single pass, see `transformations.FusedPipeline`
+    GET_MANY_CHUNK_SIZE = 100  # IDs per `sys.id[in]` query of `get_many`, default page size of Contentful
+    PAGES_ORDER = 'sys.createdAt,sys.id'  # order of pages of `iter_entries`, `sys.id` breaks ties
+    REVALIDATE_LOCK_TTL = 30
+    REVALIDATE_QUEUE = 'default'
+    LOCAL_CACHE_TTL = 5  # fresh entries are kept in instance memory for at most this long
+    LOCAL_CACHE = lru.LRUCache(max_bytes=8 * 1024 * 1024, ttl=LOCAL_CACHE_TTL)  # shared by all clients of the instance
+    SINGLE_FLIGHT = singleflight.SingleFlight()  # shared by all clients of the instance
 
     def __init__(self, *args, **kwargs):
         self.CONTENT_TRANSFORMATIONS = kwargs.pop('transformations')
         kwargs['raw_mode'] = True   # do not want any transformation of responses
         super(Client, self).__init__(*args, **kwargs)
+        self.transformations_fingerprint = transformations.fingerprint(self.CONTENT_TRANSFORMATIONS)
+        self.pipeline = list(self.CONTENT_TRANSFORMATIONS)
+        self.streaming_pipeline = transformations.compile_pipeline(self.CONTENT_TRANSFORMATIONS)
+        if self.FUSE_TRANSFORMATIONS:
+            self.pipeline = self.streaming_pipeline
+        self.storage = storage.MemcacheStorage(compression_level=self.CACHE_COMPRESSION_LEVEL)
+        self.dependencies = invalidation.DependencyIndex(u'{}:{}'.format(self.space_id, self.environment))
+
+    @staticmethod
+    def canonical_query(query):
+        """
+        Serializes query independently of order of its keys and of `select` fields.
+
+        :rtype: str
+        """
+
+        def to_text(value):
+            if isinstance(value, (list, tuple)):
+                return u','.join(to_text(element) for element in value)
+            if isinstance(value, str):
+                return value.decode('utf-8')
+            return unicode(value)
+
+        params = []
+        for key, value in sorted(query.items()):
+            value = to_text(value)
+
+            if key == 'select':
+                value = u','.join(sorted(set(field.strip() for field in value.split(',') if field.strip())))
+            elif key == 'order':
+                value = u','.join(field.strip() for field in value.split(',') if field.strip())
+
+            params.append((to_text(key).encode('utf-8'), value.encode('utf-8')))
+
+        return urllib.urlencode(params)
 
     def memcache_key(self, url, query):
-        return u'contentful:{}:{}:{}?{}'.format(
+        return u'contentful:{}:{}:{}:{}?{}'.format(
             self.space_id,
+            self.environment,
             url,
-            hashlib.md5(str(self.CONTENT_TRANSFORMATIONS)).hexdigest(),
-            json.dumps(query)
+            self.transformations_fingerprint,
+            self.canonical_query(query)
         )
 
+    @staticmethod
+    def variant_key(memcache_key, etag, encoding):
+        """
+        Key of compressed variant of cached content, it contains ETag so variants of different
+        versions of content are never mixed up.
+        """
+
+        return u'{}:variant:{}:{}'.format(memcache_key, etag, encoding)
+
+    def variant(self, memcache_key, etag, encoding):
+        """
+        :return: Compressed variant of cached content or None if it is evicted.
+        """
+
+        variant_key = self.variant_key(memcache_key, etag, encoding)
+
+        variant = self.LOCAL_CACHE.get(variant_key)
+        if variant is None:
+            with timing.stage('memcache'):
+                variant = self.storage.get(variant_key)
+            if variant is not None:
+                self.LOCAL_CACHE.set(variant_key, variant, size=len(variant))
+
+        return variant
+
     def entry(self, entry_id, query=None):
 
         if query is None:
@@ -78,50 +209,519 @@ class Client(contentful.Client):
                 "Entry not found for ID: '{0}'".format(entry_id)
             )
 
+    def iter_entries(self, query=None, page_size=100):
+        """
+        Returns iterator of transformed entries of all pages of the query.
+
+        Pages are cached like responses of `entries` and the next one is fetched while
+        the current one is consumed. Entries are ordered by `sys.createdAt` and `sys.id`,
+        so pages of the walk do not depend on the order Contentful happens to return.
+        Entries created or deleted during the walk may still shift the following pages.
+
+        :param query: (optional) Query of entries, its `skip`, `limit` and `order` are ignored.
+        :param page_size: Number of entries per request.
+        :rtype: pagination.PageIterator
+        """
+
+        query = {key: value for key, value in (query or {}).items() if key not in ('skip', 'limit', 'order')}
+        query['order'] = self.PAGES_ORDER
+
+        def fetch_page(skip, limit):
+            return self.entries(dict(query, skip=skip, limit=limit)).json()
+
+        return pagination.PageIterator(fetch_page, page_size=page_size)
+
+    def get_many(self, entry_ids, query=None):
+        """
+        Returns entries by IDs, cached under the same keys as responses of `entry`.
+
+        Cache is checked for all entries at once, missing entries are fetched by
+        `sys.id[in]` queries of `GET_MANY_CHUNK_SIZE` IDs and cached one by one.
+
+        :param entry_ids: IDs of entries.
+        :param query: (optional) Other parameters of the query, e.g. `locale`.
+        :return: Responses in order of IDs, None for entries which do not exist.
+        :rtype: list
+        """
+
+        query = dict(query or {})
+        self._normalize_select(query)
+
+        queries = collections.OrderedDict(
+            (entry_id, dict(query, **{'sys.id': entry_id})) for entry_id in entry_ids
+        )
+        memcache_keys = {
+            entry_id: self.memcache_key('/entries', entry_query) for entry_id, entry_query in queries.items()
+        }
+
+        responses = {}
+        with timing.stage('local-cache'):
+            for entry_id, memcache_key in memcache_keys.items():
+                cached = self.LOCAL_CACHE.get(memcache_key)
+                if cached is not None:
+                    responses[entry_id] = self._response(memcache_key, '/entries', queries[entry_id], cached)
+
+        missing = [entry_id for entry_id in queries if entry_id not in responses]
+        if missing:
+            with timing.stage('memcache'):
+                stored = self.storage.get_multi([memcache_keys[entry_id] for entry_id in missing])
+
+            for entry_id in missing:
+                memcache_key = memcache_keys[entry_id]
+                if memcache_key in stored:
+                    cached = self._stored(memcache_key, stored[memcache_key])
+                    responses[entry_id] = self._response(memcache_key, '/entries', queries[entry_id], cached)
+
+        missing = [entry_id for entry_id in missing if entry_id not in responses]
+        for offset in xrange(0, len(missing), self.GET_MANY_CHUNK_SIZE):
+            chunk = missing[offset:offset + self.GET_MANY_CHUNK_SIZE]
+            with timing.stage('miss'):
+                responses.update(self._fetch_many(chunk, query, queries, memcache_keys))
+
+        return [responses.get(entry_id) for entry_id in queries]
+
+    def _fetch_many(self, entry_ids, query, queries, memcache_keys):
+        """
+        Fetches entries by single query and stores each of them like response of `entry`.
+
+        :return: Responses by entry ID.
+        :rtype: dict
+        """
+
+        with timing.stage('fetch'):
+            response = retry_request(self)(super(Client, self)._http_get)(
+                '/entries', dict(query, **{'sys.id[in]': u','.join(entry_ids)})
+            )
+        if response.status_code != 200:
+            raise contentful.errors.get_error(response)
+
+        with timing.stage('decode'):
+            content = json_codec.loads(response.content)
+
+        responses = {}
+        for entry_id, entry_content in self.split_entries(content):
+            if entry_id not in memcache_keys:
+                continue
+
+            entry_content, tags = self._transform('/entries', queries[entry_id], entry_content)
+            responses[entry_id] = self._store(memcache_keys[entry_id], entry_content, tags)
+
+        return responses
+
+    @staticmethod
+    def split_entries(content):
+        """
+        Splits collection into collections of single entry, as they are returned for `sys.id` queries.
+
+        Every collection gets copy of includes its entry links to (directly or through other includes).
+
+        :return: Pairs of entry ID and its collection.
+        """
+
+        includes = {}
+        for link_type, values in content.get('includes', {}).items():
+            for value in values:
+                includes[(link_type, value['sys']['id'])] = value
+
+        for item in content.get('items', []):
+            linked = collections.OrderedDict()
+            stack = [item]
+            while stack:
+                obj = stack.pop()
+                if isinstance(obj, dict):
+                    link = transformations.ResolveIncludes.link(obj)
+                    if link is not None:
+                        if link not in linked and link in includes:
+                            linked[link] = includes[link]
+                            stack.append(includes[link])
+                        continue
+                    stack.extend(obj.itervalues())
+                elif isinstance(obj, list):
+                    stack.extend(obj)
+
+            entry_includes = {}
+            for (link_type, _), value in linked.items():
+                entry_includes.setdefault(link_type, []).append(value)
+
+            entry_content = {key: value for key, value in content.items() if key not in ('items', 'includes')}
+            entry_content.update({'total': 1, 'items': [copy.deepcopy(item)]})
+            if 'includes' in content:
+                entry_content['includes'] = copy.deepcopy(entry_includes)
+
+            yield item['sys']['id'], entry_content
+
+    def asset_descriptor(self, asset_id):
+        """
+        Returns url and content type of asset file.
+
+        Descriptor is cached on its own, so hot paths which only need the file
+        do not parse (or transform) asset JSON.
+
+        :param asset_id: The ID of the target Asset.
+        :return: Dict with `url`, `contentType` and `etag` or None if asset or its file does not exist.
+        :rtype: dict
+        """
+
+        memcache_key = u'contentful:{}:{}:asset-descriptor:{}'.format(self.space_id, self.environment, asset_id)
+
+        def lookup():
+            return self.LOCAL_CACHE.get(memcache_key) or self.storage.get(memcache_key)
+
+        descriptor = lookup()
+        if descriptor is None:
+            descriptor = self.SINGLE_FLIGHT.do(
+                memcache_key,
+                fetch=lambda: self._fetch_asset_descriptor(memcache_key, asset_id),
+                lookup=lookup,
+            )
+
+        return descriptor or None
+
+    def _fetch_asset_descriptor(self, memcache_key, asset_id):
+        url = self.environment_url(u'/assets/{}'.format(asset_id))
+        response = retry_request(self)(super(Client, self)._http_get)(url, {})
+
+        if response.status_code == 404:
+            return {}
+        if response.status_code != 200:
+            raise contentful.errors.get_error(response)
+
+        try:
+            asset_file = json_codec.loads(response.content)['fields']['file']
+            descriptor = {
+                'url': asset_file['url'],
+                'contentType': asset_file.get('contentType', u'application/octet-stream'),
+            }
+        except (ValueError, TypeError, KeyError) as ex:
+            logging.exception(ex)
+            descriptor = {}
+        else:
+            descriptor['etag'] = hashlib.md5(
+                u'{url}\n{contentType}'.format(**descriptor).encode('utf-8')
+            ).hexdigest()
+
+        # Missing assets are cached too, webhook invalidates the descriptor when asset is published
+        if self.storage.set(memcache_key, descriptor, time=self.CACHE_TTL + self.CACHE_STALE_TTL):
+            self.dependencies.record(
+                memcache_key,
+                [invalidation.id_tag(asset_id)],
+                time=self.CACHE_TTL + self.CACHE_STALE_TTL
+            )
+        self.LOCAL_CACHE.set(memcache_key, descriptor, size=len(descriptor.get('url', u'')))
+
+        return descriptor
+
+    def content_type_definitions(self):
+        """
+        Returns raw definitions of all content types, e.g. for `transformations.FlattenFields`.
+
+        Definitions are cached like asset descriptors (`content_type_cache` of contentful
+        client does not work in raw mode) and purged by content type webhooks.
+
+        :rtype: list
+        """
+
+        memcache_key = u'contentful:{}:{}:content-type-definitions'.format(self.space_id, self.environment)
+
+        def lookup():
+            definitions = self.LOCAL_CACHE.get(memcache_key)
+            if definitions is None:
+                definitions = self.storage.get(memcache_key)
+            return definitions
+
+        definitions = lookup()
+        if definitions is None:
+            definitions = self.SINGLE_FLIGHT.do(
+                memcache_key,
+                fetch=lambda: self._fetch_content_type_definitions(memcache_key),
+                lookup=lookup,
+            )
+
+        return definitions
+
+    def _fetch_content_type_definitions(self, memcache_key):
+        url = self.environment_url(u'/content_types')
+        response = retry_request(self)(super(Client, self)._http_get)(url, {'limit': 1000})
+
+        if response.status_code != 200:
+            raise contentful.errors.get_error(response)
+
+        definitions = json_codec.loads(response.content)['items']
+
+        if self.storage.set(memcache_key, definitions, time=self.CACHE_TTL + self.CACHE_STALE_TTL):
+            self.dependencies.record(
+                memcache_key,
+                [invalidation.collection_tag('content_types')],
+                time=self.CACHE_TTL + self.CACHE_STALE_TTL
+            )
+        self.LOCAL_CACHE.set(memcache_key, definitions, size=len(response.content))
+
+        return definitions
+
     def _http_get(self, url, query):
         memcache_key = self.memcache_key(url, query)
 
-        content = memcache.get(memcache_key)
-        if content is not None:
-            logging.debug("Cached contentful response {}".format(memcache_key))
+        response = self._cached_response(memcache_key, url, query)
+        if response is not None:
+            return response
 
-            return CachedResponse(
-                content=content,
-                status_code=204,
+        with timing.stage('miss'):
+            return self.SINGLE_FLIGHT.do(
+                memcache_key,
+                fetch=lambda: self._fetch(memcache_key, url, query),
+                lookup=lambda: self._cached_response(memcache_key, url, query),
             )
 
-        response = super(Client, self)._http_get(url, query)
+    def _cached_response(self, memcache_key, url, query):
+        """
+        Returns cached response or None, stale response schedules its revalidation.
+        """
+
+        with timing.stage('local-cache'):
+            cached = self.LOCAL_CACHE.get(memcache_key)
+        if cached is None:
+            with timing.stage('memcache'):
+                cached = self.storage.get(memcache_key)
+            if cached is None:
+                return None
+
+            cached = self._stored(memcache_key, cached)
+
+        return self._response(memcache_key, url, query, cached)
+
+    def _stored(self, memcache_key, cached):
+        """
+        Normalizes entry read from memcache and keeps it in instance memory.
+        """
+
+        logging.debug("Cached contentful response {}".format(memcache_key))
+
+        if not isinstance(cached, dict):
+            # Entry written before soft expiry was introduced
+            cached = {'content': cached, 'expires': None}
+
+        self._cache_locally(memcache_key, cached)
+
+        return cached
+
+    def _response(self, memcache_key, url, query, cached):
+        if cached['expires'] is not None and cached['expires'] <= time.time():
+            self._schedule_revalidation(memcache_key, url, query)
+
+        return CachedResponse(
+            content=cached['content'],
+            status_code=204,
+            etag=cached.get('etag'),
+            variants=StoredVariants(
+                cached.get('encodings', ()),
+                load=functools.partial(self.variant, memcache_key, cached.get('etag')),
+            ),
+        )
+
+    def _fetch(self, memcache_key, url, query):
+        """
+        Fetches response from Contentful, transforms it and stores it in memcache.
+
+        Entry is stored with soft expiry (`CACHE_TTL`) and is kept in memcache
+        for additional `CACHE_STALE_TTL` seconds, during which it is served stale
+        and refreshed in background.
+        """
+
+        with timing.stage('fetch'):
+            response = super(Client, self)._http_get(url, query)
         if response.status_code != 200:
             raise contentful.errors.get_error(response)
 
         content = response.content
+        tags = invalidation.content_tags(url, query)
 
-        try:
-            content = json.loads(content)
-        except ValueError:
-            pass
+        if len(content) >= self.STREAMING_MIN_SIZE and streaming.accepts(self.streaming_pipeline):
+            try:
+                with timing.stage('stream'):
+                    content = streaming.transform(
+                        content,
+                        self.streaming_pipeline[0],
+                        observe=lambda obj: tags.update(invalidation.content_tags(url, query, obj)),
+                    )
+            except streaming.DecodeError:
+                pass
         else:
-            for transformation in self.CONTENT_TRANSFORMATIONS:
+            try:
+                with timing.stage('decode'):
+                    content = json_codec.loads(content)
+            except ValueError:
+                pass
+            else:
+                content, tags = self._transform(url, query, content)
+
+        return self._store(memcache_key, content, tags, status_code=response.status_code)
+
+    def _transform(self, url, query, content):
+        """
+        Transforms decoded response.
+
+        :return: JSON of transformed response and its tags.
+        """
+
+        with timing.stage('tags'):
+            tags = invalidation.content_tags(url, query, content)
+
+        for transformation in self.pipeline:
+            with timing.stage(getattr(transformation, '__name__', type(transformation).__name__)):
                 transformation(content)
 
-            content = json.dumps(content)
+        with timing.stage('encode'):
+            return json_codec.dumps(content), tags
+
+    def _store(self, memcache_key, content, tags, status_code=200):
+        """
+        Stores transformed response in memcache and instance memory.
+
+        :rtype: CachedResponse
+        """
+
+        with timing.stage('etag'):
+            etag = hashlib.md5(content).hexdigest()
+
+        variants = {}
+        if len(content) >= self.PRECOMPRESS_MIN_SIZE:
+            with timing.stage('compress'):
+                variants = content_encodings.compress(content, self.PRECOMPRESSED_ENCODINGS)
 
         response = CachedResponse(
             content=content,
-            status_code=response.status_code
+            status_code=status_code,
+            etag=etag,
+            variants=variants,
         )
 
+        cached = {
+            'content': content,
+            'etag': etag,
+            'encodings': [],
+            'expires': time.time() + self.CACHE_TTL,
+        }
+
+        expiration = self.CACHE_TTL + self.CACHE_STALE_TTL
         try:
-            memcache.set(
-                memcache_key,
-                content,
-                time=self.CACHE_TTL
-            )
+            with timing.stage('store'):
+                # Variants are stored before content, so readers never miss them, and are not compressed again
+                for encoding, variant in variants.iteritems():
+                    variant_key = self.variant_key(memcache_key, etag, encoding)
+                    if self.storage.set(variant_key, variant, time=expiration, compress=False):
+                        cached['encodings'].append(encoding)
+
+                if self.storage.set(memcache_key, cached, time=expiration):
+                    self.dependencies.record(memcache_key, tags, time=expiration)
         except ValueError as ex:
             logging.exception(ex)
             logging.error("Failed to cache contentful response")
 
+        self._cache_locally(memcache_key, cached, variants)
+
         return response
 
+    def _cache_locally(self, memcache_key, cached, variants=None):
+        """
+        Stores fresh entry (and its compressed variants) in instance memory,
+        stale entries are served from memcache only.
+        """
+
+        ttl = self.LOCAL_CACHE_TTL
+        if cached['expires'] is not None:
+            ttl = min(ttl, cached['expires'] - time.time())
+
+        if ttl > 0:
+            self.LOCAL_CACHE.set(memcache_key, cached, size=len(cached['content']), ttl=ttl)
+            for encoding in cached.get('encodings', ()):
+                variant = (variants or {}).get(encoding)
+                if variant is not None:
+                    variant_key = self.variant_key(memcache_key, cached['etag'], encoding)
+                    self.LOCAL_CACHE.set(variant_key, variant, size=len(variant), ttl=ttl)
+
+    def _schedule_revalidation(self, memcache_key, url, query):
+        """
+        Schedules single background refresh of stale entry.
+
+        Refresh holds the fetch lease of the key, so only one task is enqueued
+        per key and concurrent misses wait for its result.
+        """
+
+        token = self.SINGLE_FLIGHT.acquire(memcache_key, ttl=self.REVALIDATE_LOCK_TTL)
+        if token is None:
+            return
+
+        try:
+            deferred.defer(
+                revalidate, type(self), self.space_id, self.access_token, self.environment,
+                self.CONTENT_TRANSFORMATIONS, memcache_key, url, dict(query), token,
+                _queue=self.REVALIDATE_QUEUE
+            )
+        except Exception as ex:  # Serving stale content must not fail on task queue errors
+            logging.exception(ex)
+            logging.error("Failed to schedule revalidation of {}".format(memcache_key))
+            self.SINGLE_FLIGHT.release(memcache_key, token)
+
+    def _revalidate(self, memcache_key, url, query, token):
+        """
+        Refreshes stale entry and releases its fetch lease.
+        """
+
+        try:
+            self._fetch(memcache_key, url, query)
+        finally:
+            self.SINGLE_FLIGHT.release(memcache_key, token)
+
+    def invalidate(self, payload):
+        """
+        Deletes cached responses affected by Contentful webhook event.
+
+        Responses cached in memory of other instances expire within `LOCAL_CACHE_TTL`.
+
+        :param payload: Webhook payload (entry, asset or content type).
+        :return: Deleted cache keys.
+        :rtype: set
+        """
+
+        memcache_keys = self.dependencies.purge(invalidation.event_tags(payload))
+
+        for memcache_key in memcache_keys:
+            self.LOCAL_CACHE.delete(memcache_key)
+
+        return memcache_keys
+
     def root_endpoint(self, query):
         return super(Client, self)._get('/', query)
+
+
+def revalidate(client_class, space_id, access_token, environment, transformations, memcache_key, url, query, token):
+    """
+    Refreshes stale entry, runs as deferred task.
+
+    Client is rebuilt from its arguments instead of being pickled with the task,
+    transformations must be picklable (see `content_type_definitions`).
+    """
+
+    client = client_class(
+        space_id,
+        access_token,
+        environment=environment,
+        content_type_cache=False,
+        transformations=transformations,
+    )
+    client._revalidate(memcache_key, url, query, token)
+
+
+def content_type_definitions(space_id, access_token, environment='master'):
+    """
+    Returns raw definitions of all content types of the space environment.
+
+    Bind arguments with `functools.partial` to pass it as `content_types` of
+    `transformations.FlattenFields`, unlike bound method of a client or handler
+    it can be pickled with the transformations of deferred revalidation.
+
+    :rtype: list
+    """
+
+    client = Client(space_id, access_token, environment=environment, content_type_cache=False, transformations=[])
+    return client.content_type_definitions()
@@ -0,0 +1,58 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses are precompressed with gzip only
+    brotli = None
+
+
+def gzip_compress(data, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data):
+    return brotli.compress(data, mode=brotli.MODE_TEXT)
+
+
+ENCODERS = {
+    'gzip': gzip_compress,
+}
+if brotli is not None:
+    ENCODERS['br'] = brotli_compress
+
+
+def compress(content, encodings):
+    """
+    Returns variants of content compressed with available encodings.
+
+    :param encodings: Content-Encoding names, e.g. ('br', 'gzip').
+    :rtype: dict
+    """
+
+    return {
+        encoding: ENCODERS[encoding](content)
+        for encoding in encodings
+        if encoding in ENCODERS
+    }
@@ -0,0 +1,205 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import logging
+
+from google.appengine.api import memcache
+
+COLLECTIONS = frozenset((
+    'entries',
+    'assets',
+    'content_types',
+))
+
+
+def id_tag(entity_id):
+    return u'id:{}'.format(entity_id)
+
+
+def collection_tag(collection, content_type=None):
+    return u'collection:{}:{}'.format(collection, content_type or '*')
+
+
+def content_tags(url, query, content=None):
+    """
+    Returns tags of response: IDs of all entries and assets it contains or links
+    (including resolved includes), IDs of content types it contains and collection it queries.
+
+    :param url: Requested Contentful url.
+    :param query: Request query.
+    :param content: Decoded (not transformed) response.
+    :rtype: set
+    """
+
+    tags = set()
+
+    collection = url.rstrip('/').rsplit('/', 1)[-1]
+    if 'sys.id' in query:
+        tags.add(id_tag(query['sys.id']))
+    elif collection in COLLECTIONS:
+        tags.add(collection_tag(collection, query.get('content_type')))
+
+    stack = [content]
+    while stack:
+        obj = stack.pop()
+
+        if isinstance(obj, dict):
+            try:
+                sys = obj['sys']
+                if sys['type'] in ('Entry', 'Asset', 'ContentType') or sys.get('linkType') in ('Entry', 'Asset'):
+                    tags.add(id_tag(sys['id']))
+            except (TypeError, KeyError, AttributeError):
+                pass
+
+            stack.extend(obj.itervalues())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+
+    return tags
+
+
+def event_tags(payload):
+    """
+    Returns tags of cached responses affected by Contentful webhook event
+    (publish, unpublish or delete of entry, asset or content type).
+
+    :rtype: set
+    """
+
+    sys = payload['sys']
+    entity_type = sys['type'].replace('Deleted', '', 1)
+
+    tags = {id_tag(sys['id'])}
+
+    if entity_type == 'Entry':
+        tags.add(collection_tag('entries'))
+        try:
+            tags.add(collection_tag('entries', sys['contentType']['sys']['id']))
+        except (TypeError, KeyError):
+            pass
+    elif entity_type == 'Asset':
+        tags.add(collection_tag('assets'))
+    elif entity_type == 'ContentType':
+        tags.add(collection_tag('content_types'))
+        tags.add(collection_tag('entries'))
+        tags.add(collection_tag('entries', sys['id']))
+
+    return tags
+
+
+class DependencyIndex(object):
+    """
+    Reverse index from tags (see `content_tags`) to cache keys of responses.
+
+    Index is stored in memcache, concurrent updates are resolved with compare-and-set.
+    Keys of a tag are split to shards of `MAX_KEYS`, so no key is dropped from the index.
+    """
+
+    MAX_KEYS = 1000  # per shard of tag index, further keys are recorded in next shards
+    SHARDS_PER_READ = 8
+    CAS_RETRIES = 3
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    def index_key(self, tag, shard=0):
+        index_key = u'contentful:index:{}:{}'.format(self.namespace, tag)
+        if shard:
+            return u'{}:{}'.format(index_key, shard)
+        return index_key
+
+    def record(self, cache_key, tags, time=0):
+        """
+        Records cache key under all tags.
+
+        Key is added to the first shard of tag index which is not full. Preceding
+        full shards are written as well, so they do not expire before it.
+
+        :param time: Expiration of index, it should outlive cached responses.
+        """
+
+        client = memcache.Client()
+        pending = {self.index_key(tag): (tag, 0) for tag in tags}
+        attempts = 0
+
+        while pending and attempts < self.CAS_RETRIES:
+            existing = client.get_multi(list(pending), for_cas=True)
+
+            missing = {}
+            updates = {}
+            next_shards = {}
+            for index_key, (tag, shard) in pending.iteritems():
+                keys = existing.get(index_key)
+                if keys is None:
+                    missing[index_key] = [cache_key]
+                elif cache_key in keys or len(keys) < self.MAX_KEYS:
+                    # Known keys are written as well to extend expiration of the index
+                    updates[index_key] = keys if cache_key in keys else keys + [cache_key]
+                else:
+                    updates[index_key] = keys
+                    next_shards[self.index_key(tag, shard + 1)] = (tag, shard + 1)
+
+            failed = set()
+            if missing:
+                failed.update(client.add_multi(missing, time=time))
+            if updates:
+                failed.update(client.cas_multi(updates, time=time))
+
+            if failed:
+                attempts += 1
+
+            next_shards.update((index_key, pending[index_key]) for index_key in failed)
+            pending = next_shards
+
+        if pending:
+            logging.warning("Failed to index {} under {}".format(cache_key, list(pending)))
+
+    def purge(self, tags):
+        """
+        Deletes all cache keys recorded under tags.
+
+        :return: Deleted cache keys.
+        :rtype: set
+        """
+
+        cache_keys = set()
+        index_keys = []
+        tags = list(tags)
+        first = 0
+
+        while tags:
+            shards = range(first, first + self.SHARDS_PER_READ)
+            indexes = memcache.get_multi([self.index_key(tag, shard) for tag in tags for shard in shards])
+            for keys in indexes.itervalues():
+                cache_keys.update(keys)
+            index_keys.extend(indexes)
+
+            # Tags with the last read shard present have more shards
+            tags = [tag for tag in tags if self.index_key(tag, shards[-1]) in indexes]
+            first += self.SHARDS_PER_READ
+
+        if cache_keys:
+            memcache.delete_multi(list(cache_keys))
+
+        if index_keys:
+            memcache.delete_multi(index_keys)
+
+        return cache_keys
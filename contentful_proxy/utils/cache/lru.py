@@ -0,0 +1,132 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """
+    Process-local, thread-safe LRU cache bounded by size of stored values.
+
+    Every value expires after its TTL. Values bigger than the whole cache are not stored.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        """
+        :param max_bytes: Maximum total size of stored values.
+        :param ttl: Default time to live of values in seconds.
+        """
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._lock = threading.Lock()
+        self._values = collections.OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, size, expires = self._values.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires <= time.time():
+                self.size -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._values[key] = (value, size, expires)  # mark as most recently used
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value, size=None, ttl=None):
+        """
+        Stores value in cache.
+
+        :param size: Size of value in bytes, length of value is used by default.
+        :param ttl: Time to live in seconds, overrides default TTL.
+        :return: True if value has been stored.
+        """
+
+        if size is None:
+            size = len(value)
+
+        if size > self.max_bytes:
+            return False
+
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._remove(key)
+
+            self._values[key] = (value, size, expires)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._values.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        try:
+            _, size, _ = self._values.pop(key)
+        except KeyError:
+            pass
+        else:
+            self.size -= size
+
+    def stats(self):
+        """
+        :return: Counters of the cache.
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {
+                'items': len(self._values),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,95 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import threading
+
+
+class Prefetch(object):
+    """
+    Calls function in background thread, `result` waits for it and re-raises its error.
+    """
+
+    def __init__(self, function, *args):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(function,) + args)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, function, *args):
+        try:
+            self._result = function(*args)
+        except Exception:
+            self._error = sys.exc_info()
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+        return self._result
+
+
+class PageIterator(object):
+    """
+    Iterates items of all pages of a collection.
+
+    Next page is fetched in background while items of the current one are consumed,
+    so at most two pages are held in memory. `total` is taken from the first page.
+    """
+
+    def __init__(self, fetch_page, page_size=100):
+        """
+        :param fetch_page: Function of skip and limit which returns (transformed) page.
+        """
+
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self._first_page = None
+
+    @property
+    def first_page(self):
+        if self._first_page is None:
+            self._first_page = self.fetch_page(0, self.page_size)
+        return self._first_page
+
+    @property
+    def total(self):
+        return self.first_page.get('total')
+
+    def __iter__(self):
+        page, skip = self.first_page, 0
+
+        while True:
+            items = page.get('items') or []
+            skip += self.page_size
+
+            prefetch = None
+            if len(items) >= self.page_size and (self.total is None or skip < self.total):
+                prefetch = Prefetch(self.fetch_page, skip, self.page_size)
+
+            for item in items:
+                yield item
+
+            if prefetch is None:
+                return
+
+            page = prefetch.result()
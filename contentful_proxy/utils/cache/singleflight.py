@@ -0,0 +1,144 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import contextlib
+import logging
+import threading
+import time
+import uuid
+
+from google.appengine.api import memcache
+
+
+class KeyLocks(object):
+    """
+    In-process locks, one per key.
+
+    Locks are removed when no thread holds or waits for them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    @contextlib.contextmanager
+    def __call__(self, key):
+        with self._lock:
+            lock, waiters = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, waiters + 1)
+
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiters = self._locks[key]
+                if waiters == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, waiters - 1)
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent cache misses of the same key.
+
+    Threads of one instance are serialized by in-process lock, instances
+    compete for lease in memcache (`memcache.add`). Only lease holder fetches
+    the value, others wait until the value appears in cache.
+    """
+
+    LEASE_TTL = 10  # seconds, lease expires if its holder dies
+    WAIT_TIMEOUT = 3  # seconds, waiter fetches value on its own afterwards
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self.locks = KeyLocks()
+
+    @staticmethod
+    def lease_key(key):
+        return u'{}:lease'.format(key)
+
+    def acquire(self, key, ttl=None):
+        """
+        Acquires cross-instance lease.
+
+        :return: Lease token or None when lease is held by someone else.
+        """
+
+        token = uuid.uuid4().hex
+        if memcache.add(self.lease_key(key), token, time=ttl or self.LEASE_TTL):
+            return token
+
+        return None
+
+    def release(self, key, token):
+        """
+        Releases lease if it is still held by the token.
+        """
+
+        lease_key = self.lease_key(key)
+
+        # Expired lease could have been taken over in the meantime
+        if memcache.get(lease_key) == token:
+            memcache.delete(lease_key)
+
+    def is_leased(self, key):
+        return memcache.get(self.lease_key(key)) is not None
+
+    def do(self, key, fetch, lookup):
+        """
+        Returns value of the key, fetching it at most once at a time.
+
+        :param key: Cache key.
+        :param fetch: Callable which fetches the value and stores it in cache.
+        :param lookup: Callable which returns cached value or None.
+        """
+
+        with self.locks(key):
+            value = lookup()
+            if value is not None:
+                return value
+
+            token = self.acquire(key)
+            if token is not None:
+                try:
+                    return fetch()
+                finally:
+                    self.release(key, token)
+
+            deadline = time.time() + self.WAIT_TIMEOUT
+            while time.time() < deadline:
+                time.sleep(self.POLL_INTERVAL)
+
+                value = lookup()
+                if value is not None:
+                    return value
+
+                if not self.is_leased(key):
+                    # Lease holder failed, there is nothing to wait for
+                    break
+
+            logging.warning("Fetching {} without lease".format(key))
+
+            return fetch()
@@ -0,0 +1,143 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import cPickle as pickle
+import hashlib
+import logging
+import zlib
+
+from google.appengine.api import memcache
+
+
+class MemcacheStorage(object):
+    """
+    Stores values in memcache compressed with zlib, data which is compressed already
+    (e.g. gzip variant of content) can be stored as it is.
+
+    Values which are bigger than memcache value limit even after compression are
+    split into chunks. Chunk keys contain digest of the whole value, so chunks of
+    different versions of a value are never mixed up, and the digest is verified
+    when chunks are joined.
+    """
+
+    CHUNK_SIZE = 950 * 1000  # memcache limits values to 1 MB including its metadata
+
+    def __init__(self, compression_level=6, chunk_size=CHUNK_SIZE):
+        self.compression_level = compression_level
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def chunk_key(key, digest, index):
+        return u'{}:chunk:{}:{}'.format(key, digest, index)
+
+    def encode(self, value):
+        return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.compression_level)
+
+    @staticmethod
+    def decode(data):
+        return pickle.loads(zlib.decompress(data))
+
+    def set(self, key, value, time=0, compress=True):
+        """
+        :param compress: False stores value (str) as it is, it is not worth compressing it again.
+        :return: True if value has been stored.
+        """
+
+        storage = 'zlib' if compress else 'raw'
+        data = self.encode(value) if compress else value
+
+        if len(data) <= self.chunk_size:
+            return memcache.set(key, {'storage': storage, 'data': data}, time=time)
+
+        digest = hashlib.md5(data).hexdigest()
+        chunks = {
+            self.chunk_key(key, digest, index): data[offset:offset + self.chunk_size]
+            for index, offset in enumerate(xrange(0, len(data), self.chunk_size))
+        }
+
+        # Chunks are stored before the head, so readers never see incomplete value
+        if memcache.set_multi(chunks, time=time):
+            logging.error("Failed to store chunks of {}".format(key))
+            return False
+
+        return memcache.set(
+            key,
+            {'storage': storage + '-chunked', 'digest': digest, 'chunks': len(chunks)},
+            time=time
+        )
+
+    def get(self, key):
+        """
+        :return: Stored value or None if value is missing or broken.
+        """
+
+        return self._value(key, memcache.get(key))
+
+    def get_multi(self, keys):
+        """
+        Gets values of all keys in one memcache round trip, chunked values need one more each.
+
+        :return: Dict of stored values by key, missing or broken values are left out.
+        :rtype: dict
+        """
+
+        heads = memcache.get_multi(keys)
+
+        values = {}
+        for key, head in heads.items():
+            value = self._value(key, head)
+            if value is not None:
+                values[key] = value
+
+        return values
+
+    def _value(self, key, head):
+        if not isinstance(head, dict) or 'storage' not in head:
+            return head  # value stored directly in memcache
+
+        if head['storage'] == 'zlib':
+            return self.decode(head['data'])
+        if head['storage'] == 'raw':
+            return head['data']
+
+        chunk_keys = [self.chunk_key(key, head['digest'], index) for index in xrange(head['chunks'])]
+        chunks = memcache.get_multi(chunk_keys)
+
+        if len(chunks) != len(chunk_keys):
+            logging.warning("Chunks of {} were evicted".format(key))
+            return None
+
+        data = ''.join(chunks[chunk_key] for chunk_key in chunk_keys)
+
+        if hashlib.md5(data).hexdigest() != head['digest']:
+            logging.error("Chunks of {} are corrupted".format(key))
+            return None
+
+        if head['storage'] == 'raw-chunked':
+            return data
+        return self.decode(data)
+
+    def delete(self, key):
+        """
+        Deletes value, its chunks expire on their own.
+        """
+
+        return memcache.delete(key)
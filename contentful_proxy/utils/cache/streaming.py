@@ -0,0 +1,181 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import decimal
+import io
+import logging
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # ijson is optional, without it the whole response is decoded at once
+    ijson = None
+
+from contentful_proxy.utils import json_codec
+
+from . import transformations
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def accepts(pipeline):
+    """
+    Checks that pipeline (see `transformations.compile_pipeline`) can transform response item by item.
+    """
+
+    return len(pipeline) == 1 and isinstance(pipeline[0], transformations.FusedPipeline)
+
+
+def _events(data):
+    try:
+        for prefix, event, value in ijson.parse(io.BytesIO(data)):
+            if isinstance(value, decimal.Decimal):
+                value = float(value)
+            yield prefix, event, value
+    except ijson.JSONError as ex:
+        raise DecodeError(ex)
+
+
+def _members(data):
+    """
+    Builds top-level members of response except items in first pass over data.
+
+    :return: Members and whether response has items.
+    """
+
+    members = {}
+    has_items = False
+    key = builder = None
+
+    for prefix, event, value in _events(data):
+        if prefix == '':
+            if event == 'map_key':
+                key = value
+                has_items = has_items or key == 'items'
+                builder = None if key == 'items' else ObjectBuilder()
+            continue
+
+        if builder is not None:
+            builder.event(event, value)
+            if key not in members:
+                members[key] = builder.value
+
+    return members, has_items
+
+
+def _items(data):
+    """
+    Builds items of response one by one in second pass over data.
+    """
+
+    builder = None
+
+    for prefix, event, value in _events(data):
+        if prefix == 'items.item' and event == 'start_map':
+            builder = ObjectBuilder()
+
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == 'items.item' and event == 'end_map':
+                yield builder.value
+                builder = None
+
+
+def _consume(items):
+    items.reverse()
+    while items:
+        yield items.pop()
+
+
+def parse(data):
+    """
+    Returns top-level members of response (without items) and iterator of its items (None if
+    response has no items). Decoded items are not referenced after they are yielded.
+    """
+
+    if ijson is not None:
+        members, has_items = _members(data)
+        return members, _items(data) if has_items else None
+
+    logging.warning("ijson is not installed, response of {} bytes is decoded at once".format(len(data)))
+    try:
+        content = json_codec.loads(data)
+    except ValueError as ex:
+        raise DecodeError(ex)
+
+    if not isinstance(content, dict) or 'items' not in content:
+        return content, None
+
+    return content, _consume(content.pop('items'))
+
+
+def iter_transformed(data, pipeline, observe=None):
+    """
+    Yields JSON of response transformed by fused pipeline in chunks.
+
+    Includes are decoded and indexed first, items are decoded, transformed and encoded
+    one at a time, so the whole decoded response is never held in memory (with ijson).
+
+    :param pipeline: `transformations.FusedPipeline`
+    :param observe: Called with top-level members and every decoded item before it is transformed.
+    """
+
+    members, items = parse(data)
+    if observe is not None:
+        observe(members)
+
+    if items is None:
+        # Not a collection, there is nothing to stream
+        pipeline(members)
+        yield json_codec.dumps(members)
+        return
+
+    if 'includes' in members:
+        includes, memo = pipeline.index(members['includes'])
+    else:
+        includes, memo = None, None
+
+    yield '{"items": ['
+    for i, item in enumerate(items):
+        if observe is not None:
+            observe(item)
+        if i:
+            yield ', '
+        yield json_codec.dumps(pipeline.transform_item(item, includes, memo))
+    yield ']'
+
+    pipeline.finish(members)
+    for key, value in members.iteritems():
+        yield ', {}: {}'.format(json_codec.dumps(key), json_codec.dumps(value))
+    yield '}'
+
+
+def transform(data, pipeline, observe=None):
+    """
+    Returns JSON of response transformed by fused pipeline, see `iter_transformed`.
+
+    :raises DecodeError: Response is not JSON.
+    :rtype: str
+    """
+
+    return ''.join(iter_transformed(data, pipeline, observe))
@@ -20,11 +20,65 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import collections
+import hashlib
 import logging
+import time
 import urlparse
 
+from contentful_proxy.utils import timing
 
-class ReplaceAssetLinks(object):
+
+class Transformation(object):
+    """
+    Base class of content transformations.
+
+    Fingerprint identifies transformation in cache keys. It is built from class name,
+    `VERSION` and instance parameters, bump `VERSION` whenever output of the
+    transformation changes.
+    """
+
+    VERSION = 1
+
+    @property
+    def fingerprint_params(self):
+        return self.__dict__
+
+    @property
+    def fingerprint(self):
+        return u'{}:{}({})'.format(
+            self.__class__.__name__,
+            self.VERSION,
+            u','.join(
+                u'{}={}'.format(key, value)
+                for key, value in sorted(self.fingerprint_params.items())
+            )
+        )
+
+    def __call__(self, content):
+        raise NotImplementedError()
+
+
+def fingerprint(transformations):
+    """
+    Returns stable hash of transformation pipeline.
+
+    Callables which are not `Transformation` are identified by their name.
+    """
+
+    fingerprints = []
+    for transformation in transformations:
+        try:
+            fingerprints.append(transformation.fingerprint)
+        except AttributeError:
+            fingerprints.append(u'{}.{}'.format(
+                transformation.__module__,
+                getattr(transformation, '__name__', transformation.__class__.__name__)
+            ))
+
+    return hashlib.md5(u'|'.join(fingerprints).encode('utf-8')).hexdigest()
+
+
+class ReplaceAssetLinks(Transformation):
 
     def __init__(self, proxy_hostname):
         self.proxy_hostname = proxy_hostname
@@ -39,33 +93,109 @@ class ReplaceAssetLinks(object):
         )
         return proxy_url
 
+    def transform_asset(self, asset):
+        asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+
     def __call__(self, content):
         try:
             for asset in content['includes']['Asset']:
-                asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+                self.transform_asset(asset)
         except (TypeError, KeyError):
             pass
 
         try:
             for asset in content['items']:
                 if asset['sys']['type'] == 'Asset':
-                    asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+                    self.transform_asset(asset)
         except (TypeError, KeyError):
             pass
 
 
-class ResolveIncludes(object):
+def parse_projection(fields):
+    """
+    Parses comma separated field paths (e.g. `title,author.name`) into projection tree.
+
+    Leaf of the tree is empty dict and keeps the whole field, parent path wins over
+    its nested paths.
+
+    :return: Dict of field names to projections of their values or None if there are no paths.
+    """
+
+    if not fields:
+        return None
+
+    paths = sorted(
+        set(tuple(path.strip().split('.')) for path in fields.split(',') if path.strip()),
+        key=len
+    )
+
+    projection = {}
+    for path in paths:
+        node = projection
+        for name in path[:-1]:
+            if node.get(name) == {}:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node.setdefault(path[-1], {})
+
+    return projection or None
+
+
+def projection_paths(projection):
+    """
+    :return: Sorted field paths of projection tree.
+    """
+
+    paths = []
+    for name, nested in (projection or {}).items():
+        if nested:
+            paths.extend(u'{}.{}'.format(name, path) for path in projection_paths(nested))
+        else:
+            paths.append(name)
+
+    return sorted(paths)
+
+
+def projection_select(projection):
+    """
+    Returns Contentful `select` of fields referenced by projection.
+
+    Contentful selects top level fields only, nested paths are pruned by `ResolveIncludes`.
+    """
+
+    return u','.join(u'fields.{}'.format(name) for name in sorted(projection))
+
+
+class ResolveIncludes(Transformation):
     """
     Replace all Contentful link types with data from includes.
+
+    Every included item is resolved once and shared by all links to it. Links closing
+    a cycle and links nested deeper than `max_depth` are kept unresolved.
+
+    Fields of items and linked entries are pruned to `projection` (see `parse_projection`)
+    when it is given.
     """
 
-    def __call__(self, content):
-        try:
-            # Do not modify content if it does not contain includes and items
-            unmodified_includes = content['includes']
-            unmodified_items = content['items']
-        except KeyError:
-            return content
+    VERSION = 2
+
+    def __init__(self, max_depth=None, projection=None):
+        self.max_depth = max_depth
+        self.projection = parse_projection(projection)
+
+    @property
+    def fingerprint_params(self):
+        return {
+            'max_depth': self.max_depth,
+            'projection': u','.join(projection_paths(self.projection)) or None,
+        }
+
+    @staticmethod
+    def index_includes(unmodified_includes):
+        """
+        :return: Fields of included items by link type and ID.
+        """
 
         includes = collections.defaultdict(dict)
 
@@ -73,33 +203,148 @@ class ResolveIncludes(object):
             for value in values:
                 includes[key][value['sys']['id']] = value['fields']
 
-        def transform_content(obj):
-            if isinstance(obj, dict):
-                try:
-                    if not obj['sys']['type'] == 'Link' or not obj['sys']['linkType'] in ['Asset', 'Entry']:
-                        raise TypeError
-                except (TypeError, KeyError):
-                    pass
+        return includes
+
+    @staticmethod
+    def link(obj):
+        """
+        :return: Link type and ID if object is link to an entry or asset, None otherwise.
+        """
+
+        try:
+            if obj['sys']['type'] == 'Link' and obj['sys']['linkType'] in ('Asset', 'Entry'):
+                return obj['sys']['linkType'], obj['sys']['id']
+        except (TypeError, KeyError):
+            pass
+
+        return None
+
+    def resolve(self, obj, includes, memo=None, projection=None):
+        """
+        Returns copy of object with links replaced by included items.
+
+        Resolved items are stored in `memo`, pass the same dict to share them between calls.
+        An item with links cut below it (by a cycle or `max_depth`) depends on the links
+        above it, its copy is shared only by links reached through the same path.
+        `projection` prunes keys of the object (and of items linked from them), unresolved
+        links (and links to items missing in includes) are kept whole.
+        """
+
+        if memo is None:
+            memo = {}
+
+        root = {}
+        stack = [(root, None, obj, 0, frozenset(), projection)]
+        frames = []  # [memo key, path memo key, cut] of items being resolved, innermost last
+
+        while stack:
+            parent, key, value, depth, path, projection = stack.pop()
+
+            if parent is None:
+                # Every link below the item is resolved
+                memo_key, path_key, cut = frames.pop()
+                if cut:
+                    memo[path_key] = memo.pop(memo_key)
+                    if frames:
+                        frames[-1][2] = True
+                continue
+
+            if isinstance(value, dict):
+                link = self.link(value)
+                resolved = link is not None and link[1] in includes[link[0]]
+                if resolved and (link in path or (self.max_depth is not None and depth >= self.max_depth)):
+                    if frames:
+                        frames[-1][2] = True
+                    resolved = False
+
+                if resolved:
+                    projection_id = id(projection) if projection is not None else None
+                    memo_key = (link, depth if self.max_depth is not None else None, projection_id)
+                    path_key = (link, path, projection_id)
+                    if memo_key in memo:
+                        parent[key] = memo[memo_key]
+                        continue
+                    if path_key in memo:
+                        if frames:
+                            frames[-1][2] = True
+                        parent[key] = memo[path_key]
+                        continue
+
+                    link_type, obj_id = link
+                    value = includes[link_type][obj_id]
+                    value['id'] = obj_id
+
+                    keys = value if projection is None else [
+                        name for name in value if name in projection or name == 'id'
+                    ]
+                    copy = memo[memo_key] = dict.fromkeys(keys)
+                    frames.append([memo_key, path_key, False])
+                    stack.append((None, None, None, depth, path, None))
+                    depth += 1
+                    path = path | {link}
                 else:
-                    obj_id = obj['sys']['id']
-                    obj = includes[obj['sys']['linkType']][obj_id]
-                    obj['id'] = obj_id
-
-                return {
-                    key: transform_content(value)
-                    for key, value in obj.items()
-                }
-            elif isinstance(obj, list):
-                return [transform_content(element) for element in obj]
+                    if link is not None:
+                        projection = None
+
+                    keys = value if projection is None else [name for name in value if name in projection]
+                    copy = dict.fromkeys(keys)
+
+                parent[key] = copy
+                stack.extend(
+                    (copy, child_key, value[child_key], depth, path, (projection or {}).get(child_key) or None)
+                    for child_key in copy
+                )
+            elif isinstance(value, list):
+                copy = parent[key] = [None] * len(value)
+                stack.extend((copy, index, child, depth, path, projection) for index, child in enumerate(value))
             else:
-                return obj
+                parent[key] = value
+
+        return root[None]
+
+    def resolve_item(self, item, includes, memo=None):
+        """
+        Returns copy of item with links resolved and fields pruned to projection.
+
+        Items of response without includes (passed as None) are only pruned.
+        """
+
+        fields = item.get('fields') if isinstance(item, dict) else None
+        if self.projection is None or not isinstance(fields, dict):
+            return item if includes is None else self.resolve(item, includes, memo)
+
+        if includes is None:
+            item = dict(item)
+            item['fields'] = {name: value for name, value in fields.items() if name in self.projection}
+            return item
 
-        content['items'] = transform_content(unmodified_items)
+        resolved = self.resolve({name: value for name, value in item.items() if name != 'fields'}, includes, memo)
+        resolved['fields'] = self.resolve(fields, includes, memo, self.projection)
+        return resolved
+
+    def __call__(self, content):
+        try:
+            unmodified_items = content['items']
+        except KeyError:
+            return content
+
+        # Do not modify content if it does not contain includes and there is nothing to prune
+        unmodified_includes = content.get('includes')
+        if unmodified_includes is None and self.projection is None:
+            return content
+
+        if self.projection is None:
+            content['items'] = self.resolve(unmodified_items, self.index_includes(unmodified_includes))
+            return content
+
+        includes = None if unmodified_includes is None else self.index_includes(unmodified_includes)
+        memo = {}
+        content['items'] = [self.resolve_item(item, includes, memo) for item in unmodified_items]
 
         return content
 
 
-class RemoveIncludes(object):
+class RemoveIncludes(Transformation):
     """
     Remove includes array from response.
     """
@@ -111,7 +356,7 @@ class RemoveIncludes(object):
             return content
 
 
-class RemoveRootSys(object):
+class RemoveRootSys(Transformation):
     def __call__(self, content):
         try:
             del content['sys']
@@ -119,7 +364,127 @@ class RemoveRootSys(object):
             return content
 
 
-class FlattenFields(object):
+class FlattenFields(Transformation):
+    """
+    Flattens fields of items to plain values.
+
+    Without content types the kind of every field is guessed from its value. With
+    content types (list of definitions or callable returning it, loaded on first use)
+    fields are flattened by plan built from their definitions, fields missing from
+    the plan fall back to guessing.
+    """
+
+    SCALAR_TYPES = ('Symbol', 'Text', 'Integer', 'Number', 'Boolean', 'Date', 'Location', 'RichText')
+
+    def __init__(self, content_types=None):
+        self.content_types = content_types
+        self._plans = None
+
+    @property
+    def fingerprint_params(self):
+        return {'schema': self.content_types is not None}
+
+    def __getstate__(self):
+        # Plans hold closures, they are rebuilt after unpickling
+        state = self.__dict__.copy()
+        state['_plans'] = None
+        return state
+
+    @property
+    def plans(self):
+        """
+        :return: Flattener of every field by content type ID and field ID.
+        """
+
+        if self._plans is None:
+            content_types = self.content_types
+            if callable(content_types):
+                try:
+                    content_types = content_types()
+                except Exception as ex:  # Guessing still works without content types
+                    logging.exception(ex)
+                    content_types = None
+
+            self._plans = {
+                content_type['sys']['id']: self.plan(content_type)
+                for content_type in content_types or []
+            }
+
+        return self._plans
+
+    @classmethod
+    def plan(cls, content_type):
+        """
+        :return: Flattener of every field of content type definition.
+        """
+
+        return {
+            field['id']: cls.field_flattener(field)
+            for field in content_type.get('fields', [])
+        }
+
+    @classmethod
+    def field_flattener(cls, field):
+        field_type = field.get('type')
+        link_type = field.get('linkType')
+        if field_type == 'Array':
+            field_type = field.get('items', {}).get('type')
+            link_type = field.get('items', {}).get('linkType')
+            if field_type == 'Symbol':
+                return list
+            if field_type == 'Link' and link_type == 'Asset':
+                return cls.flatten_assets
+        elif field_type in cls.SCALAR_TYPES:
+            return cls._flatten_scalar
+        elif field_type == 'Link' and link_type == 'Asset':
+            return cls.flatten_asset
+
+        return cls.flatten_field
+
+    @staticmethod
+    def _flatten_scalar(field_value):
+        return field_value
+
+    @classmethod
+    def flatten_asset(cls, field_value):
+        """
+        Flattens linked asset to image or url of its file.
+        """
+
+        asset_file = field_value.get('file') if isinstance(field_value, dict) else None
+        if not isinstance(asset_file, dict) or 'url' not in asset_file:
+            return cls.flatten_field(field_value)
+
+        image = (asset_file.get('details') or {}).get('image') or {}
+        if 'width' not in image or 'height' not in image:
+            return asset_file['url']
+
+        value = {
+            'url': asset_file['url'],
+            'width': image['width'],
+            'height': image['height'],
+        }
+        if 'title' in field_value:
+            value['title'] = field_value['title']
+
+        return value
+
+    @classmethod
+    def flatten_assets(cls, field_value):
+        """
+        Flattens list of linked assets, lists with unresolved links are guessed.
+        """
+
+        if not isinstance(field_value, list):
+            return cls.flatten_field(field_value)
+        if not field_value:
+            return []
+
+        asset_file = field_value[0].get('file') if isinstance(field_value[0], dict) else None
+        if not isinstance(asset_file, dict) or 'contentType' not in asset_file:
+            return cls.flatten_field(field_value)
+
+        return [cls.flatten_asset(value) for value in field_value]
 
     @classmethod
     def _flatten_image_field(cls, field_value):
@@ -223,10 +588,164 @@ class FlattenFields(object):
 
         return fields
 
+    def flatten_item(self, item):
+        """
+        Flattens fields of item by plan of its content type.
+        """
+
+        content_type_id = item['sys'].get('contentType', {}).get('sys', {}).get('id')
+        plan = self.plans.get(content_type_id)
+        if plan is None or not isinstance(item['fields'], dict):
+            return self.flatten_fields(item['fields'], item['sys']['id'])
+
+        fields = {
+            key: plan.get(key, self.flatten_field)(value)
+            for key, value in item['fields'].iteritems()
+            if value is not None
+        }
+        fields['id'] = item['sys']['id']
+
+        return fields
+
     def __call__(self, content):
         content['items'] = [
-            self.flatten_fields(entry['fields'], entry['sys']['id'])
+            self.flatten_item(entry)
             for entry in content.get('items', [])
         ]
 
         return content
+
+
+class FusedPipeline(Transformation):
+    """
+    Runs default transformations in a single pass over the response.
+
+    Asset links are replaced while includes are indexed, every item is resolved
+    (and flattened) right after it is read and includes and root sys are dropped
+    without touching the rest of the response. Output is identical to running
+    the transformations one by one.
+
+    It is not faster than running them one by one (see `benchmarks.transformations`),
+    clients use it to stream big responses item by item (see `streaming`) and only
+    with `FUSE_TRANSFORMATIONS` for the rest.
+
+    Time spent in every stage is recorded under its class name (see `timing`),
+    like when the transformations run one by one.
+    """
+
+    STAGES = (ReplaceAssetLinks, ResolveIncludes, FlattenFields, RemoveIncludes, RemoveRootSys)
+
+    def __init__(self, transformations):
+        self.transformations = list(transformations)
+
+        stages = {type(transformation): transformation for transformation in self.transformations}
+        self.replace_asset_links = stages.get(ReplaceAssetLinks)
+        self.resolve_includes = stages[ResolveIncludes]
+        self.flatten_fields = stages.get(FlattenFields)
+        self.remove_includes = RemoveIncludes in stages
+        self.remove_root_sys = RemoveRootSys in stages
+
+    @classmethod
+    def accepts(cls, transformations):
+        """
+        Checks that transformations are stages of the pipeline (in the same order)
+        including `ResolveIncludes`. Subclasses of stages are not fused.
+        """
+
+        stages = [type(transformation) for transformation in transformations]
+        if ResolveIncludes not in stages or not all(stage in cls.STAGES for stage in stages):
+            return False
+
+        positions = [cls.STAGES.index(stage) for stage in stages]
+        return positions == sorted(set(positions))
+
+    def _replace_asset_link(self, asset):
+        try:
+            self.replace_asset_links.transform_asset(asset)
+        except (TypeError, KeyError):
+            pass
+
+    def index(self, includes):
+        """
+        Replaces asset links of includes and returns index of includes and memo of resolved items.
+        """
+
+        recorder = timing.current()
+        started = time.time() if recorder is not None else None
+
+        if self.replace_asset_links is not None:
+            for asset in includes.get('Asset', []):
+                self._replace_asset_link(asset)
+            if recorder is not None:
+                started = recorder.lap('ReplaceAssetLinks', started)
+
+        includes = self.resolve_includes.index_includes(includes)
+        if recorder is not None:
+            recorder.lap('ResolveIncludes', started)
+
+        return includes, {}
+
+    def transform_item(self, item, includes, memo):
+        """
+        Transforms single item, response without includes is passed as None.
+        """
+
+        recorder = timing.current()
+        started = time.time() if recorder is not None else None
+
+        if self.replace_asset_links is not None and item.get('sys', {}).get('type') == 'Asset':
+            self._replace_asset_link(item)
+            if recorder is not None:
+                started = recorder.lap('ReplaceAssetLinks', started)
+
+        if includes is not None or self.resolve_includes.projection is not None:
+            item = self.resolve_includes.resolve_item(item, includes, memo)
+            if recorder is not None:
+                started = recorder.lap('ResolveIncludes', started)
+
+        if self.flatten_fields is not None:
+            item = self.flatten_fields.flatten_item(item)
+            if recorder is not None:
+                recorder.lap('FlattenFields', started)
+
+        return item
+
+    def finish(self, content):
+        """
+        Removes includes and root sys from (already transformed) response.
+        """
+
+        if self.remove_includes:
+            content.pop('includes', None)
+        if self.remove_root_sys:
+            content.pop('sys', None)
+
+    def __call__(self, content):
+        try:
+            unmodified_includes = content['includes']
+            unmodified_items = content['items']
+        except KeyError:
+            # Nothing to resolve, stages are cheap on their own
+            for transformation in self.transformations:
+                with timing.stage(type(transformation).__name__):
+                    transformation(content)
+            return content
+
+        includes, memo = self.index(unmodified_includes)
+        content['items'] = [self.transform_item(item, includes, memo) for item in unmodified_items]
+        self.finish(content)
+
+        return content
+
+
+def compile_pipeline(transformations):
+    """
+    Returns transformations fused into single pass when they form the default pipeline.
+
+    :rtype: list
+    """
+
+    if FusedPipeline.accepts(transformations):
+        return [FusedPipeline(transformations)]
+
+    return list(transformations)
@@ -19,12 +19,16 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import json
-
 import abc
+import logging
+import os
+import random
 
 import webapp2
 
+from contentful_proxy.utils import json_codec
+from contentful_proxy.utils import timing
+
 
 class CustomBaseHandler(webapp2.RequestHandler):
     __metaclass__ = abc.ABCMeta
@@ -32,7 +36,7 @@ class CustomBaseHandler(webapp2.RequestHandler):
     def json_response(self, data, status=200):
         self.response.headers['Content-Type'] = 'application/json'
         self.response.status_int = status
-        self.response.write(json.dumps(data))
+        self.response.write(json_codec.dumps(data))
 
 
 class CorsMixin(CustomBaseHandler):
@@ -70,14 +74,101 @@ class PublicCachingMixin(object):
         300,
         301,
         302,
+        304,
         307,
         410,
     ))
+    TIMING_HEADER = 'X-Server-Timing'  # requests with value "1" respond with Server-Timing header
+    _timing_sample_rate = (None, 0.0)  # raw CONTENTFUL_TIMING_SAMPLE_RATE and its parsed value
+
+    @property
+    def timing_sample_rate(self):
+        """
+        Share of requests which are timed regardless of `TIMING_HEADER`.
+
+        Environment variable is parsed once (again only when it changes), see `timing.parse_sample_rate`.
+        """
+
+        value = os.environ.get('CONTENTFUL_TIMING_SAMPLE_RATE', '0')
+        if PublicCachingMixin._timing_sample_rate[0] != value:
+            PublicCachingMixin._timing_sample_rate = (value, timing.parse_sample_rate(value))
+
+        return PublicCachingMixin._timing_sample_rate[1]
+
+    @property
+    def timing_enabled(self):
+        if self.request.headers.get(self.TIMING_HEADER) == '1':
+            return True
+
+        sample_rate = self.timing_sample_rate
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def content_encoding(self, variants):
+        """
+        Chooses precompressed variant of content accepted by client.
+
+        :param variants: Content compressed by Content-Encoding name.
+        :return: Chosen Content-Encoding or None if content should be sent as it is.
+        """
+
+        offers = [encoding for encoding in ('br', 'gzip') if encoding in variants]
+        if not offers or 'Accept-Encoding' not in self.request.headers:
+            # Missing header accepts any encoding, but clients sending none rarely decode it
+            return None
+
+        encoding = self.request.accept_encoding.best_match(offers + ['identity'])
+        if encoding == 'identity':
+            return None
+
+        return encoding
+
+    def not_modified(self, etag):
+        """
+        Sets precomputed ETag of response and responds with 304 if client already has it.
+
+        :param etag: ETag of response content or None if it is not known.
+        :return: True if response is 304 Not Modified and its content must not be written.
+        """
+
+        if etag is None:
+            return False
+
+        self.response.etag = etag
+        if etag in self.request.if_none_match:
+            self.response.status_int = 304
+            return True
+
+        return False
 
     def dispatch(self):
-        super(PublicCachingMixin, self).dispatch()
-        if self.request.method in ('GET', 'HEAD') and self.response.status_int in self.CACHE_STATUS:
-            self.response.cache_control = 'public'
-            self.response.cache_control.max_age = self.CLIENT_CACHE_TTL_SECONDS
-            self.response.cache_control.s_max_age = self.CDN_CACHE_TTL_SECONDS
-            self.response.md5_etag()
+        recorder = timing.start() if self.timing_enabled else None
+
+        try:
+            with timing.stage('handler'):
+                super(PublicCachingMixin, self).dispatch()
+
+            if self.request.method in ('GET', 'HEAD') and self.response.status_int in self.CACHE_STATUS:
+                self.response.cache_control = 'public'
+                self.response.cache_control.max_age = self.CLIENT_CACHE_TTL_SECONDS
+                self.response.cache_control.s_max_age = self.CDN_CACHE_TTL_SECONDS
+                if self.response.etag is None:
+                    with timing.stage('md5_etag'):
+                        self.response.md5_etag()
+        finally:
+            if recorder is not None:
+                timing.finish()
+                self.log_timing(recorder)
+
+    def log_timing(self, recorder):
+        """
+        Writes stage durations to Server-Timing header and structured log line.
+        """
+
+        self.response.headers['Server-Timing'] = recorder.server_timing()
+        logging.info(json_codec.dumps({
+            'message': 'Server-Timing',
+            'method': self.request.method,
+            'path': self.request.path_qs,
+            'status': self.response.status_int,
+            'stages': recorder.stages,
+        }))
@@ -0,0 +1,77 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+JSON encoding and decoding with the fastest available library.
+
+ujson decodes JSON when it is installed, standard library otherwise. JSON is
+always encoded by standard library, ujson for Python 2 rounds floats to at most
+15 decimal places. Use `select` to switch codec (e.g. in tests or benchmarks).
+"""
+import collections
+import json
+
+try:
+    import ujson
+except ImportError:  # ujson is optional, standard library is used without it
+    ujson = None
+
+
+Codec = collections.namedtuple('Codec', ['name', 'loads', 'dumps'])
+
+
+def _json_dumps(obj, sort_keys=False):
+    return json.dumps(obj, sort_keys=sort_keys)
+
+
+def _ujson_loads(data):
+    return ujson.loads(data, precise_float=True)
+
+
+CODECS = collections.OrderedDict()  # by preference
+if ujson is not None:
+    CODECS['ujson'] = Codec('ujson', _ujson_loads, _json_dumps)
+CODECS['json'] = Codec('json', json.loads, _json_dumps)
+
+codec = next(iter(CODECS.values()))
+
+
+def select(name):
+    """
+    Switches codec used by `loads` and `dumps`.
+
+    :param name: Name of installed codec, see `CODECS`.
+    """
+
+    global codec
+    codec = CODECS[name]
+
+
+def loads(data):
+    """
+    :raises ValueError: Data is not valid JSON.
+    """
+
+    return codec.loads(data)
+
+
+def dumps(obj, sort_keys=False):
+    return codec.dumps(obj, sort_keys=sort_keys)
@@ -0,0 +1,151 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import collections
+
+from google.appengine.ext import ndb
+
+from contentful_proxy.models import mirror as mirror_models
+
+
+def localize(item, locale):
+    """
+    Converts Sync API item (fields of all locales) into Content Delivery API
+    item of single locale.
+    """
+
+    return {
+        'sys': dict(item['sys'], locale=locale),
+        'fields': {
+            key: values[locale]
+            for key, values in item.get('fields', {}).iteritems()
+            if locale in values
+        },
+    }
+
+
+def links(obj):
+    """
+    Returns (linkType, id) of all entries and assets linked from the object.
+    """
+
+    found = []
+    stack = [obj]
+
+    while stack:
+        obj = stack.pop()
+
+        if isinstance(obj, dict):
+            try:
+                if obj['sys']['type'] == 'Link' and obj['sys']['linkType'] in ('Entry', 'Asset'):
+                    found.append((obj['sys']['linkType'], obj['sys']['id']))
+                    continue
+            except (TypeError, KeyError):
+                pass
+
+            stack.extend(obj.itervalues())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+
+    return found
+
+
+class Mirror(object):
+    """
+    Reads entries and assets from Datastore mirror kept by Sync API cron job.
+
+    Responses have the same shape as Content Delivery API responses of single
+    (default) locale, locale fallbacks are not applied.
+    """
+
+    def __init__(self, space_id, environment):
+        self.namespace = u'{}:{}'.format(space_id, environment)
+
+    def _get_multi(self, item_keys):
+        keys = [
+            mirror_models.ContentfulMirrorItem.build_key(self.namespace, item_type, item_id)
+            for item_type, item_id in item_keys
+        ]
+        return [item.data for item in ndb.get_multi(keys) if item is not None]
+
+    def _get(self, item_type, item_id):
+        """
+        :return: Default locale and mirrored item, (None, None) if mirror is not ready or item is missing.
+        """
+
+        state, item = ndb.get_multi([
+            ndb.Key(mirror_models.ContentfulSyncState, self.namespace),
+            mirror_models.ContentfulMirrorItem.build_key(self.namespace, item_type, item_id),
+        ])
+
+        if state is None or not state.completed or item is None:
+            return None, None
+
+        return state.default_locale, item.data
+
+    def asset(self, asset_id):
+        """
+        :return: Asset as returned by `/assets/{asset_id}` or None if it is not mirrored.
+        """
+
+        locale, asset = self._get('Asset', asset_id)
+        if asset is None:
+            return None
+
+        return localize(asset, locale)
+
+    def entry(self, entry_id, include=1):
+        """
+        :param include: Depth of resolved links, as `include` parameter of Content Delivery API.
+        :return: Collection as returned by `/entries?sys.id={entry_id}` or None if entry is not mirrored.
+        """
+
+        locale, entry = self._get('Entry', entry_id)
+        if entry is None:
+            return None
+
+        item = localize(entry, locale)
+
+        seen = {('Entry', entry_id)}
+        includes = {'Entry': [], 'Asset': []}
+        linked = links(item['fields'])
+
+        for _ in xrange(include):
+            linked = [link for link in collections.OrderedDict.fromkeys(linked) if link not in seen]
+            seen.update(linked)
+            if not linked:
+                break
+
+            included = [localize(data, locale) for data in self._get_multi(linked)]
+            linked = []
+
+            for included_item in included:
+                includes[included_item['sys']['type']].append(included_item)
+                linked.extend(links(included_item['fields']))
+
+        return {
+            'sys': {'type': 'Array'},
+            'total': 1,
+            'skip': 0,
+            'limit': 100,
+            'items': [item],
+            'includes': includes,
+        }
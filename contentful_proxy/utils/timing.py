@@ -0,0 +1,134 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 stanwood GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Per-request durations of hot path stages (cache lookup, fetch, transformations...).
+
+Recording is started for sampled requests by `PublicCachingMixin`; `stage` is a
+no-op in requests which are not recorded.
+"""
+import collections
+import contextlib
+import logging
+import math
+import threading
+import time
+
+_local = threading.local()
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.stages = collections.OrderedDict()
+
+    def add(self, name, duration):
+        """
+        :param duration: Duration in milliseconds, repeated stages are summed.
+        """
+
+        self.stages[name] = self.stages.get(name, 0) + duration
+
+    def lap(self, name, started):
+        """
+        Adds time since `started` (`time.time()`) to stage `name`.
+
+        :return: Current time, start of the next lap.
+        """
+
+        now = time.time()
+        self.add(name, (now - started) * 1000)
+        return now
+
+    def server_timing(self):
+        """
+        :return: Value of Server-Timing header.
+        """
+
+        return ', '.join(
+            '{};dur={:.1f}'.format(name, duration)
+            for name, duration in self.stages.iteritems()
+        )
+
+
+def parse_sample_rate(value):
+    """
+    Parses share of requests to record, malformed value disables sampling.
+
+    :param value: String, e.g. of environment variable.
+    :return: Float in [0, 1].
+    """
+
+    try:
+        sample_rate = float(value)
+    except (TypeError, ValueError):
+        sample_rate = float('nan')
+
+    if math.isnan(sample_rate):
+        logging.warning("Invalid timing sample rate {!r}, requests are not sampled".format(value))
+        return 0.0
+
+    return min(max(sample_rate, 0.0), 1.0)
+
+
+def start():
+    """
+    Starts recording stages in current thread (request).
+
+    :rtype: Recorder
+    """
+
+    _local.recorder = Recorder()
+    return _local.recorder
+
+
+def finish():
+    """
+    Stops recording stages in current thread.
+
+    :return: Recorder or None if recording was not started.
+    """
+
+    recorder = current()
+    _local.recorder = None
+    return recorder
+
+
+def current():
+    return getattr(_local, 'recorder', None)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Records duration of the block as stage `name` (if recording was started).
+    """
+
+    recorder = current()
+    if recorder is None:
+        yield
+        return
+
+    started = time.time()
+    try:
+        yield
+    finally:
+        recorder.add(name, (time.time() - started) * 1000)
@@ -0,0 +1,183 @@
+import asyncio
+
+from abc import abstractmethod
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from . import json_codec
+from . import pagination
+from .client import ContentfulClient
+
+
+class AsyncContentfulClient(ContentfulClient):
+    """
+    Asyncio variant of `ContentfulClient`.
+
+    Cache hooks are coroutines, requests (over the pooled session) and transformations
+    run in `_executor`, so several fetches of one page render run concurrently.
+    """
+    CONCURRENCY = 8  # default bound of concurrent fetches of `gather_get`
+
+    @property
+    def _executor(self) -> Optional[Executor]:
+        """
+        Executor of requests and transformations, default executor of the loop if None.
+        """
+        return None
+
+    @abstractmethod
+    async def _cache_get(self, cache_key: str) -> object:
+        pass
+
+    @abstractmethod
+    async def _cache_set(self, cache_key: str, content: str, expiration_time: int):
+        pass
+
+    async def _cache_get_many(self, cache_keys: List[str]) -> Dict[str, object]:
+        values = await asyncio.gather(*(self._cache_get(cache_key) for cache_key in cache_keys))
+        return dict(zip(cache_keys, values))
+
+    async def _cache_set_many(self, contents: Dict[str, str], expiration_time: int):
+        await asyncio.gather(*(
+            self._cache_set(cache_key, content, expiration_time) for cache_key, content in contents.items()
+        ))
+
+    def _contentful_content_types(self) -> List[dict]:
+        # Loaded by `contentful_get` before transformations run in executor
+        return self._content_types
+
+    async def _contentful_content_types_async(self) -> List[dict]:
+        cache_key = self._contentful_content_types_cache_key
+
+        response = await self._cache_get(cache_key)
+        if response:
+            return json_codec.loads(response)
+
+        loop = asyncio.get_running_loop()
+        content_types = await loop.run_in_executor(self._executor, self._fetch_contentful_content_types)
+
+        await self._cache_set(cache_key, json_codec.dumps(content_types), self.CACHE_TTL)
+
+        return content_types
+
+    async def contentful_get(
+        self,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ):
+        cache_key = self._contentful_cache_key(item_type, item_id, query_string)
+
+        response = await self._cache_get(cache_key)
+        if response:
+            return json_codec.loads(response)
+
+        response, json_response = await self._contentful_load(cache_key, item_type, item_id, query_string)
+        if response is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._executor, json_codec.loads, json_response)
+
+        return response
+
+    async def contentful_get_raw(
+        self,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ) -> bytes:
+        cache_key = self._contentful_cache_key(item_type, item_id, query_string)
+
+        response = await self._cache_get(cache_key)
+        if not response:
+            _, response = await self._contentful_load(cache_key, item_type, item_id, query_string)
+
+        return response if isinstance(response, bytes) else response.encode()
+
+    async def _contentful_load(
+        self,
+        cache_key: str,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ) -> Tuple[Optional[object], str]:
+        if self.FLATTEN_BY_CONTENT_TYPE:
+            self._content_types = await self._contentful_content_types_async()
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            self._executor, self._contentful_fetch, item_type, item_id, query_string
+        )
+        response, json_response = await loop.run_in_executor(self._executor, self._contentful_transform, content)
+
+        await self._cache_set(cache_key, json_response, self.CACHE_TTL)
+
+        return response, json_response
+
+    async def gather_get(self, requests: Iterable[Mapping], concurrency: int = None) -> list:
+        """
+        Runs `contentful_get` for every request concurrently, at most `concurrency` at once.
+
+        :param requests: Keyword arguments of `contentful_get`,
+                         e.g. `{'item_type': 'entries', 'query_string': 'content_type=page'}`.
+        :return: Responses in order of requests.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.CONCURRENCY)
+
+        async def get(request):
+            async with semaphore:
+                return await self.contentful_get(**request)
+
+        return await asyncio.gather(*(get(request) for request in requests))
+
+    def iter_entries(self, query_string: str = None, page_size: int = 100) -> pagination.AsyncPageIterator:
+        """
+        Asyncio variant of `ContentfulClient.iter_entries`, iterate it with `async for`.
+        """
+        return pagination.AsyncPageIterator(
+            lambda skip, limit: self.contentful_get(
+                'entries', query_string=self._page_query_string(query_string, skip, limit)
+            ),
+            page_size=page_size,
+        )
+
+    async def get_many(self, ids: Iterable[str], query_string: str = None) -> List[Optional[object]]:
+        """
+        Asyncio variant of `ContentfulClient.get_many`, chunks are fetched concurrently.
+        """
+        cache_keys = {
+            item_id: self._contentful_cache_key('entries', item_id, query_string)
+            for item_id in dict.fromkeys(ids)
+        }
+
+        cached = await self._cache_get_many(list(cache_keys.values()))
+        responses = {
+            item_id: json_codec.loads(cached[cache_key])
+            for item_id, cache_key in cache_keys.items() if cached.get(cache_key)
+        }
+
+        missing = [item_id for item_id in cache_keys if item_id not in responses]
+        if missing and self.FLATTEN_BY_CONTENT_TYPE:
+            self._content_types = await self._contentful_content_types_async()
+
+        loop = asyncio.get_running_loop()
+
+        async def fetch(chunk):
+            content = await loop.run_in_executor(
+                self._executor, self._contentful_fetch, 'entries', None, self._ids_query_string(chunk, query_string)
+            )
+            contents = {}
+            for item_id, response, json_response in await loop.run_in_executor(
+                self._executor, self._contentful_transform_entries, content
+            ):
+                if item_id in cache_keys:
+                    contents[cache_keys[item_id]] = json_response
+                    responses[item_id] = response
+
+            await self._cache_set_many(contents, self.CACHE_TTL)
+
+        await asyncio.gather(*(
+            fetch(missing[offset:offset + self.GET_MANY_CHUNK_SIZE])
+            for offset in range(0, len(missing), self.GET_MANY_CHUNK_SIZE)
+        ))
+
+        return [responses.get(item_id) for item_id in cache_keys]
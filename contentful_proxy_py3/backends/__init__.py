@@ -0,0 +1 @@
+from .local import LocalCacheMixin, LRUCache
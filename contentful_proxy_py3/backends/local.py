@@ -0,0 +1,117 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class LRUCache:
+    """
+    Process-local, thread-safe LRU cache bounded by size of stored values.
+
+    Every value expires after its TTL. Values bigger than the whole cache are not stored.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._lock = threading.Lock()
+        self._values = OrderedDict()
+
+    def get(self, key: str) -> Optional[object]:
+        with self._lock:
+            try:
+                value, size, expires = self._values[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._values.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key: str, value, size: int = None, ttl: int = None) -> bool:
+        if size is None:
+            size = len(value)
+
+        if size > self.max_bytes:
+            return False
+
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._remove(key)
+
+            self._values[key] = (value, size, expires)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._values.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+        return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.size = 0
+
+    def _remove(self, key: str):
+        try:
+            _, size, _ = self._values.pop(key)
+        except KeyError:
+            pass
+        else:
+            self.size -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'items': len(self._values),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class LocalCacheMixin:
+    """
+    Implements `ContentfulClient` cache hooks with process-local LRU cache.
+
+    Usage:
+        class Client(LocalCacheMixin, ContentfulClient):
+            ...
+    """
+
+    LOCAL_CACHE = LRUCache(max_bytes=32 * 1024 * 1024, ttl=60)  # shared by all clients of the process
+
+    @property
+    def _cache_client(self):
+        return self.LOCAL_CACHE
+
+    def _cache_get(self, cache_key: str) -> object:
+        return self._cache_client.get(cache_key)
+
+    def _cache_set(self, cache_key: str, content: str, expiration_time: int):
+        self._cache_client.set(cache_key, content, ttl=expiration_time)
@@ -0,0 +1,349 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+import zlib
+
+from typing import Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio
+
+
+class RedisCache:
+    """
+    Redis cache of responses with pooled connections.
+
+    Values of at least `compress_min_size` bytes are compressed with zlib, multi-key
+    reads and writes take one round trip. Leases (`SET NX PX`) let a single client
+    fetch a missing value while others wait for it.
+    """
+
+    RAW = b'r'
+    ZLIB = b'z'
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        compression_level: int = 6,
+        compress_min_size: int = 1024,
+    ):
+        self.client = client
+        self.compression_level = compression_level
+        self.compress_min_size = compress_min_size
+
+    @classmethod
+    def from_url(cls, url: str, max_connections: int = 32, **kwargs) -> 'RedisCache':
+        pool = redis.ConnectionPool.from_url(url, max_connections=max_connections)
+        return cls(redis.Redis(connection_pool=pool), **kwargs)
+
+    def encode(self, value) -> bytes:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+
+        if self.compression_level and len(value) >= self.compress_min_size:
+            return self.ZLIB + zlib.compress(value, self.compression_level)
+
+        return self.RAW + value
+
+    @classmethod
+    def decode(cls, data: Optional[bytes]) -> Optional[bytes]:
+        if data is None:
+            return None
+
+        if data[:1] == cls.ZLIB:
+            return zlib.decompress(data[1:])
+
+        return data[1:]
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.decode(self.client.get(key))
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """
+        :return: Values by key, missing keys are left out.
+        """
+        if not keys:
+            return {}
+
+        values = {}
+        for key, data in zip(keys, self.client.mget(keys)):
+            if data is not None:
+                values[key] = self.decode(data)
+
+        return values
+
+    def set(self, key: str, value, ttl: int):
+        self.client.set(key, self.encode(value), ex=ttl)
+
+    def set_many(self, values: Dict[str, object], ttl: int):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(key, self.encode(value), ex=ttl)
+        pipeline.execute()
+
+    @staticmethod
+    def lease_key(key: str) -> str:
+        return f'{key}:lease'
+
+    def acquire(self, key: str, ttl_ms: int) -> Optional[str]:
+        """
+        :return: Token of the lease or None if it is held by someone else.
+        """
+        token = uuid.uuid4().hex
+        if self.client.set(self.lease_key(key), token, nx=True, px=ttl_ms):
+            return token
+        return None
+
+    def release(self, key: str, token: str) -> bool:
+        """
+        Releases lease if it is still held with the token (it might have expired and been taken over).
+        """
+        lease_key = self.lease_key(key)
+
+        with self.client.pipeline() as pipeline:
+            try:
+                pipeline.watch(lease_key)
+                if pipeline.get(lease_key) != token.encode():
+                    return False
+                pipeline.multi()
+                pipeline.delete(lease_key)
+                pipeline.execute()
+            except redis.WatchError:
+                return False
+
+        return True
+
+    def wait(self, key: str, timeout: float, interval: float = 0.05) -> Optional[bytes]:
+        """
+        Waits for value while lease of the key is held.
+
+        :return: Value or None if lease was released (or expired) without storing it.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            value = self.get(key)
+            if value is not None or not self.client.exists(self.lease_key(key)) or time.monotonic() >= deadline:
+                return value
+
+            time.sleep(interval)
+
+
+class AsyncRedisCache(RedisCache):
+    """
+    Asyncio variant of `RedisCache` over `redis.asyncio` client, methods talking to Redis are coroutines.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis,
+        compression_level: int = 6,
+        compress_min_size: int = 1024,
+    ):
+        super().__init__(client, compression_level=compression_level, compress_min_size=compress_min_size)
+
+    @classmethod
+    def from_url(cls, url: str, max_connections: int = 32, **kwargs) -> 'AsyncRedisCache':
+        pool = redis.asyncio.ConnectionPool.from_url(url, max_connections=max_connections)
+        return cls(redis.asyncio.Redis(connection_pool=pool), **kwargs)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.decode(await self.client.get(key))
+
+    async def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+
+        values = {}
+        for key, data in zip(keys, await self.client.mget(keys)):
+            if data is not None:
+                values[key] = self.decode(data)
+
+        return values
+
+    async def set(self, key: str, value, ttl: int):
+        await self.client.set(key, self.encode(value), ex=ttl)
+
+    async def set_many(self, values: Dict[str, object], ttl: int):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(key, self.encode(value), ex=ttl)
+        await pipeline.execute()
+
+    async def acquire(self, key: str, ttl_ms: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self.client.set(self.lease_key(key), token, nx=True, px=ttl_ms):
+            return token
+        return None
+
+    async def release(self, key: str, token: str) -> bool:
+        lease_key = self.lease_key(key)
+
+        async with self.client.pipeline() as pipeline:
+            try:
+                await pipeline.watch(lease_key)
+                if await pipeline.get(lease_key) != token.encode():
+                    return False
+                pipeline.multi()
+                pipeline.delete(lease_key)
+                await pipeline.execute()
+            except redis.WatchError:
+                return False
+
+        return True
+
+    async def wait(self, key: str, timeout: float, interval: float = 0.05) -> Optional[bytes]:
+        deadline = time.monotonic() + timeout
+        while True:
+            value = await self.get(key)
+            if value is not None or not await self.client.exists(self.lease_key(key)) or time.monotonic() >= deadline:
+                return value
+
+            await asyncio.sleep(interval)
+
+
+class _RedisCacheSettings:
+    REDIS_URL = 'redis://localhost:6379/0'
+    REDIS_MAX_CONNECTIONS = 32  # pooled connections, shared by all clients of the class
+    REDIS_COMPRESSION_LEVEL = 6  # zlib level, 0 disables compression
+    REDIS_COMPRESS_MIN_SIZE = 1024
+    LEASE_TTL_MS = 10 * 1000  # fetch of missing response is expected to finish within
+    LEASE_WAIT = 10  # seconds other clients wait for leaseholder before they fetch on their own
+
+
+class RedisCacheMixin(_RedisCacheSettings):
+    """
+    Implements `ContentfulClient` cache hooks with Redis.
+
+    Concurrent misses of a key (in all processes) wait for a single fetch.
+    The hooks block on Redis, `AsyncContentfulClient` takes `AsyncRedisCacheMixin` instead.
+
+    Usage:
+        class Client(RedisCacheMixin, ContentfulClient):
+            REDIS_URL = 'redis://localhost:6379/0'
+            ...
+    """
+
+    _redis_caches = {}
+    _redis_caches_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        from ..async_client import AsyncContentfulClient
+
+        if issubclass(cls, AsyncContentfulClient):
+            raise TypeError(
+                f'{cls.__name__}: RedisCacheMixin would block the event loop, use AsyncRedisCacheMixin'
+            )
+
+    @classmethod
+    def _create_redis_cache(cls) -> RedisCache:
+        return RedisCache.from_url(
+            cls.REDIS_URL,
+            max_connections=cls.REDIS_MAX_CONNECTIONS,
+            compression_level=cls.REDIS_COMPRESSION_LEVEL,
+            compress_min_size=cls.REDIS_COMPRESS_MIN_SIZE,
+        )
+
+    @property
+    def _cache_client(self) -> RedisCache:
+        cls = type(self)
+        cache = cls._redis_caches.get(cls)
+        if cache is not None:
+            return cache
+
+        with cls._redis_caches_lock:
+            cache = cls._redis_caches.get(cls)
+            if cache is None:
+                cache = cls._redis_caches[cls] = cls._create_redis_cache()
+
+        return cache
+
+    def _cache_get(self, cache_key: str) -> Optional[bytes]:
+        return self._cache_client.get(cache_key)
+
+    def _cache_set(self, cache_key: str, content: str, expiration_time: int):
+        self._cache_client.set(cache_key, content, expiration_time)
+
+    def _cache_get_many(self, cache_keys: List[str]) -> Dict[str, bytes]:
+        return self._cache_client.get_many(cache_keys)
+
+    def _cache_set_many(self, contents: Dict[str, str], expiration_time: int):
+        self._cache_client.set_many(contents, expiration_time)
+
+    def _contentful_load(self, cache_key: str, *args, **kwargs) -> Tuple[Optional[object], object]:
+        token = self._cache_client.acquire(cache_key, self.LEASE_TTL_MS)
+        if token is None:
+            cached = self._cache_client.wait(cache_key, self.LEASE_WAIT)
+            if cached is not None:
+                return None, cached
+
+        try:
+            return super()._contentful_load(cache_key, *args, **kwargs)
+        finally:
+            if token is not None:
+                self._cache_client.release(cache_key, token)
+
+
+class AsyncRedisCacheMixin(_RedisCacheSettings):
+    """
+    Implements `AsyncContentfulClient` cache hooks with `redis.asyncio`.
+
+    Concurrent misses of a key (in all processes) wait for a single fetch.
+    Connections of `redis.asyncio` are bound to the event loop which opened them,
+    so every running loop gets its own pool.
+
+    Usage:
+        class Client(AsyncRedisCacheMixin, AsyncContentfulClient):
+            REDIS_URL = 'redis://localhost:6379/0'
+            ...
+    """
+
+    _redis_caches = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def _create_redis_cache(cls) -> AsyncRedisCache:
+        return AsyncRedisCache.from_url(
+            cls.REDIS_URL,
+            max_connections=cls.REDIS_MAX_CONNECTIONS,
+            compression_level=cls.REDIS_COMPRESSION_LEVEL,
+            compress_min_size=cls.REDIS_COMPRESS_MIN_SIZE,
+        )
+
+    @property
+    def _cache_client(self) -> AsyncRedisCache:
+        cls = type(self)
+        caches = cls._redis_caches.setdefault(asyncio.get_running_loop(), {})
+
+        cache = caches.get(cls)
+        if cache is None:
+            cache = caches[cls] = cls._create_redis_cache()
+
+        return cache
+
+    async def _cache_get(self, cache_key: str) -> Optional[bytes]:
+        return await self._cache_client.get(cache_key)
+
+    async def _cache_set(self, cache_key: str, content: str, expiration_time: int):
+        await self._cache_client.set(cache_key, content, expiration_time)
+
+    async def _cache_get_many(self, cache_keys: List[str]) -> Dict[str, bytes]:
+        return await self._cache_client.get_many(cache_keys)
+
+    async def _cache_set_many(self, contents: Dict[str, str], expiration_time: int):
+        await self._cache_client.set_many(contents, expiration_time)
+
+    async def _contentful_load(self, cache_key: str, *args, **kwargs) -> Tuple[Optional[object], object]:
+        token = await self._cache_client.acquire(cache_key, self.LEASE_TTL_MS)
+        if token is None:
+            cached = await self._cache_client.wait(cache_key, self.LEASE_WAIT)
+            if cached is not None:
+                return None, cached
+
+        try:
+            return await super()._contentful_load(cache_key, *args, **kwargs)
+        finally:
+            if token is not None:
+                await self._cache_client.release(cache_key, token)
@@ -1,9 +1,10 @@
+import copy
 import hashlib
-import json
 import logging
+import threading
 
-from typing import List
-from urllib.parse import urlencode
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
 
 from abc import (
     ABC,
@@ -17,6 +18,8 @@ import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from . import json_codec
+from . import pagination
 from . import transformations
 
 
@@ -24,6 +27,19 @@ class ContentfulClient(ABC):
     CACHE_TTL = 60*10
     CACHE_PREFIX = 'contentful'
     CONTENTFUL_CDN_URL = 'http://cdn.contentful.com'
+    STREAMING_MIN_SIZE = 1024 * 1024  # bigger responses are transformed item by item
+    FUSE_TRANSFORMATIONS = False  # run default transformations in single pass, see `transformations.FusedPipeline`
+    FLATTEN_BY_CONTENT_TYPE = False  # flatten fields by plan built from content type definitions
+    HTTP_POOL_CONNECTIONS = 4  # pooled hosts
+    HTTP_POOL_MAXSIZE = 10  # pooled connections per host, size it to number of threads
+    HTTP_KEEP_ALIVE = True  # reuse connections between cache misses
+    HTTP_RETRIES = 3
+    GET_MANY_CHUNK_SIZE = 100  # IDs per `sys.id[in]` query of `get_many`, default page size of Contentful
+    PAGES_ORDER = 'sys.createdAt,sys.id'  # order of pages of `iter_entries`, `sys.id` breaks ties
+    PIPELINE_VERSION = 1  # part of cache keys, bump it when output of transformations changes
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
 
     @abstractproperty
     def _contentful_space(self):
@@ -58,6 +74,19 @@ class ContentfulClient(ABC):
     def _cache_set(self, cache_key: str, content: str, expiration_time: int):
         pass
 
+    def _cache_get_many(self, cache_keys: List[str]) -> Dict[str, object]:
+        """
+        Returns cached values by key, override to read all keys in one round trip.
+        """
+        return {cache_key: self._cache_get(cache_key) for cache_key in cache_keys}
+
+    def _cache_set_many(self, contents: Dict[str, str], expiration_time: int):
+        """
+        Stores values by key, override to write all keys in one round trip.
+        """
+        for cache_key, content in contents.items():
+            self._cache_set(cache_key, content, expiration_time)
+
     @abstractproperty
     def _proxy_hostname(self):
         pass
@@ -69,7 +98,38 @@ class ContentfulClient(ABC):
         query_string: str = None,
         space_name: str = None,
     ):
-        return f'{self.CACHE_PREFIX}:{space_name}:{item_type}:{item_id}?{query_string}'
+        """
+        Cache key of response, it is independent of order of query parameters and `select` fields.
+        """
+        return (
+            f'{self.CACHE_PREFIX}:{space_name or self._contentful_space}:{self._contentful_environment}'
+            f':{self._contentful_pipeline_version}:{item_type}:{item_id}?{self._canonical_query_string(query_string)}'
+        )
+
+    @staticmethod
+    def _canonical_query_string(query_string: str = None) -> str:
+        query = []
+        for key, value in parse_qsl(query_string or '', keep_blank_values=True):
+            if key == 'select':
+                value = ','.join(sorted({field.strip() for field in value.split(',') if field.strip()}))
+            query.append((key, value))
+
+        return urlencode(sorted(query))
+
+    @property
+    def _contentful_pipeline_version(self) -> str:
+        """
+        Hash of `PIPELINE_VERSION` and of classes and parameters of transformations.
+        """
+        parts = [str(self.PIPELINE_VERSION)]
+        for transformation in self._contentful_transformations:
+            params = sorted(
+                (key, 'callable' if callable(value) else value)
+                for key, value in vars(transformation).items() if not key.startswith('_')
+            )
+            parts.append(f'{type(transformation).__name__}{params}')
+
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()[:12]
 
     @property
     def _contentful_transformations(self):
@@ -78,16 +138,78 @@ class ContentfulClient(ABC):
                 proxy_hostname=self._proxy_hostname
             ),
             transformations.ResolveIncludes(),
-            transformations.FlattenFields(),
+            transformations.FlattenFields(
+                content_types=self._contentful_content_types if self.FLATTEN_BY_CONTENT_TYPE else None
+            ),
             transformations.RemoveIncludes(),
             transformations.RemoveRootSys(),
         ]
 
-    @staticmethod
-    def _request_session():
+    @property
+    def _contentful_content_types_cache_key(self):
+        return f'{self.CACHE_PREFIX}:{self._contentful_space}:{self._contentful_environment}:content_types'
+
+    def _contentful_content_types(self) -> List[dict]:
+        """
+        Raw definitions of all content types, cached like responses.
+        """
+        cache_key = self._contentful_content_types_cache_key
+
+        response = self._cache_get(cache_key)
+        if response:
+            return json_codec.loads(response)
+
+        content_types = self._fetch_contentful_content_types()
+
+        self._cache_set(cache_key, json_codec.dumps(content_types), self.CACHE_TTL)
+
+        return content_types
+
+    def _fetch_contentful_content_types(self) -> List[dict]:
+        session = self._request_session()
+        response = session.get(
+            f'{self.CONTENTFUL_CDN_URL}/spaces/{self._contentful_space}'
+            f'/environments/{self._contentful_environment}/content_types?limit=1000',
+            headers={
+                'Authorization': f'Bearer {self._contentful_token}'
+            }
+        )
+        response.raise_for_status()
+        return json_codec.loads(response.content)['items']
+
+    @classmethod
+    def _request_session(cls) -> requests.Session:
+        """
+        Long-lived session of the client class, shared by all instances and threads.
+
+        Connections are pooled (and kept alive unless `HTTP_KEEP_ALIVE` is off), so cache
+        misses do not pay for TCP and TLS setup.
+        """
+        session = cls._sessions.get(cls)
+        if session is not None:
+            return session
+
+        with cls._sessions_lock:
+            session = cls._sessions.get(cls)
+            if session is None:
+                session = cls._sessions[cls] = cls._create_request_session()
+
+        return session
+
+    @classmethod
+    def _create_request_session(cls) -> requests.Session:
         session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1)
-        session.mount('https://', HTTPAdapter(max_retries=retries))
+        adapter = HTTPAdapter(
+            pool_connections=cls.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=cls.HTTP_POOL_MAXSIZE,
+            max_retries=Retry(total=cls.HTTP_RETRIES, backoff_factor=1),
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        if not cls.HTTP_KEEP_ALIVE:
+            session.headers['Connection'] = 'close'
+
         return session
 
     def _generate_request_url(
@@ -121,14 +243,55 @@ class ContentfulClient(ABC):
         item_id: int = None,
         query_string: str = None
     ):
-        cache_key = self._contentful_cache_key(
-            item_type, self._contentful_space, item_id, query_string
-        )
+        cache_key = self._contentful_cache_key(item_type, item_id, query_string)
 
         response = self._cache_get(cache_key)
         if response:
-            return json.loads(response)
+            return json_codec.loads(response)
+
+        response, json_response = self._contentful_load(cache_key, item_type, item_id, query_string)
+        return json_codec.loads(json_response) if response is None else response
+
+    def contentful_get_raw(
+        self,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ) -> bytes:
+        """
+        Returns JSON of transformed response for pass-through serving, cached value is not parsed.
+        """
+        cache_key = self._contentful_cache_key(item_type, item_id, query_string)
+
+        response = self._cache_get(cache_key)
+        if not response:
+            _, response = self._contentful_load(cache_key, item_type, item_id, query_string)
 
+        return response if isinstance(response, bytes) else response.encode()
+
+    def _contentful_load(
+        self,
+        cache_key: str,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ) -> Tuple[Optional[object], str]:
+        content = self._contentful_fetch(item_type, item_id, query_string)
+        response, json_response = self._contentful_transform(content)
+
+        self._cache_set(cache_key, json_response, self.CACHE_TTL)
+
+        return response, json_response
+
+    def _contentful_fetch(
+        self,
+        item_type: str = None,
+        item_id: int = None,
+        query_string: str = None
+    ) -> bytes:
+        """
+        Returns raw response, error responses raise `requests.HTTPError` and are not cached.
+        """
         session = self._request_session()
         response = session.get(
             self._generate_request_url(
@@ -137,13 +300,149 @@ class ContentfulClient(ABC):
             headers={
                 'Authorization': f'Bearer {self._contentful_token}'
             }
-        ).json()
+        )
+        response.raise_for_status()
+        return response.content
 
-        for transformation in self._contentful_transformations:
+    def _contentful_transform(self, content: bytes) -> Tuple[Optional[object], str]:
+        """
+        Transforms raw response, CPU bound.
+
+        :return: Transformed response and its JSON, streamed response is None (it is parsed only when needed).
+        """
+        if len(content) >= self.STREAMING_MIN_SIZE:
+            pipeline = transformations.compile_pipeline(self._contentful_transformations)
+            if transformations.streaming.accepts(pipeline):
+                return None, transformations.streaming.transform(content, pipeline[0])
+
+        return self._contentful_transform_response(json_codec.loads(content))
+
+    def _contentful_pipeline(self) -> list:
+        if self.FUSE_TRANSFORMATIONS:
+            return transformations.compile_pipeline(self._contentful_transformations)
+        return list(self._contentful_transformations)
+
+    def _contentful_transform_response(self, response: dict, pipeline: list = None) -> Tuple[object, str]:
+        if pipeline is None:
+            pipeline = self._contentful_pipeline()
+
+        for transformation in pipeline:
             transformation(response)
 
-        json_response = json.dumps(response)
+        return response, json_codec.dumps(response)
 
-        self._cache_set(cache_key, json_response, self.CACHE_TTL)
+    def iter_entries(self, query_string: str = None, page_size: int = 100) -> pagination.PageIterator:
+        """
+        Returns iterator of transformed entries of all pages of the query.
+
+        Pages are cached like responses of `contentful_get` and the next one is fetched
+        while the current one is consumed. Entries are ordered by `PAGES_ORDER`, so pages
+        do not depend on the order Contentful happens to return, entries created or deleted
+        during the walk may still shift the following pages. `skip`, `limit` and `order`
+        of the query are ignored.
+        """
+        return pagination.PageIterator(
+            lambda skip, limit: self.contentful_get(
+                'entries', query_string=self._page_query_string(query_string, skip, limit)
+            ),
+            page_size=page_size,
+        )
+
+    @classmethod
+    def _page_query_string(cls, query_string: str, skip: int, limit: int) -> str:
+        query = [(key, value) for key, value in parse_qsl(query_string or '') if key not in ('skip', 'limit', 'order')]
+        query.extend([('order', cls.PAGES_ORDER), ('skip', skip), ('limit', limit)])
+        return urlencode(query)
+
+    def get_many(self, ids: Iterable[str], query_string: str = None) -> List[Optional[object]]:
+        """
+        Returns entries by IDs, cached under the same keys as `contentful_get` of single entry.
+
+        Cache is checked for all entries at once, missing entries are fetched by
+        `sys.id[in]` queries of `GET_MANY_CHUNK_SIZE` IDs and cached one by one.
+
+        :return: Responses in order of IDs, None for entries which do not exist.
+        """
+        cache_keys = {
+            item_id: self._contentful_cache_key('entries', item_id, query_string)
+            for item_id in dict.fromkeys(ids)
+        }
+
+        cached = self._cache_get_many(list(cache_keys.values()))
+        responses = {
+            item_id: json_codec.loads(cached[cache_key])
+            for item_id, cache_key in cache_keys.items() if cached.get(cache_key)
+        }
+
+        missing = [item_id for item_id in cache_keys if item_id not in responses]
+        for offset in range(0, len(missing), self.GET_MANY_CHUNK_SIZE):
+            chunk = missing[offset:offset + self.GET_MANY_CHUNK_SIZE]
+            content = self._contentful_fetch('entries', query_string=self._ids_query_string(chunk, query_string))
+            contents = {}
+            for item_id, response, json_response in self._contentful_transform_entries(content):
+                if item_id in cache_keys:
+                    contents[cache_keys[item_id]] = json_response
+                    responses[item_id] = response
+
+            self._cache_set_many(contents, self.CACHE_TTL)
+
+        return [responses.get(item_id) for item_id in cache_keys]
+
+    @staticmethod
+    def _ids_query_string(ids: List[str], query_string: str = None) -> str:
+        ids_query = urlencode({'sys.id[in]': ','.join(ids)})
+        return f'{query_string}&{ids_query}' if query_string else ids_query
+
+    def _contentful_transform_entries(self, content: bytes) -> List[Tuple[str, object, str]]:
+        """
+        Splits collection into responses of single entries and transforms them, CPU bound.
+
+        Pipeline is built once for all entries, so content types of `FlattenFields` are loaded once.
+
+        :return: Entry ID, transformed response and its JSON of every entry.
+        """
+        pipeline = self._contentful_pipeline()
+        return [
+            (item_id, *self._contentful_transform_response(entry_content, pipeline))
+            for item_id, entry_content in self._split_entries(json_codec.loads(content))
+        ]
+
+    @staticmethod
+    def _split_entries(content: dict) -> Iterator[Tuple[str, dict]]:
+        """
+        Splits collection into collections of single entry, as they are returned for `sys.id` queries.
+
+        Every collection gets copy of includes its entry links to (directly or through other includes).
+        """
+        includes = {
+            (link_type, value['sys']['id']): value
+            for link_type, values in content.get('includes', {}).items()
+            for value in values
+        }
+
+        for item in content.get('items', []):
+            linked = {}
+            stack = [item]
+            while stack:
+                obj = stack.pop()
+                if isinstance(obj, dict):
+                    link = transformations.ResolveIncludes.link(obj)
+                    if link is not None:
+                        if link not in linked and link in includes:
+                            linked[link] = includes[link]
+                            stack.append(includes[link])
+                        continue
+                    stack.extend(obj.values())
+                elif isinstance(obj, list):
+                    stack.extend(obj)
+
+            entry_includes = {}
+            for (link_type, _), value in linked.items():
+                entry_includes.setdefault(link_type, []).append(value)
+
+            entry_content = {key: value for key, value in content.items() if key not in ('items', 'includes')}
+            entry_content.update({'total': 1, 'items': [copy.deepcopy(item)]})
+            if 'includes' in content:
+                entry_content['includes'] = copy.deepcopy(entry_includes)
 
-        return response
+            yield item['sys']['id'], entry_content
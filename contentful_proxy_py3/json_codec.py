@@ -0,0 +1,69 @@
+"""
+JSON encoding and decoding with the fastest available library.
+
+orjson or ujson is used when installed, standard library otherwise. Use `select`
+to switch codec (e.g. in tests or benchmarks).
+"""
+import json
+
+from typing import Callable, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson is optional
+    ujson = None
+
+
+class Codec(NamedTuple):
+    name: str
+    loads: Callable
+    dumps: Callable
+
+
+def _json_dumps(obj, sort_keys: bool = False) -> str:
+    return json.dumps(obj, sort_keys=sort_keys)
+
+
+def _orjson_dumps(obj, sort_keys: bool = False) -> str:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode('utf-8')
+    except TypeError:  # e.g. integers over 64 bits
+        return _json_dumps(obj, sort_keys=sort_keys)
+
+
+def _ujson_dumps(obj, sort_keys: bool = False) -> str:
+    return ujson.dumps(obj, sort_keys=sort_keys, escape_forward_slashes=False)
+
+
+CODECS = {}  # by preference
+if orjson is not None:
+    CODECS['orjson'] = Codec('orjson', orjson.loads, _orjson_dumps)
+if ujson is not None:
+    CODECS['ujson'] = Codec('ujson', ujson.loads, _ujson_dumps)
+CODECS['json'] = Codec('json', json.loads, _json_dumps)
+
+codec = next(iter(CODECS.values()))
+
+
+def select(name: str):
+    """
+    Switches codec used by `loads` and `dumps`.
+    """
+    global codec
+    codec = CODECS[name]
+
+
+def loads(data):
+    """
+    :raises ValueError: Data is not valid JSON.
+    """
+    return codec.loads(data)
+
+
+def dumps(obj, sort_keys: bool = False) -> str:
+    return codec.dumps(obj, sort_keys=sort_keys)
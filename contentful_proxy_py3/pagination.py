@@ -0,0 +1,100 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+
+class PageIterator:
+    """
+    Iterates items of all pages of a collection.
+
+    Next page is fetched in background while items of the current one are consumed,
+    so at most two pages are held in memory. `total` is taken from the first page.
+    """
+
+    def __init__(self, fetch_page: Callable[[int, int], dict], page_size: int = 100):
+        """
+        :param fetch_page: Function of skip and limit which returns (transformed) page.
+        """
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self._first_page = None
+
+    @property
+    def first_page(self) -> dict:
+        if self._first_page is None:
+            self._first_page = self.fetch_page(0, self.page_size)
+        return self._first_page
+
+    @property
+    def total(self) -> Optional[int]:
+        return self.first_page.get('total')
+
+    def has_next(self, page: dict, skip: int) -> bool:
+        """
+        :param skip: Skip of the next page.
+        """
+        return len(page.get('items') or []) >= self.page_size and (self.total is None or skip < self.total)
+
+    def __iter__(self) -> Iterator:
+        page, skip = self.first_page, 0
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                skip += self.page_size
+                prefetch = executor.submit(self.fetch_page, skip, self.page_size) if self.has_next(page, skip) else None
+
+                yield from page.get('items') or []
+
+                if prefetch is None:
+                    return
+
+                page = prefetch.result()
+
+
+class AsyncPageIterator(PageIterator):
+    """
+    Asyncio variant of `PageIterator`, next page is fetched by a task.
+
+    Iterate with `async for`, `total` is available after `await pages.load()`.
+    """
+
+    def __init__(self, fetch_page: Callable[[int, int], Awaitable[dict]], page_size: int = 100):
+        super().__init__(fetch_page, page_size)
+
+    @property
+    def first_page(self) -> dict:
+        if self._first_page is None:
+            raise RuntimeError('First page is not loaded, await load()')
+        return self._first_page
+
+    async def load(self) -> 'AsyncPageIterator':
+        if self._first_page is None:
+            self._first_page = await self.fetch_page(0, self.page_size)
+        return self
+
+    def __iter__(self):
+        raise TypeError('Use async for')
+
+    async def __aiter__(self) -> AsyncIterator:
+        await self.load()
+        page, skip = self.first_page, 0
+
+        while True:
+            skip += self.page_size
+            prefetch = None
+            if self.has_next(page, skip):
+                prefetch = asyncio.ensure_future(self.fetch_page(skip, self.page_size))
+
+            try:
+                for item in page.get('items') or []:
+                    yield item
+            except BaseException:
+                if prefetch is not None:
+                    prefetch.cancel()
+                raise
+
+            if prefetch is None:
+                return
+
+            page = await prefetch
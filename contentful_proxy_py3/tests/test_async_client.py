@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+import time
+
+from unittest import mock
+
+import pytest
+
+from contentful_proxy_py3.async_client import AsyncContentfulClient
+
+
+class Client(AsyncContentfulClient):
+    _contentful_space = 'space'
+    _contentful_token = 'token'
+    _proxy_hostname = 'http://localhost'
+
+    def __init__(self):
+        self.cache = {}
+
+    @property
+    def _cache_client(self):
+        return self.cache
+
+    async def _cache_get(self, cache_key):
+        return self.cache.get(cache_key)
+
+    async def _cache_set(self, cache_key, content, expiration_time):
+        self.cache[cache_key] = content
+
+
+class SlowFetch:
+    """
+    Stands in for HTTP request, tracks number of requests in flight.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, item_type=None, item_id=None, query_string=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.delay)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        return json.dumps({
+            'sys': {'type': 'Array'},
+            'items': [{'sys': {'type': 'Entry', 'id': query_string}, 'fields': {'title': query_string}}],
+        }).encode()
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+def test_contentful_get_caches_response(client):
+    fetch = SlowFetch(0)
+    with mock.patch.object(client, '_contentful_fetch', side_effect=fetch) as contentful_fetch:
+        first = asyncio.run(client.contentful_get('entries', query_string='skip=0'))
+        second = asyncio.run(client.contentful_get('entries', query_string='skip=0'))
+
+    assert first == second == {'items': [{'id': 'skip=0', 'title': 'skip=0'}]}
+    assert contentful_fetch.call_count == 1
+    assert len(client.cache) == 1
+
+
+def test_gather_get_runs_concurrently(client):
+    fetch = SlowFetch(0.2)
+    requests = [{'item_type': 'entries', 'query_string': f'skip={i}'} for i in range(4)]
+
+    with mock.patch.object(client, '_contentful_fetch', side_effect=fetch):
+        started = time.perf_counter()
+        responses = asyncio.run(client.gather_get(requests))
+        elapsed = time.perf_counter() - started
+
+    assert [response['items'][0]['title'] for response in responses] == [f'skip={i}' for i in range(4)]
+    assert fetch.max_in_flight == 4
+    assert elapsed < 0.6
+
+
+def test_gather_get_bounds_concurrency(client):
+    fetch = SlowFetch(0.05)
+    requests = [{'item_type': 'entries', 'query_string': f'skip={i}'} for i in range(6)]
+
+    with mock.patch.object(client, '_contentful_fetch', side_effect=fetch):
+        asyncio.run(client.gather_get(requests, concurrency=2))
+
+    assert fetch.max_in_flight == 2
+
+
+def test_contentful_get_loads_content_types(client):
+    client.FLATTEN_BY_CONTENT_TYPE = True
+    content_types = [{'sys': {'id': 'page'}, 'fields': [{'id': 'title', 'type': 'Symbol'}]}]
+
+    with mock.patch.object(client, '_contentful_fetch', side_effect=SlowFetch(0)), mock.patch.object(
+        client, '_fetch_contentful_content_types', return_value=content_types
+    ) as fetch_content_types:
+        asyncio.run(client.contentful_get('entries', query_string='skip=0'))
+        asyncio.run(client.contentful_get('entries', query_string='skip=1'))
+
+    assert fetch_content_types.call_count == 1
+    assert json.loads(client.cache[client._contentful_content_types_cache_key]) == content_types
+
+
+def test_get_many(client):
+    def fetch(item_type=None, item_id=None, query_string=None):
+        return json.dumps({
+            'sys': {'type': 'Array'},
+            'items': [{'sys': {'type': 'Entry', 'id': item_id}, 'fields': {}} for item_id in ('b', 'a')],
+        }).encode()
+
+    with mock.patch.object(client, '_contentful_fetch', side_effect=fetch) as contentful_fetch:
+        responses = asyncio.run(client.get_many(['a', 'missing', 'b']))
+        cached = asyncio.run(client.get_many(['a', 'b']))
+
+    assert responses == [{'total': 1, 'items': [{'id': 'a'}]}, None, {'total': 1, 'items': [{'id': 'b'}]}]
+    assert cached == [responses[0], responses[2]]
+    assert contentful_fetch.call_count == 1
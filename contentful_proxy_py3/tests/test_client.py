@@ -0,0 +1,267 @@
+import json
+import threading
+
+from unittest import mock
+
+import pytest
+import requests
+
+from contentful_proxy_py3 import transformations
+from contentful_proxy_py3.client import ContentfulClient
+
+
+class Client(ContentfulClient):
+    _contentful_space = 'space'
+    _contentful_token = 'token'
+    _proxy_hostname = 'http://localhost'
+
+    def __init__(self):
+        self.cache = {}
+
+    @property
+    def _cache_client(self):
+        return self.cache
+
+    def _cache_get(self, cache_key):
+        return self.cache.get(cache_key)
+
+    def _cache_set(self, cache_key, content, expiration_time):
+        self.cache[cache_key] = content
+
+
+@pytest.fixture(autouse=True)
+def sessions():
+    with mock.patch.dict(ContentfulClient._sessions, clear=True):
+        yield ContentfulClient._sessions
+
+
+@pytest.fixture
+def session_get():
+    with mock.patch('requests.Session.get') as session_get:
+        session_get.return_value.content = json.dumps({'sys': {'type': 'Array'}, 'items': []}).encode()
+        yield session_get
+
+
+def test_request_session_is_shared():
+    session = Client()._request_session()
+
+    assert Client()._request_session() is session
+    assert Client._request_session() is session
+
+
+def test_request_session_is_created_once_by_threads(sessions):
+    barrier = threading.Barrier(8)
+    created = []
+
+    def create():
+        barrier.wait()
+        created.append(Client._request_session())
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(map(id, created))) == 1
+    assert list(sessions) == [Client]
+
+
+def test_request_session_pool_and_retries():
+    class PooledClient(Client):
+        HTTP_POOL_MAXSIZE = 32
+        HTTP_KEEP_ALIVE = False
+
+    session = PooledClient._request_session()
+
+    assert session is not Client._request_session()
+    assert session.headers['Connection'] == 'close'
+    for prefix in ('http://', 'https://'):
+        adapter = session.get_adapter(prefix + 'cdn.contentful.com')
+        assert adapter.max_retries.total == PooledClient.HTTP_RETRIES
+        assert adapter._pool_maxsize == 32
+
+
+def test_contentful_get_reuses_session(session_get):
+    client = Client()
+    client.contentful_get('entries', query_string='limit=1')
+    client.contentful_get('entries', query_string='limit=2')
+
+    assert session_get.call_count == 2
+    assert {call.args[0] for call in session_get.call_args_list} == {
+        'http://cdn.contentful.com/spaces/space/environments/master/entries?limit=1',
+        'http://cdn.contentful.com/spaces/space/environments/master/entries?limit=2',
+    }
+    assert len(ContentfulClient._sessions) == 1
+
+
+def entries_response(*ids, total=None):
+    return json.dumps({
+        'sys': {'type': 'Array'},
+        'total': len(ids) if total is None else total,
+        'skip': 0,
+        'limit': 100,
+        'items': [
+            {
+                'sys': {'type': 'Entry', 'id': item_id},
+                'fields': {'title': item_id, 'author': {'sys': {'type': 'Link', 'linkType': 'Entry', 'id': 'author'}}},
+            }
+            for item_id in ids
+        ],
+        'includes': {
+            'Entry': [
+                {'sys': {'type': 'Entry', 'id': 'author'}, 'fields': {'name': 'Author'}},
+                {'sys': {'type': 'Entry', 'id': 'unrelated'}, 'fields': {'name': 'Unrelated'}},
+            ],
+        },
+    }).encode()
+
+
+def test_get_many(session_get):
+    session_get.return_value.content = entries_response('b', 'a')
+    client = Client()
+
+    responses = client.get_many(['a', 'missing', 'b', 'a'], query_string='locale=de')
+
+    assert session_get.call_count == 1
+    assert session_get.call_args.args[0] == (
+        'http://cdn.contentful.com/spaces/space/environments/master/entries?locale=de&sys.id%5Bin%5D=a%2Cmissing%2Cb'
+    )
+    assert responses == [
+        {
+            'total': 1,
+            'skip': 0,
+            'limit': 100,
+            'items': [{'id': item_id, 'title': item_id, 'author': {'id': 'author', 'name': 'Author'}}],
+        } if item_id else None
+        for item_id in ('a', None, 'b')
+    ]
+
+    # Entries are cached under keys of single entry requests
+    assert client.contentful_get('entries', item_id='a', query_string='locale=de') == responses[0]
+    assert client.get_many(['b', 'a'], query_string='locale=de') == [responses[2], responses[0]]
+    assert session_get.call_count == 1
+
+
+def test_get_many_is_chunked(session_get):
+    session_get.return_value.content = entries_response()
+
+    class ChunkedClient(Client):
+        GET_MANY_CHUNK_SIZE = 2
+
+    ChunkedClient().get_many(['a', 'b', 'c'])
+
+    assert [call.args[0].rsplit('?', 1)[1] for call in session_get.call_args_list] == [
+        'sys.id%5Bin%5D=a%2Cb', 'sys.id%5Bin%5D=c',
+    ]
+
+
+def test_get_many_loads_content_types_once_per_chunk(session_get):
+    session_get.return_value.content = entries_response('a', 'b')
+
+    class FlatteningClient(Client):
+        FLATTEN_BY_CONTENT_TYPE = True
+
+    with mock.patch.object(FlatteningClient, '_contentful_content_types', return_value=[]) as content_types:
+        responses = FlatteningClient().get_many(['a', 'b'])
+
+    assert [response['items'][0]['id'] for response in responses] == ['a', 'b']
+    assert content_types.call_count == 1
+
+
+def test_iter_entries(session_get):
+    session_get.side_effect = [
+        mock.Mock(content=entries_response('a', total=2)),
+        mock.Mock(content=entries_response('b', total=2)),
+    ]
+
+    pages = Client().iter_entries('content_type=page&skip=10&order=-sys.updatedAt', page_size=1)
+
+    assert pages.total == 2
+    assert [item['id'] for item in pages] == ['a', 'b']
+    assert [call.args[0].rsplit('?', 1)[1] for call in session_get.call_args_list] == [
+        'content_type=page&order=sys.createdAt%2Csys.id&skip=0&limit=1',
+        'content_type=page&order=sys.createdAt%2Csys.id&skip=1&limit=1',
+    ]
+
+
+def test_iter_entries_raises_error_of_page(session_get):
+    error = mock.Mock(**{'raise_for_status.side_effect': requests.HTTPError('400 Client Error')})
+    session_get.side_effect = [mock.Mock(content=entries_response('a', total=2)), error]
+    client = Client()
+
+    with pytest.raises(requests.HTTPError):
+        list(client.iter_entries('content_type=page', page_size=1))
+    assert len(client.cache) == 1
+
+
+def test_cache_key_is_canonical():
+    client = Client()
+
+    assert client._contentful_cache_key('entries', None, 'a=1&b=2&select=fields.b,fields.a') == (
+        client._contentful_cache_key('entries', None, 'select=fields.a, fields.b&b=2&a=1')
+    )
+    assert client._contentful_cache_key('entries', 'entry') != client._contentful_cache_key('entries', 'other')
+
+
+def test_cache_key_contains_environment_and_pipeline():
+    class StagingClient(Client):
+        _contentful_environment = 'staging'
+
+    class OtherHostClient(Client):
+        _proxy_hostname = 'http://other'
+
+    class FlatteningClient(Client):
+        FLATTEN_BY_CONTENT_TYPE = True
+
+    keys = {
+        client_class()._contentful_cache_key('entries', 'entry', 'locale=de')
+        for client_class in (Client, StagingClient, OtherHostClient, FlatteningClient)
+    }
+
+    assert len(keys) == 4
+    assert all(key.startswith('contentful:space:') for key in keys)
+
+
+def test_contentful_get_raw(session_get):
+    client = Client()
+
+    content = client.contentful_get_raw('entries', query_string='limit=1')
+
+    assert json.loads(content) == {'items': []}
+
+    with mock.patch('contentful_proxy_py3.client.json_codec.loads') as loads:
+        assert client.contentful_get_raw('entries', query_string='limit=1') == content
+
+    loads.assert_not_called()
+    assert session_get.call_count == 1
+
+
+def test_streamed_response_is_parsed_only_for_contentful_get(session_get):
+    session_get.return_value.content = entries_response('a')
+
+    class StreamingClient(Client):
+        STREAMING_MIN_SIZE = 0
+
+    with mock.patch('contentful_proxy_py3.client.json_codec.loads', wraps=json.loads) as loads:
+        content = StreamingClient().contentful_get_raw('entries', query_string='limit=1')
+        loads.assert_not_called()
+
+        response = StreamingClient().contentful_get('entries', query_string='limit=2')
+        loads.assert_called_once()
+
+    assert response == json.loads(content)
+    assert response['items'][0]['author'] == {'id': 'author', 'name': 'Author'}
+
+
+def test_transformations_are_fused_only_on_request(session_get):
+    session_get.return_value.content = entries_response('a')
+
+    class FusingClient(Client):
+        FUSE_TRANSFORMATIONS = True
+
+    assert not any(isinstance(stage, transformations.FusedPipeline) for stage in Client()._contentful_pipeline())
+    assert [type(stage) for stage in FusingClient()._contentful_pipeline()] == [transformations.FusedPipeline]
+    assert FusingClient().contentful_get('entries', query_string='limit=1') == Client().contentful_get(
+        'entries', query_string='limit=2'
+    )
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from contentful_proxy_py3 import json_codec
+
+CONTENT = {
+    'items': [
+        {
+            'id': 'page1',
+            'title': 'Zürich',
+            'url': 'http://localhost/contentful/file_cache/images.ctfassets.net/image.png',
+            'rating': 4.25,
+            'views': 2 ** 40,
+            'published': True,
+            'tags': ['a', 'b'],
+            'image': None,
+        },
+    ],
+    'total': 1,
+}
+
+
+@pytest.fixture(params=list(json_codec.CODECS))
+def codec(request):
+    codec = json_codec.codec
+    json_codec.select(request.param)
+    yield json_codec.codec
+    json_codec.codec = codec
+
+
+def test_codec_round_trip(codec):
+    data = json_codec.dumps(CONTENT)
+
+    assert isinstance(data, str)
+    assert json.loads(data) == CONTENT
+    assert json_codec.loads(data) == CONTENT
+    assert json_codec.loads(data.encode('utf-8')) == CONTENT
+    assert '\\/' not in data
+
+
+def test_codec_sort_keys(codec):
+    assert json_codec.dumps({'b': 1, 'a': {'d': 2, 'c': 3}}, sort_keys=True).replace(' ', '') == \
+        '{"a":{"c":3,"d":2},"b":1}'
+
+
+def test_codec_invalid_json(codec):
+    with pytest.raises(ValueError):
+        json_codec.loads('<html>')
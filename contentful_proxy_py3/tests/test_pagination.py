@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from unittest import mock
+
+import pytest
+
+from benchmarks import payloads
+from contentful_proxy_py3 import pagination
+
+CONTENT = payloads.generate(items=5, include_depth=0)
+IDS = [item['sys']['id'] for item in CONTENT['items']]
+
+
+def fetch_page(skip, limit):
+    return dict(CONTENT, skip=skip, limit=limit, items=CONTENT['items'][skip:skip + limit])
+
+
+def test_next_page_is_prefetched():
+    prefetched = threading.Event()
+    fetch = mock.Mock(wraps=fetch_page)
+
+    def fetch_and_signal(skip, limit):
+        page = fetch(skip, limit)
+        if skip:
+            prefetched.set()
+        return page
+
+    pages = pagination.PageIterator(fetch_and_signal, page_size=3)
+    items = iter(pages)
+
+    assert pages.total == 5
+    assert next(items)['sys']['id'] == IDS[0]
+    assert prefetched.wait(5)
+    assert [item['sys']['id'] for item in items] == IDS[1:]
+    assert [call.args for call in fetch.call_args_list] == [(0, 3), (3, 3)]
+
+
+def test_prefetch_error_is_raised():
+    def failing_fetch_page(skip, limit):
+        if skip:
+            raise ValueError('failed')
+        return fetch_page(skip, limit)
+
+    with pytest.raises(ValueError):
+        list(pagination.PageIterator(failing_fetch_page, page_size=2))
+
+
+def test_async_page_iterator():
+    calls = []
+
+    async def fetch_page_async(skip, limit):
+        calls.append(skip)
+        return fetch_page(skip, limit)
+
+    async def walk():
+        pages = await pagination.AsyncPageIterator(fetch_page_async, page_size=2).load()
+        return pages.total, [item['sys']['id'] async for item in pages]
+
+    assert asyncio.run(walk()) == (5, IDS)
+    assert calls == [0, 2, 4]
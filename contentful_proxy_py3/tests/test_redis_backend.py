@@ -0,0 +1,192 @@
+import asyncio
+import json
+import threading
+import time
+
+from unittest import mock
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from contentful_proxy_py3.async_client import AsyncContentfulClient  # noqa: E402
+from contentful_proxy_py3.backends.redis import (  # noqa: E402
+    AsyncRedisCache,
+    AsyncRedisCacheMixin,
+    RedisCache,
+    RedisCacheMixin,
+)
+from contentful_proxy_py3.client import ContentfulClient  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server):
+    return RedisCache(fakeredis.FakeRedis(server=server), compress_min_size=100)
+
+
+@pytest.fixture
+def client_class(server):
+    class Client(RedisCacheMixin, ContentfulClient):
+        _contentful_space = 'space'
+        _contentful_token = 'token'
+        _proxy_hostname = 'http://localhost'
+        LEASE_WAIT = 5
+
+        @classmethod
+        def _create_redis_cache(cls):
+            return RedisCache(fakeredis.FakeRedis(server=server))
+
+    with mock.patch.dict(RedisCacheMixin._redis_caches, clear=True):
+        yield Client
+
+
+@pytest.fixture
+def async_client_class(server):
+    class Client(AsyncRedisCacheMixin, AsyncContentfulClient):
+        _contentful_space = 'space'
+        _contentful_token = 'token'
+        _proxy_hostname = 'http://localhost'
+        LEASE_WAIT = 5
+
+        @classmethod
+        def _create_redis_cache(cls):
+            return AsyncRedisCache(fakeredis.FakeAsyncRedis(server=server))
+
+    return Client
+
+
+def test_values_are_compressed(cache):
+    cache.set('small', 'a' * 10, ttl=60)
+    cache.set('big', 'a' * 1000, ttl=60)
+
+    assert cache.client.get('small') == b'r' + b'a' * 10
+    assert cache.client.get('big')[:1] == b'z'
+    assert len(cache.client.get('big')) < 100
+    assert cache.get('small') == b'a' * 10
+    assert cache.get('big') == b'a' * 1000
+    assert cache.get('missing') is None
+    assert 0 < cache.client.ttl('big') <= 60
+
+
+def test_get_and_set_many(cache):
+    with mock.patch.object(cache.client, 'execute_command', wraps=cache.client.execute_command) as command:
+        cache.set_many({'a': '1', 'b': 'x' * 1000}, ttl=60)
+        assert cache.get_many(['a', 'missing', 'b']) == {'a': b'1', 'b': b'x' * 1000}
+
+    assert [call.args[0] for call in command.call_args_list] == ['MGET']
+    assert cache.get_many([]) == {}
+
+
+def test_lease(cache):
+    token = cache.acquire('key', ttl_ms=1000)
+
+    assert token is not None
+    assert cache.acquire('key', ttl_ms=1000) is None
+    assert not cache.release('key', 'other-token')
+    assert cache.release('key', token)
+    assert cache.acquire('key', ttl_ms=1000) is not None
+
+
+def test_wait_returns_value_stored_by_leaseholder(cache):
+    token = cache.acquire('key', ttl_ms=5000)
+
+    def store():
+        time.sleep(0.1)
+        cache.set('key', 'value', ttl=60)
+        cache.release('key', token)
+
+    threading.Thread(target=store).start()
+
+    assert cache.wait('key', timeout=5) == b'value'
+
+
+def test_wait_without_lease(cache):
+    assert cache.wait('key', timeout=5) is None
+
+
+def test_client_caches_responses(client_class):
+    content = json.dumps({'sys': {'type': 'Array'}, 'items': []}).encode()
+    client = client_class()
+
+    with mock.patch.object(client_class, '_contentful_fetch', return_value=content) as fetch:
+        assert client.contentful_get('entries', query_string='limit=1') == {'items': []}
+        assert client.contentful_get('entries', query_string='limit=1') == {'items': []}
+        assert json.loads(client.contentful_get_raw('entries', query_string='limit=1')) == {'items': []}
+
+    assert fetch.call_count == 1
+    assert client_class()._cache_client is client._cache_client
+
+
+def test_concurrent_misses_fetch_once(client_class):
+    def fetch(*args):
+        time.sleep(0.2)
+        return json.dumps({'sys': {'type': 'Array'}, 'items': []}).encode()
+
+    responses = []
+    with mock.patch.object(client_class, '_contentful_fetch', side_effect=fetch) as contentful_fetch:
+        threads = [
+            threading.Thread(target=lambda: responses.append(client_class().contentful_get('entries')))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert contentful_fetch.call_count == 1
+    assert responses == [{'items': []}] * 4
+
+
+def test_sync_mixin_rejects_async_client():
+    with pytest.raises(TypeError):
+        class Client(RedisCacheMixin, AsyncContentfulClient):
+            pass
+
+
+def test_async_cache(server):
+    async def run():
+        cache = AsyncRedisCache(fakeredis.FakeAsyncRedis(server=server), compress_min_size=100)
+
+        await cache.set_many({'a': '1', 'b': 'x' * 1000}, ttl=60)
+        assert await cache.get_many(['a', 'missing', 'b']) == {'a': b'1', 'b': b'x' * 1000}
+        assert await cache.get('b') == b'x' * 1000
+
+        token = await cache.acquire('key', ttl_ms=1000)
+        assert token is not None
+        assert await cache.acquire('key', ttl_ms=1000) is None
+        assert not await cache.release('key', 'other-token')
+        assert await cache.release('key', token)
+        assert await cache.wait('key', timeout=5) is None
+
+    asyncio.run(run())
+    assert fakeredis.FakeRedis(server=server).get('b')[:1] == b'z'
+
+
+def test_async_client_caches_responses(async_client_class):
+    content = json.dumps({'sys': {'type': 'Array'}, 'items': []}).encode()
+
+    with mock.patch.object(async_client_class, '_contentful_fetch', return_value=content) as fetch:
+        assert asyncio.run(async_client_class().contentful_get('entries', query_string='limit=1')) == {'items': []}
+        assert asyncio.run(async_client_class().contentful_get('entries', query_string='limit=1')) == {'items': []}
+
+    assert fetch.call_count == 1
+
+
+def test_async_concurrent_misses_fetch_once(async_client_class):
+    def fetch(*args):
+        time.sleep(0.2)
+        return json.dumps({'sys': {'type': 'Array'}, 'items': []}).encode()
+
+    async def run():
+        return await asyncio.gather(*(async_client_class().contentful_get('entries') for _ in range(4)))
+
+    with mock.patch.object(async_client_class, '_contentful_fetch', side_effect=fetch) as contentful_fetch:
+        responses = asyncio.run(run())
+
+    assert contentful_fetch.call_count == 1
+    assert responses == [{'items': []}] * 4
@@ -0,0 +1,88 @@
+import copy
+import json
+import tracemalloc
+
+import pytest
+
+from benchmarks import payloads
+from contentful_proxy_py3 import transformations
+from contentful_proxy_py3.transformations import streaming
+
+
+def pipeline(flatten_fields=True):
+    return transformations.compile_pipeline([
+        transformations.ReplaceAssetLinks(proxy_hostname='http://localhost'),
+        transformations.ResolveIncludes(),
+    ] + ([transformations.FlattenFields()] if flatten_fields else []) + [
+        transformations.RemoveIncludes(),
+        transformations.RemoveRootSys(),
+    ])
+
+
+@pytest.fixture(params=['ijson', 'json'])
+def parser(request, monkeypatch):
+    if request.param == 'ijson':
+        pytest.importorskip('ijson')
+    else:
+        monkeypatch.setattr(streaming, 'ijson', None)
+    return request.param
+
+
+def transformed(content):
+    content = copy.deepcopy(content)
+    for transformation in pipeline():
+        transformation(content)
+    return content
+
+
+@pytest.mark.parametrize('content', [
+    payloads.generate(items=20),
+    dict(payloads.generate(items=20), items=payloads.generate(items=2)['includes']['Asset']),
+    {key: value for key, value in payloads.generate(items=20).items() if key != 'includes'},
+    {'sys': {'type': 'Entry', 'id': 'page1'}, 'fields': {'title': 'Page 1'}},
+])
+def test_streaming_is_equivalent(parser, content):
+    data = json.dumps(content).encode('utf-8')
+
+    assert streaming.accepts(pipeline())
+    assert json.loads(streaming.transform(data, pipeline()[0])) == transformed(content)
+
+
+def test_streaming_observes_items(parser):
+    observed = []
+
+    streaming.transform(
+        json.dumps(payloads.generate(items=3)).encode('utf-8'),
+        pipeline()[0],
+        observe=lambda obj: observed.append(copy.deepcopy(obj)),
+    )
+
+    assert [item['sys']['id'] for item in observed[1:]] == ['entry0', 'entry1', 'entry2']
+    assert 'includes' in observed[0]
+
+
+def test_streaming_not_json(parser):
+    with pytest.raises(streaming.DecodeError):
+        streaming.transform(b'<html>', pipeline()[0])
+
+
+def test_streaming_lowers_peak_memory():
+    pytest.importorskip('ijson')
+    data = json.dumps(payloads.generate(items=500, include_depth=0)).encode('utf-8')
+
+    tracemalloc.start()
+    try:
+        content = json.loads(data)
+        for transformation in pipeline(flatten_fields=False):
+            transformation(content)
+        json.dumps(content)
+        del content
+        _, peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        streaming.transform(data, pipeline(flatten_fields=False)[0])
+        _, streaming_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert streaming_peak < peak * 0.75
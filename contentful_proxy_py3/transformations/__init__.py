@@ -3,3 +3,5 @@ from .remove_includes import RemoveIncludes
 from .remove_sys_root import RemoveRootSys
 from .replace_assets_links import ReplaceAssetLinks
 from .resolve_includes import ResolveIncludes
+from .pipeline import FusedPipeline, compile_pipeline
+from . import streaming
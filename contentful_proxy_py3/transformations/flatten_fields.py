@@ -1,8 +1,12 @@
+import hashlib
 import logging
 
 import rich_text_renderer
 from rich_text_renderer.base_node_renderer import BaseNodeRenderer
 
+from .. import json_codec
+from ..backends.local import LRUCache
+
 
 class ImageRenderer(BaseNodeRenderer):
     IMAGE_HTML = '<img src="{0}" alt="{1}" />'
@@ -16,12 +20,148 @@ class ImageRenderer(BaseNodeRenderer):
 
 
 class FlattenFields(object):
+    """
+    Flattens fields of items to plain values.
+
+    Without content types the kind of every field is guessed from its value. With
+    content types (list of definitions or callable returning it, loaded on first use)
+    fields are flattened by plan built from their definitions, fields missing from
+    the plan fall back to guessing.
+    """
+
     renderer = rich_text_renderer.RichTextRenderer(
         {
             'embedded-asset-block': ImageRenderer
         }
     )
 
+    RENDER_CACHE = LRUCache(max_bytes=4 * 1024 * 1024, ttl=60 * 60)  # rendered rich text by document hash
+
+    SCALAR_TYPES = ('Symbol', 'Text', 'Integer', 'Number', 'Boolean', 'Date', 'Location')
+
+    def __init__(self, content_types=None):
+        self.content_types = content_types
+        self._plans = None
+
+    @property
+    def plans(self) -> dict:
+        """
+        Flattener of every field by content type ID and field ID.
+        """
+        if self._plans is None:
+            content_types = self.content_types
+            if callable(content_types):
+                try:
+                    content_types = content_types()
+                except Exception:  # Guessing still works without content types
+                    logging.exception('Failed to load content types')
+                    content_types = None
+
+            self._plans = {
+                content_type['sys']['id']: self.plan(content_type)
+                for content_type in content_types or []
+            }
+
+        return self._plans
+
+    @classmethod
+    def plan(cls, content_type: dict) -> dict:
+        return {
+            field['id']: cls.field_flattener(field)
+            for field in content_type.get('fields', [])
+        }
+
+    @classmethod
+    def field_flattener(cls, field: dict):
+        field_type = field.get('type')
+        link_type = field.get('linkType')
+        if field_type == 'Array':
+            field_type = field.get('items', {}).get('type')
+            link_type = field.get('items', {}).get('linkType')
+            if field_type == 'Symbol':
+                return list
+            if field_type == 'Link' and link_type == 'Asset':
+                return cls.flatten_assets
+        elif field_type in cls.SCALAR_TYPES:
+            return cls._flatten_scalar
+        elif field_type == 'RichText':
+            return cls.flatten_rich_text
+        elif field_type == 'Link' and link_type == 'Asset':
+            return cls.flatten_asset
+
+        return cls.flatten_field
+
+    @staticmethod
+    def _flatten_scalar(field_value):
+        return field_value
+
+    @staticmethod
+    def is_rich_text(field_value) -> bool:
+        return isinstance(field_value, dict) and field_value.get('nodeType') == 'document'
+
+    @classmethod
+    def render_rich_text(cls, document: dict) -> str:
+        """
+        Renders rich text document to HTML, equal documents are rendered once.
+        """
+        key = hashlib.sha1(json_codec.dumps(document, sort_keys=True).encode('utf-8')).hexdigest()
+
+        html = cls.RENDER_CACHE.get(key)
+        if html is None:
+            html = cls.renderer.render(document)
+            cls.RENDER_CACHE.set(key, html)
+
+        return html
+
+    @classmethod
+    def flatten_rich_text(cls, field_value):
+        if cls.is_rich_text(field_value):
+            try:
+                return cls.render_rich_text(field_value)
+            except Exception:  # Documents with unresolved embeds are guessed
+                pass
+
+        return cls.flatten_field(field_value)
+
+    @classmethod
+    def flatten_asset(cls, field_value):
+        """
+        Flattens linked asset to image or url of its file.
+        """
+        asset_file = field_value.get('file') if isinstance(field_value, dict) else None
+        if not isinstance(asset_file, dict) or 'url' not in asset_file:
+            return cls.flatten_field(field_value)
+
+        image = (asset_file.get('details') or {}).get('image') or {}
+        if 'width' not in image or 'height' not in image:
+            return asset_file['url']
+
+        value = {
+            'url': asset_file['url'],
+            'width': image['width'],
+            'height': image['height'],
+        }
+        if 'title' in field_value:
+            value['title'] = field_value['title']
+
+        return value
+
+    @classmethod
+    def flatten_assets(cls, field_value):
+        """
+        Flattens list of linked assets, lists with unresolved links are guessed.
+        """
+        if not isinstance(field_value, list):
+            return cls.flatten_field(field_value)
+        if not field_value:
+            return []
+
+        asset_file = field_value[0].get('file') if isinstance(field_value[0], dict) else None
+        if not isinstance(asset_file, dict) or 'contentType' not in asset_file:
+            return cls.flatten_field(field_value)
+
+        return [cls.flatten_asset(value) for value in field_value]
+
     @classmethod
     def _flatten_image_field(cls, field_value):
         value = {
@@ -47,10 +187,11 @@ class FlattenFields(object):
     @classmethod
     def flatten_field(cls, field_value):
         # Flatten richText fields
-        try:
-            return cls.renderer.render(field_value)
-        except Exception:  # It is really raised
-            pass
+        if cls.is_rich_text(field_value):
+            try:
+                return cls.render_rich_text(field_value)
+            except Exception:  # It is really raised
+                pass
 
         if isinstance(field_value, (str, bool, int, float)):
             # No flattening
@@ -130,9 +271,27 @@ class FlattenFields(object):
 
         return fields
 
+    def flatten_item(self, item):
+        """
+        Flattens fields of item by plan of its content type.
+        """
+        content_type_id = item['sys'].get('contentType', {}).get('sys', {}).get('id')
+        plan = self.plans.get(content_type_id)
+        if plan is None or not isinstance(item['fields'], dict):
+            return self.flatten_fields(item['fields'], item['sys']['id'])
+
+        fields = {
+            key: plan.get(key, self.flatten_field)(value)
+            for key, value in item['fields'].items()
+            if value is not None
+        }
+        fields['id'] = item['sys']['id']
+
+        return fields
+
     def __call__(self, content):
         content['items'] = [
-            self.flatten_fields(entry['fields'], entry['sys']['id'])
+            self.flatten_item(entry)
             for entry in content.get('items', [])
         ]
 
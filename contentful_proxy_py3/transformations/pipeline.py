@@ -0,0 +1,110 @@
+from .flatten_fields import FlattenFields
+from .remove_includes import RemoveIncludes
+from .remove_sys_root import RemoveRootSys
+from .replace_assets_links import ReplaceAssetLinks
+from .resolve_includes import ResolveIncludes
+
+
+class FusedPipeline:
+    """
+    Runs default transformations in a single pass over the response.
+
+    Asset links are replaced while includes are indexed, every item is resolved
+    (and flattened) right after it is read and includes and root sys are dropped
+    without touching the rest of the response.
+
+    It is not faster than running the transformations one by one (see
+    `benchmarks.transformations`), clients use it to stream big responses item by
+    item (see `streaming`) and only with `FUSE_TRANSFORMATIONS` for the rest.
+    """
+
+    STAGES = (ReplaceAssetLinks, ResolveIncludes, FlattenFields, RemoveIncludes, RemoveRootSys)
+
+    def __init__(self, transformations):
+        self.transformations = list(transformations)
+
+        stages = {type(transformation): transformation for transformation in self.transformations}
+        self.replace_asset_links = stages.get(ReplaceAssetLinks)
+        self.resolve_includes = stages[ResolveIncludes]
+        self.flatten_fields = stages.get(FlattenFields)
+        self.remove_includes = RemoveIncludes in stages
+        self.remove_root_sys = RemoveRootSys in stages
+
+    @classmethod
+    def accepts(cls, transformations) -> bool:
+        """
+        Checks that transformations are stages of the pipeline (in the same order)
+        including `ResolveIncludes`. Subclasses of stages are not fused.
+        """
+        stages = [type(transformation) for transformation in transformations]
+        if ResolveIncludes not in stages or not all(stage in cls.STAGES for stage in stages):
+            return False
+
+        positions = [cls.STAGES.index(stage) for stage in stages]
+        return positions == sorted(set(positions))
+
+    def _replace_asset_link(self, asset):
+        try:
+            self.replace_asset_links.transform_asset(asset)
+        except (TypeError, KeyError):
+            pass
+
+    def index(self, includes):
+        """
+        Replaces asset links of includes and returns index of includes and memo of resolved items.
+        """
+        if self.replace_asset_links is not None:
+            for asset in includes.get('Asset', []):
+                self._replace_asset_link(asset)
+
+        return self.resolve_includes.index_includes(includes), {}
+
+    def transform_item(self, item, includes, memo):
+        """
+        Transforms single item, response without includes is passed as None.
+        """
+        if self.replace_asset_links is not None and item.get('sys', {}).get('type') == 'Asset':
+            self._replace_asset_link(item)
+
+        if includes is not None:
+            item = self.resolve_includes.resolve(item, includes, memo)
+
+        if self.flatten_fields is not None:
+            item = self.flatten_fields.flatten_item(item)
+
+        return item
+
+    def finish(self, content):
+        """
+        Removes includes and root sys from (already transformed) response.
+        """
+        if self.remove_includes:
+            content.pop('includes', None)
+        if self.remove_root_sys:
+            content.pop('sys', None)
+
+    def __call__(self, content):
+        try:
+            unmodified_includes = content['includes']
+            unmodified_items = content['items']
+        except KeyError:
+            # Nothing to resolve, stages are cheap on their own
+            for transformation in self.transformations:
+                transformation(content)
+            return content
+
+        includes, memo = self.index(unmodified_includes)
+        content['items'] = [self.transform_item(item, includes, memo) for item in unmodified_items]
+        self.finish(content)
+
+        return content
+
+
+def compile_pipeline(transformations) -> list:
+    """
+    Returns transformations fused into single pass when they form the default pipeline.
+    """
+    if FusedPipeline.accepts(transformations):
+        return [FusedPipeline(transformations)]
+
+    return list(transformations)
@@ -16,16 +16,19 @@ class ReplaceAssetLinks:
         )
         return proxy_url
 
+    def transform_asset(self, asset):
+        asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+
     def __call__(self, content):
         try:
             for asset in content['includes']['Asset']:
-                asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+                self.transform_asset(asset)
         except (TypeError, KeyError):
             pass
 
         try:
             for asset in content['items']:
                 if asset['sys']['type'] == 'Asset':
-                    asset['fields']['file']['url'] = self.transform_url(asset['fields']['file']['url'])
+                    self.transform_asset(asset)
         except (TypeError, KeyError):
             pass
@@ -4,47 +4,115 @@ import collections
 class ResolveIncludes:
     """
     Replace all Contentful link types with data from includes.
+
+    Every included item is resolved once and shared by all links to it. Links closing
+    a cycle and links nested deeper than `max_depth` are kept unresolved.
     """
 
-    def __call__(self, content):
-        try:
-            # Do not modify content if it does not contain includes and items
-            unmodified_includes = content['includes']
-            unmodified_items = content['items']
-        except KeyError:
-            return content
+    def __init__(self, max_depth: int = None):
+        self.max_depth = max_depth
 
+    @staticmethod
+    def index_includes(unmodified_includes):
         includes = collections.defaultdict(dict)
 
         for key, values in unmodified_includes.items():
             for value in values:
                 includes[key][value['sys']['id']] = value['fields']
 
-        def transform_content(obj):
-            if isinstance(obj, dict):
-                try:
-                    if not obj['sys']['type'] == 'Link' or not obj['sys']['linkType'] in ['Asset', 'Entry']:
-                        raise TypeError
-                except (TypeError, KeyError):
-                    pass
+        return includes
+
+    @staticmethod
+    def link(obj):
+        try:
+            if obj['sys']['type'] == 'Link' and obj['sys']['linkType'] in ('Asset', 'Entry'):
+                return obj['sys']['linkType'], obj['sys']['id']
+        except (TypeError, KeyError):
+            pass
+
+        return None
+
+    def resolve(self, obj, includes, memo: dict = None):
+        """
+        Returns copy of object with links replaced by included items.
+
+        Resolved items are stored in `memo`, pass the same dict to share them between calls.
+        An item with links cut below it (by a cycle or `max_depth`) depends on the links
+        above it, its copy is shared only by links reached through the same path.
+        """
+        if memo is None:
+            memo = {}
+
+        root = {}
+        stack = [(root, None, obj, 0, frozenset())]
+        frames = []  # [memo key, path memo key, cut] of items being resolved, innermost last
+
+        while stack:
+            parent, key, value, depth, path = stack.pop()
+
+            if parent is None:
+                # Every link below the item is resolved
+                memo_key, path_key, cut = frames.pop()
+                if cut:
+                    memo[path_key] = memo.pop(memo_key)
+                    if frames:
+                        frames[-1][2] = True
+                continue
+
+            if isinstance(value, dict):
+                link = self.link(value)
+                if link is not None and link[1] not in includes[link[0]]:
+                    link = None
+                elif link is not None and (
+                    link in path or (self.max_depth is not None and depth >= self.max_depth)
+                ):
+                    if frames:
+                        frames[-1][2] = True
+                    link = None
+
+                if link is not None:
+                    memo_key = link if self.max_depth is None else (*link, depth)
+                    path_key = (*link, path)
+                    if memo_key in memo:
+                        parent[key] = memo[memo_key]
+                        continue
+                    if path_key in memo:
+                        if frames:
+                            frames[-1][2] = True
+                        parent[key] = memo[path_key]
+                        continue
+
+                    link_type, obj_id = link
+                    value = includes[link_type][obj_id]
+                    value['id'] = obj_id
+
+                    copy = memo[memo_key] = dict.fromkeys(value)
+                    frames.append([memo_key, path_key, False])
+                    stack.append((None, None, None, depth, path))
+                    depth += 1
+                    path = path | {link}
                 else:
-                    obj_id = obj['sys']['id']
-                    try:
-                        obj = includes[obj['sys']['linkType']][obj_id]
-                    except KeyError:
-                        pass
-                    else:
-                        obj['id'] = obj_id
-
-                return {
-                    key: transform_content(value)
-                    for key, value in obj.items()
-                }
-            elif isinstance(obj, list):
-                return [transform_content(element) for element in obj]
+                    copy = dict.fromkeys(value)
+
+                parent[key] = copy
+                stack.extend((copy, child_key, child, depth, path) for child_key, child in value.items())
+            elif isinstance(value, list):
+                copy = parent[key] = [None] * len(value)
+                stack.extend((copy, index, child, depth, path) for index, child in enumerate(value))
             else:
-                return obj
+                parent[key] = value
+
+        return root[None]
+
+    def __call__(self, content):
+        try:
+            # Do not modify content if it does not contain includes and items
+            unmodified_includes = content['includes']
+            unmodified_items = content['items']
+        except KeyError:
+            return content
 
-        content['items'] = transform_content(unmodified_items)
+        includes = self.index_includes(unmodified_includes)
+        content['items'] = self.resolve(unmodified_items, includes)
 
         return content
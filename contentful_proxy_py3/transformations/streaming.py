@@ -0,0 +1,151 @@
+import decimal
+import io
+import logging
+
+from typing import Callable, Iterator, Optional, Tuple
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # ijson is optional, without it the whole response is decoded at once
+    ijson = None
+
+from .. import json_codec
+from .pipeline import FusedPipeline
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def accepts(pipeline: list) -> bool:
+    """
+    Checks that pipeline (see `compile_pipeline`) can transform response item by item.
+    """
+    return len(pipeline) == 1 and isinstance(pipeline[0], FusedPipeline)
+
+
+def _events(data: bytes):
+    try:
+        for prefix, event, value in ijson.parse(io.BytesIO(data)):
+            if isinstance(value, decimal.Decimal):
+                value = float(value)
+            yield prefix, event, value
+    except ijson.JSONError as ex:
+        raise DecodeError(ex) from ex
+
+
+def _members(data: bytes) -> Tuple[dict, bool]:
+    """
+    Builds top-level members of response except items in first pass over data.
+    """
+    members = {}
+    has_items = False
+    key = builder = None
+
+    for prefix, event, value in _events(data):
+        if prefix == '':
+            if event == 'map_key':
+                key = value
+                has_items = has_items or key == 'items'
+                builder = None if key == 'items' else ObjectBuilder()
+            continue
+
+        if builder is not None:
+            builder.event(event, value)
+            if key not in members:
+                members[key] = builder.value
+
+    return members, has_items
+
+
+def _items(data: bytes) -> Iterator[dict]:
+    """
+    Builds items of response one by one in second pass over data.
+    """
+    builder = None
+
+    for prefix, event, value in _events(data):
+        if prefix == 'items.item' and event == 'start_map':
+            builder = ObjectBuilder()
+
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == 'items.item' and event == 'end_map':
+                yield builder.value
+                builder = None
+
+
+def _consume(items: list) -> Iterator[dict]:
+    items.reverse()
+    while items:
+        yield items.pop()
+
+
+def parse(data: bytes) -> Tuple[dict, Optional[Iterator[dict]]]:
+    """
+    Returns top-level members of response (without items) and iterator of its items (None if
+    response has no items). Decoded items are not referenced after they are yielded.
+    """
+    if ijson is not None:
+        members, has_items = _members(data)
+        return members, _items(data) if has_items else None
+
+    logging.warning(f'ijson is not installed, response of {len(data)} bytes is decoded at once')
+    try:
+        content = json_codec.loads(data)
+    except ValueError as ex:
+        raise DecodeError(ex) from ex
+
+    if not isinstance(content, dict) or 'items' not in content:
+        return content, None
+
+    return content, _consume(content.pop('items'))
+
+
+def iter_transformed(data: bytes, pipeline: FusedPipeline, observe: Callable = None) -> Iterator[str]:
+    """
+    Yields JSON of response transformed by fused pipeline in chunks.
+
+    Includes are decoded and indexed first, items are decoded, transformed and encoded
+    one at a time, so the whole decoded response is never held in memory (with ijson).
+
+    :param observe: Called with top-level members and every decoded item before it is transformed.
+    """
+    members, items = parse(data)
+    if observe is not None:
+        observe(members)
+
+    if items is None:
+        # Not a collection, there is nothing to stream
+        pipeline(members)
+        yield json_codec.dumps(members)
+        return
+
+    if 'includes' in members:
+        includes, memo = pipeline.index(members['includes'])
+    else:
+        includes, memo = None, None
+
+    yield '{"items": ['
+    for i, item in enumerate(items):
+        if observe is not None:
+            observe(item)
+        if i:
+            yield ', '
+        yield json_codec.dumps(pipeline.transform_item(item, includes, memo))
+    yield ']'
+
+    pipeline.finish(members)
+    for key, value in members.items():
+        yield f', {json_codec.dumps(key)}: {json_codec.dumps(value)}'
+    yield '}'
+
+
+def transform(data: bytes, pipeline: FusedPipeline, observe: Callable = None) -> str:
+    """
+    Returns JSON of response transformed by fused pipeline, see `iter_transformed`.
+
+    :raises DecodeError: Response is not JSON.
+    """
+    return ''.join(iter_transformed(data, pipeline, observe))